@@ -0,0 +1,82 @@
+"""Measure the cost of HTML escaping in to_html() against unescaped (raw) output.
+
+Run from the repository root:  python3 benchmarks/bench_escaping.py [pages]
+
+Three serializers render the same trees: "raw" (no escaping, the output before
+escaping was added), "html.escape" (escaping every string with the stdlib) and
+"fast path" (htmlnode.escape_text / escape_attribute). The "special" corpus
+puts &, < and > into prose so the slow path is exercised too.
+"""
+import html
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import htmlnode  # noqa: E402
+from corpus import CorpusGenerator  # noqa: E402
+from split_blocks import markdown_to_html_node  # noqa: E402
+
+
+FAST = (htmlnode.escape_text, htmlnode.escape_attribute)
+ESCAPERS = {
+    "raw": (lambda text: text, str),
+    "html.escape": (lambda text: html.escape(text, quote=False), lambda value: html.escape(str(value))),
+    "fast path": FAST,
+}
+
+
+def build_trees(pages, special):
+    generator = CorpusGenerator(seed=1)
+    trees = []
+    for index in range(pages):
+        markdown = generator.page(f"Page {index}")
+        if special:
+            markdown = markdown.replace(" and ", " & ").replace(" the ", " <the> ")
+        trees.append(markdown_to_html_node(markdown))
+    return trees
+
+
+def time_serializer(trees, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for tree in trees:
+            tree.to_html()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run(pages=200):
+    results = []
+    for corpus in ("plain", "special"):
+        trees = build_trees(pages, corpus == "special")
+        timings = {}
+        for name, (escape_text, escape_attribute) in ESCAPERS.items():
+            htmlnode.escape_text, htmlnode.escape_attribute = escape_text, escape_attribute
+            try:
+                timings[name] = time_serializer(trees)
+            finally:
+                htmlnode.escape_text, htmlnode.escape_attribute = FAST
+        for name, seconds in timings.items():
+            results.append({
+                "corpus": corpus,
+                "escaper": name,
+                "ms": round(seconds * 1000, 2),
+                "overhead_percent": round(100 * (seconds - timings["raw"]) / timings["raw"], 1),
+            })
+    return results
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'corpus':<8} {'escaper':<12} {'to_html ms':>11} {'vs raw':>8}")
+    for row in run(pages):
+        print(f"{row['corpus']:<8} {row['escaper']:<12} {row['ms']:>11} {row['overhead_percent']:>7}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure per-node memory of TextNode / HTMLNode against the old dict-based layout.
+
+Run from the repository root:  python3 benchmarks/bench_node_memory.py [count]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from htmlnode import LeafNode, ParentNode  # noqa: E402
+from textnode import TextNode, TextType  # noqa: E402
+
+
+# The pre-__slots__ layout, kept here only as the baseline to compare against
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text if text is not None else ""
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None, parent=None):
+        self.tag = tag
+        self.value = value
+        self.children = children or []
+        self.props = props or {}
+        self.parent = parent
+        for child in self.children:
+            if child.parent is None:
+                child.parent = self
+
+
+def measure(factory, count):
+    # Average bytes per node, including everything the node allocates on construction
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Don't charge the holding list to the nodes
+    list_bytes = sys.getsizeof(nodes)
+    del nodes
+    return (after - before - list_bytes) / count
+
+
+CASES = [
+    (
+        "TextNode",
+        lambda i: DictTextNode("word", TextType.TEXT),
+        lambda i: TextNode("word", TextType.TEXT),
+    ),
+    (
+        "leaf HTMLNode",
+        lambda i: DictHTMLNode(None, "word"),
+        lambda i: LeafNode(None, "word"),
+    ),
+    (
+        "parent HTMLNode (2 children)",
+        lambda i: DictHTMLNode("p", None, [DictHTMLNode(None, "a"), DictHTMLNode("b", "c")]),
+        lambda i: ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "c")]),
+    ),
+]
+
+
+def run(count=100_000):
+    results = []
+    for name, old_factory, new_factory in CASES:
+        old = measure(old_factory, count)
+        new = measure(new_factory, count)
+        results.append({
+            "case": name,
+            "old_bytes_per_node": round(old, 1),
+            "new_bytes_per_node": round(new, 1),
+            "saved_percent": round(100 * (old - new) / old, 1),
+        })
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{'case':<30} {'old B/node':>11} {'new B/node':>11} {'saved':>7}")
+    for row in run(count):
+        print(
+            f"{row['case']:<30} {row['old_bytes_per_node']:>11} "
+            f"{row['new_bytes_per_node']:>11} {row['saved_percent']:>6}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
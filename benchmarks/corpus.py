@@ -0,0 +1,139 @@
+"""Deterministic synthetic content trees for benchmarking the site pipeline.
+
+The same parameters and seed always produce byte-identical output, so results
+from different commits are measured on the same input.
+"""
+import os
+import random
+
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 50,
+    "heading": 10,
+    "unordered_list": 12,
+    "ordered_list": 8,
+    "quote": 8,
+    "code": 12,
+}
+
+WORDS = (
+    "ring shire elf dwarf wizard river mountain forest road tower king queen "
+    "sword light shadow song tale age star stone gate hall fire water wind "
+    "journey fellowship council battle path valley wood lore gift return"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+class CorpusGenerator:
+    def __init__(
+        self,
+        seed=1,
+        block_mix=None,
+        blocks_per_page=40,
+        words_per_block=40,
+        inline_density=0.1,
+        nesting_depth=2,
+    ):
+        self.random = random.Random(seed)
+        self.block_mix = block_mix or DEFAULT_BLOCK_MIX
+        self.blocks_per_page = blocks_per_page
+        self.words_per_block = words_per_block
+        self.inline_density = inline_density
+        self.nesting_depth = nesting_depth
+
+    def words(self, count):
+        return [self.random.choice(WORDS) for _ in range(count)]
+
+    def inline_text(self, count):
+        # Plain words with a share of them wrapped in inline markup
+        pieces = []
+        for word in self.words(count):
+            if self.random.random() >= self.inline_density:
+                pieces.append(word)
+                continue
+            kind = self.random.randrange(6)
+            if kind == 0:
+                pieces.append(f"**{word}**")
+            elif kind == 1:
+                pieces.append(f"_{word}_")
+            elif kind == 2:
+                pieces.append(f"`{word}`")
+            elif kind == 3:
+                pieces.append(f"[{word}](/{word}/)")
+            elif kind == 4:
+                pieces.append(f"![{word}](/images/{word}.png)")
+            else:
+                pieces.append(f"**{word} _{self.random.choice(WORDS)}_**")
+        return " ".join(pieces)
+
+    def block(self, kind):
+        size = self.words_per_block
+        if kind == "heading":
+            return "#" * self.random.randint(2, 6) + " " + self.inline_text(max(2, size // 8))
+        if kind == "code":
+            lines = [" ".join(self.words(6)) for _ in range(max(1, size // 6))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        if kind == "quote":
+            lines = [self.inline_text(8) for _ in range(max(1, size // 8))]
+            return "\n".join("> " + line for line in lines)
+        if kind == "unordered_list":
+            lines = [self.inline_text(6) for _ in range(max(1, size // 6))]
+            return "\n".join("- " + line for line in lines)
+        if kind == "ordered_list":
+            lines = [self.inline_text(6) for _ in range(max(1, size // 6))]
+            return "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+        return self.inline_text(size)
+
+    def page(self, title):
+        kinds = list(self.block_mix)
+        weights = [self.block_mix[kind] for kind in kinds]
+        blocks = [f"# {title}"]
+        for kind in self.random.choices(kinds, weights, k=self.blocks_per_page):
+            blocks.append(self.block(kind))
+        return "\n\n".join(blocks) + "\n"
+
+    def page_dir(self, index):
+        # Spread pages over sections up to nesting_depth levels deep
+        parts = []
+        for level in range(self.random.randint(0, self.nesting_depth)):
+            parts.append(f"section{self.random.randrange(4)}")
+        parts.append(f"page{index}")
+        return os.path.join(*parts)
+
+
+def generate_site(root, pages=100, seed=1, **options):
+    """Write content/, static/ and template.html for a synthetic site under root."""
+    generator = CorpusGenerator(seed=seed, **options)
+    content = os.path.join(root, "content")
+    os.makedirs(content, exist_ok=True)
+    with open(os.path.join(content, "index.md"), 'w') as file:
+        file.write(generator.page("Home"))
+    for index in range(pages - 1):
+        page_dir = os.path.join(content, generator.page_dir(index))
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), 'w') as file:
+            file.write(generator.page(f"Page {index}"))
+
+    static = os.path.join(root, "static", "images")
+    os.makedirs(static, exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), 'w') as file:
+        file.write("body { font-family: serif; }\n")
+    for word in WORDS:
+        with open(os.path.join(static, f"{word}.png"), 'wb') as file:
+            file.write(bytes(generator.random.randrange(256) for _ in range(256)))
+
+    with open(os.path.join(root, "template.html"), 'w') as file:
+        file.write(TEMPLATE)
+    return root
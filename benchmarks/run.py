@@ -0,0 +1,237 @@
+"""Benchmark suite for the markdown -> HTML pipeline.
+
+Runs per-stage micro-benchmarks and end-to-end builds on a synthetic corpus
+(see corpus.py) and writes machine-readable JSON results.
+
+    python3 benchmarks/run.py --output bench.json
+    python3 benchmarks/run.py --compare bench.json   # fail on regressions
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main as site_main  # noqa: E402
+from corpus import generate_site  # noqa: E402
+from markdown_html import markdown_to_html_batch  # noqa: E402
+from split_blocks import (  # noqa: E402
+    block_to_block_type, iter_blocks, markdown_to_blocks, markdown_to_html_node, write_markdown_html,
+)
+from split_nodes import text_to_textnodes  # noqa: E402
+
+
+RESULTS_VERSION = 1
+
+
+def time_call(func, repeat, number=1):
+    # Returns per-call timings (seconds) for `repeat` samples of `number` calls each
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return samples
+
+
+def summarize(samples, items=None):
+    result = {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "runs": len(samples),
+    }
+    if items:
+        result["items"] = items
+        result["per_item_us"] = result["median_s"] / items * 1e6
+    return result
+
+
+def load_pages(root):
+    pages = []
+    for dir_path, _, file_names in os.walk(os.path.join(root, "content")):
+        for name in sorted(file_names):
+            with open(os.path.join(dir_path, name)) as file:
+                pages.append(file.read())
+    return pages
+
+
+def stage_benchmarks(pages, repeat):
+    blocks = [block for page in pages for block in markdown_to_blocks(page)]
+    inline_blocks = [block for block in blocks if not block.startswith("```")]
+    trees = [markdown_to_html_node(page) for page in pages]
+
+    def run_blocks():
+        for page in pages:
+            markdown_to_blocks(page)
+
+    def run_block_types():
+        for block in blocks:
+            block_to_block_type(block)
+
+    def run_inline():
+        for block in inline_blocks:
+            text_to_textnodes(block)
+
+    def run_tree():
+        for page in pages:
+            markdown_to_html_node(page)
+
+    def run_to_html():
+        for tree in trees:
+            tree.to_html()
+
+    def run_streaming():
+        for page in pages:
+            write_markdown_html(iter_blocks(io.StringIO(page)), io.StringIO())
+
+    def run_batch():
+        markdown_to_html_batch(pages)
+
+    return {
+        "markdown_to_blocks": summarize(time_call(run_blocks, repeat), len(pages)),
+        "block_to_block_type": summarize(time_call(run_block_types, repeat), len(blocks)),
+        "text_to_textnodes": summarize(time_call(run_inline, repeat), len(inline_blocks)),
+        "markdown_to_html_node": summarize(time_call(run_tree, repeat), len(pages)),
+        "to_html": summarize(time_call(run_to_html, repeat), len(trees)),
+        "write_markdown_html": summarize(time_call(run_streaming, repeat), len(pages)),
+        "markdown_to_html_batch": summarize(time_call(run_batch, repeat), len(pages)),
+    }
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def build_benchmarks(root, page_count, repeat, workers):
+    results = {}
+    with working_directory(root):
+        def clean_build():
+            site_main.main(["-q", "--workers", str(workers)])
+
+        def noop_incremental_build():
+            site_main.main(["-q", "--incremental", "--workers", str(workers)])
+
+        results["build_full"] = summarize(time_call(clean_build, repeat), page_count)
+        results["build_incremental_noop"] = summarize(time_call(noop_incremental_build, repeat), page_count)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=SRC_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    # Print old/new medians and return the benchmarks that got slower than threshold
+    regressions = []
+    print(f"{'benchmark':<28} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, result in sorted(current["results"].items()):
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            print(f"{name:<28} {'-':>12} {result['median_s']:>12.6f} {'new':>7}")
+            continue
+        ratio = result["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = " <-- regression" if ratio > 1 + threshold else ""
+        print(f"{name:<28} {old['median_s']:>12.6f} {result['median_s']:>12.6f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="pages in the synthetic corpus")
+    parser.add_argument("--blocks-per-page", type=int, default=40)
+    parser.add_argument("--words-per-block", type=int, default=40)
+    parser.add_argument("--inline-density", type=float, default=0.1, help="share of words with inline markup")
+    parser.add_argument("--nesting-depth", type=int, default=2, help="max section depth of the content tree")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    parser.add_argument("--workers", type=int, default=1, help="--workers passed to the build benchmarks")
+    parser.add_argument("--skip-build", action="store_true", help="only run the per-stage benchmarks")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing --compare")
+    parser.add_argument("--keep-corpus", help="generate the corpus into this directory and keep it")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    corpus_options = {
+        "pages": args.pages,
+        "seed": args.seed,
+        "blocks_per_page": args.blocks_per_page,
+        "words_per_block": args.words_per_block,
+        "inline_density": args.inline_density,
+        "nesting_depth": args.nesting_depth,
+    }
+
+    root = args.keep_corpus or tempfile.mkdtemp(prefix="site-bench-")
+    try:
+        generate_site(root, **corpus_options)
+        pages = load_pages(root)
+        results = stage_benchmarks(pages, args.repeat)
+        if not args.skip_build:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.update(build_benchmarks(root, len(pages), args.repeat, args.workers))
+    finally:
+        if not args.keep_corpus:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "corpus": corpus_options,
+            "repeat": args.repeat,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        return 1 if regressions else 0
+
+    for name, result in sorted(results.items()):
+        per_item = f"  ({result['per_item_us']:.1f} us/item)" if "per_item_us" in result else ""
+        print(f"{name:<28} {result['median_s'] * 1000:>10.3f} ms{per_item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
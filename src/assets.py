@@ -0,0 +1,173 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from build_log import get_logger
+from build_manifest import hash_file
+from state_file import load_state, remove_empty_dirs, save_state
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = get_logger("assets")
+
+
+ASSET_MANIFEST_VERSION = 1
+ASSET_MANIFEST_PATH = os.path.join(".cache", "asset-manifest.json")
+
+# ioctl(2) request for copy-on-write clones on Btrfs/XFS/bcachefs (linux/fs.h)
+FICLONE = 0x40049409
+
+MODES = ("auto", "copy", "reflink", "hardlink")
+CHECKS = ("mtime", "hash")
+
+
+def scan_files(root):
+    # Iterative scandir walk: relative path -> os.stat_result for every regular file
+    files = {}
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        with os.scandir(os.path.join(root, relative_dir)) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(relative_path)
+                elif entry.is_file():
+                    files[relative_path] = entry.stat()
+    return files
+
+
+def copy_file(src, dst, mode="auto"):
+    """Copy src to dst, cloning or hard-linking when asked and supported.
+
+    Returns the method actually used: "reflink", "hardlink" or "copy".
+    """
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        # Hard-linked by an earlier sync: dst already is src, and writing to it would write to src
+        return "hardlink"
+    # Every method fills a temporary name that then replaces dst, so an existing dst
+    # (which may share its inode with static/ or a shard) is never written through
+    tmp = dst + ".sync-tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    if mode == "hardlink":
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return "hardlink"
+        except OSError as error:
+            if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    elif mode in ("auto", "reflink") and fcntl is not None:
+        try:
+            with open(src, 'rb') as src_file, open(tmp, 'wb') as tmp_file:
+                fcntl.ioctl(tmp_file.fileno(), FICLONE, src_file.fileno())
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dst)
+            return "reflink"
+        except OSError as error:
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            if error.errno not in (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS):
+                raise
+    # Plain copy; copy2 keeps the mtime so the next sync can skip the file
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+    return "copy"
+
+
+def load_asset_manifest(path):
+    return load_state(path, ASSET_MANIFEST_VERSION).get("files", {})
+
+
+def save_asset_manifest(path, files):
+    save_state(path, ASSET_MANIFEST_VERSION, files=files)
+
+
+def sync_static(src_dir, dest_dir, manifest_path=ASSET_MANIFEST_PATH, mode="auto", check="mtime", workers=4):
+    """Make dest_dir hold an up-to-date copy of every file in src_dir.
+
+    Unchanged files are skipped (same size and mtime, or same content hash with
+    check="hash"), changed ones are copied on a thread pool, and files synced by a
+    previous run whose source is gone are removed. Other files in dest_dir (the
+    rendered pages) are left alone. Returns a dict of counters.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown asset sync mode: {mode}")
+    if check not in CHECKS:
+        raise ValueError(f"Unknown asset check: {check}")
+
+    previous = load_asset_manifest(manifest_path)
+    sources = scan_files(src_dir)
+    stats = {"copied": 0, "reflinked": 0, "hardlinked": 0, "skipped": 0, "removed": 0, "bytes": 0}
+    files = {}
+    to_copy = []
+
+    for relative_path, src_stat in sources.items():
+        dst = os.path.join(dest_dir, relative_path)
+        entry = {"size": src_stat.st_size, "mtime_ns": src_stat.st_mtime_ns}
+        if check == "hash":
+            old = previous.get(relative_path)
+            if old and old["size"] == entry["size"] and old["mtime_ns"] == entry["mtime_ns"]:
+                # Source untouched since last time: reuse its hash instead of re-reading it
+                entry["hash"] = old.get("hash")
+            if not entry.get("hash"):
+                entry["hash"] = hash_file(os.path.join(src_dir, relative_path))
+        files[relative_path] = entry
+
+        dest_mtime_ns = _current_dest_mtime(dst, src_stat, entry, previous.get(relative_path), check)
+        if dest_mtime_ns is not None:
+            entry["dest_mtime_ns"] = dest_mtime_ns
+            stats["skipped"] += 1
+        else:
+            # copy2, copystat after a clone and hard links all carry the source mtime over
+            entry["dest_mtime_ns"] = src_stat.st_mtime_ns
+            to_copy.append(relative_path)
+
+    def copy_one(relative_path):
+        method = copy_file(os.path.join(src_dir, relative_path), os.path.join(dest_dir, relative_path), mode)
+        return method, sources[relative_path].st_size
+
+    if to_copy:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for method, size in executor.map(copy_one, to_copy):
+                stats["copied" if method == "copy" else method + "ed"] += 1
+                stats["bytes"] += size
+
+    for relative_path in previous.keys() - files.keys():
+        dst = os.path.join(dest_dir, relative_path)
+        if os.path.lexists(dst):
+            os.remove(dst)
+            stats["removed"] += 1
+            remove_empty_dirs(os.path.dirname(dst), dest_dir)
+
+    save_asset_manifest(manifest_path, files)
+    return stats
+
+
+def _current_dest_mtime(dst, src_stat, entry, old_entry, check):
+    # Returns the destination's mtime when it is already up to date, None when it must be copied
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return None
+    if dst_stat.st_size != src_stat.st_size:
+        return None
+    if check == "hash":
+        # Same content as last sync, and the destination hasn't been touched since we wrote it
+        if (
+            old_entry is not None
+            and old_entry.get("hash") == entry["hash"]
+            and old_entry.get("dest_mtime_ns") == dst_stat.st_mtime_ns
+        ):
+            return dst_stat.st_mtime_ns
+        return None
+    if dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return dst_stat.st_mtime_ns
+    return None
+
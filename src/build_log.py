@@ -0,0 +1,55 @@
+import logging
+import sys
+
+
+# Every module logs under this namespace so one call configures the whole build
+ROOT_LOGGER = "site"
+
+QUIET = -1
+NORMAL = 0
+VERBOSE = 1
+
+_LEVELS = {
+    QUIET: logging.ERROR,
+    NORMAL: logging.INFO,
+    VERBOSE: logging.DEBUG,
+}
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def configure_logging(verbosity=NORMAL, stream=None):
+    """Set up build output.
+
+    QUIET only reports errors, NORMAL prints build milestones and the final
+    summary, VERBOSE adds per-page summary lines and debug traces. Logging is
+    off for DEBUG by default, and call sites guard expensive messages with
+    isEnabledFor, so disabled levels cost a single integer comparison.
+    """
+    level = _LEVELS[max(QUIET, min(VERBOSE, verbosity))]
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if level <= logging.DEBUG:
+        handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    else:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    return level
+
+
+def configure_worker_logging(level):
+    # Process-pool initializer: give workers the parent's level and a plain stderr handler
+    root = logging.getLogger(ROOT_LOGGER)
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+    root.setLevel(level)
@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+from state_file import load_state, remove_empty_dirs, save_state
+
+
+MANIFEST_VERSION = 2
+MANIFEST_PATH = os.path.join(".cache", "build-manifest.json")
+
+
+def hash_file(path):
+    # Hash in chunks so large sources never have to fit in memory twice
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    # A missing, unreadable or outdated manifest simply means "rebuild everything"
+    return load_state(path, MANIFEST_VERSION).get("pages", {})
+
+
+def save_manifest(path, pages):
+    save_state(path, MANIFEST_VERSION, pages=pages)
+
+
+class BuildManifest:
+    """Dependency graph of the previous build.
+
+    Each page is stored as source path -> its output path and {input path: content hash}
+    for every file it read: the markdown source, its template and anything the template
+    pulls in. A page is rebuilt only when one of its own inputs changed, and each input
+    is hashed at most once per build however many pages share it.
+    """
+
+    def __init__(self, path, force=False):
+        self.path = path
+        self.previous = load_manifest(path)
+        self.pages = {}
+        self.hashes = {}
+        # With force every page is treated as changed, but stale outputs are still found
+        self.force = force
+
+    def file_hash(self, path):
+        digest = self.hashes.get(path)
+        if digest is None:
+            digest = self.hashes[path] = hash_file(path)
+        return digest
+
+    def is_current(self, source_path, output_path, dependencies):
+        if self.force:
+            return False
+        entry = self.previous.get(source_path)
+        if entry is None or entry.get("output") != output_path:
+            return False
+        recorded = entry.get("deps", {})
+        # A page that switched template (or gained an include) is dirty even if nothing changed
+        if recorded.keys() != set(dependencies):
+            return False
+        return (
+            all(self.file_hash(dep) == digest for dep, digest in recorded.items())
+            and os.path.exists(output_path)
+        )
+
+    def record(self, source_path, output_path, dependencies):
+        self.pages[source_path] = {
+            "output": output_path,
+            "deps": {dep: self.file_hash(dep) for dep in dependencies},
+        }
+
+    def dependents(self):
+        # Reverse graph: input path -> sources of the pages that read it
+        graph = {}
+        for source_path, entry in self.pages.items():
+            for dep in entry["deps"]:
+                graph.setdefault(dep, set()).add(source_path)
+        return graph
+
+    def invalidate(self, changed_paths):
+        """Forget the hashes of changed files and return the pages that read any of them.
+
+        This is the minimal dirty set for a long-lived build (e.g. --watch) that is
+        told which files changed instead of rehashing everything.
+        """
+        graph = self.dependents()
+        dirty = set()
+        for path in changed_paths:
+            self.hashes.pop(path, None)
+            dirty.update(graph.get(path, ()))
+        return sorted(dirty)
+
+    def remove_stale_outputs(self):
+        # Delete outputs whose sources disappeared since the previous build
+        live_outputs = {entry["output"] for entry in self.pages.values()}
+        removed = []
+        for source_path, entry in self.previous.items():
+            if source_path in self.pages:
+                continue
+            output_path = entry.get("output")
+            if not output_path or output_path in live_outputs:
+                continue
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                removed.append(output_path)
+                remove_empty_dirs(os.path.dirname(output_path))
+        return removed
+
+    def save(self):
+        save_manifest(self.path, self.pages)
+
@@ -0,0 +1,111 @@
+import heapq
+import json
+import os
+from time import perf_counter
+
+
+# The profiler in use for this process, or None. Hooks test this one global and do
+# nothing else when profiling is off, so disabled builds pay a single comparison.
+active = None
+
+
+class BuildProfiler:
+    """Accumulates per-stage timings, counters and per-page times for one build."""
+
+    def __init__(self):
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.counters = {}
+        self.page_seconds = {}
+
+    def add(self, stage, seconds):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_page(self, source_path, seconds):
+        self.page_seconds[source_path] = seconds
+
+    def slowest_pages(self, top=10):
+        return heapq.nlargest(top, self.page_seconds.items(), key=lambda item: item[1])
+
+    def to_dict(self):
+        return {
+            "stage_seconds": self.stage_seconds,
+            "stage_calls": self.stage_calls,
+            "counters": self.counters,
+            "page_seconds": self.page_seconds,
+        }
+
+    def merge(self, data):
+        # Fold in the to_dict() of another profiler (e.g. from a worker process)
+        for stage, seconds in data["stage_seconds"].items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        for stage, calls in data["stage_calls"].items():
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + calls
+        for name, amount in data["counters"].items():
+            self.count(name, amount)
+        self.page_seconds.update(data["page_seconds"])
+
+    def report(self, top=10):
+        lines = ["Build profile", f"{'stage':<24} {'calls':>8} {'total ms':>11} {'share':>7}"]
+        # Nested stages (e.g. parse.inline inside parse) are shown but not double counted
+        total = sum(seconds for stage, seconds in self.stage_seconds.items() if "." not in stage)
+        for stage in sorted(self.stage_seconds, key=self.stage_seconds.get, reverse=True):
+            seconds = self.stage_seconds[stage]
+            share = 100 * seconds / total if total else 0.0
+            lines.append(
+                f"{stage:<24} {self.stage_calls[stage]:>8} {seconds * 1000:>11.2f} {share:>6.1f}%"
+            )
+
+        lines.append("")
+        lines.append(f"pages rendered: {self.counters.get('pages', 0)}")
+        lines.append(f"bytes read:     {self.counters.get('bytes_read', 0)}")
+        lines.append(f"bytes written:  {self.counters.get('bytes_written', 0)}")
+        if "render_cache_hits" in self.counters:
+            lines.append(f"cached blocks:  {self.counters['render_cache_hits']}")
+
+        slowest = self.slowest_pages(top)
+        if slowest:
+            lines.append("")
+            lines.append(f"slowest {len(slowest)} page(s):")
+            for source_path, seconds in slowest:
+                lines.append(f"  {seconds * 1000:>9.2f} ms  {source_path}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+
+
+def enable():
+    global active
+    active = BuildProfiler()
+    return active
+
+
+def disable():
+    global active
+    profiler, active = active, None
+    return profiler
+
+
+class stage:
+    """Context manager timing a block as `stage` when profiling is enabled."""
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = perf_counter() if active is not None else None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.started is not None and active is not None:
+            active.add(self.name, perf_counter() - self.started)
+        return False
@@ -0,0 +1,210 @@
+import gzip
+import hashlib
+import os
+from itertools import repeat
+
+from assets import scan_files
+from minify import minify_css, minify_html
+from process_pool import process_pool
+from state_file import load_state, save_state, write_atomic
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+
+
+COMPRESS_MANIFEST_VERSION = 1
+COMPRESS_MANIFEST_PATH = os.path.join(".cache", "compress-manifest.json")
+
+# Text formats worth precompressing; images and fonts are compressed already
+COMPRESSIBLE = (".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt")
+MINIFIERS = {".html": minify_html, ".css": minify_css}
+SIDECARS = {"gzip": ".gz", "brotli": ".br"}
+
+
+def _settings(minify, gzip_level, brotli_level):
+    # Everything that changes the output: a different set means every file is redone
+    return {"minify": bool(minify), "gzip": gzip_level or None, "brotli": brotli_level or None}
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _sidecars_present(path, entry):
+    return all(
+        os.path.exists(path + suffix) for kind, suffix in SIDECARS.items() if entry.get(kind) is not None
+    )
+
+
+def _process_file(public_dir, relative_path, old, settings):
+    # Minify one file in place and (re)write its sidecars. Returns (relative_path, entry, skipped)
+    path = os.path.join(public_dir, relative_path)
+    with open(path, 'rb') as file:
+        data = file.read()
+    digest = _digest(data)
+    minifier = MINIFIERS.get(os.path.splitext(relative_path)[1]) if settings["minify"] else None
+
+    if old is not None and _sidecars_present(path, old):
+        if digest == old["output"]:
+            # Touched but not changed since we processed it
+            skipped = True
+            entry = dict(old)
+        elif digest == old["input"]:
+            # Rewritten with the same content (a full build, a static or shard copy):
+            # only the minified file needs restoring, the sidecars are still valid
+            if minifier is not None:
+                write_atomic(path, minifier(data.decode("utf-8")).encode("utf-8"))
+            skipped = True
+            entry = dict(old)
+        else:
+            skipped = False
+    else:
+        skipped = False
+
+    if not skipped:
+        output = data
+        if minifier is not None:
+            output = minifier(data.decode("utf-8")).encode("utf-8")
+            if output != data:
+                write_atomic(path, output)
+        entry = {
+            "input": digest, "output": _digest(output),
+            "original_size": len(data), "minified_size": len(output), "gzip": None, "brotli": None,
+        }
+        for kind, level in (("gzip", settings["gzip"]), ("brotli", settings["brotli"])):
+            sidecar = path + SIDECARS[kind]
+            if level is None:
+                continue
+            if kind == "gzip":
+                # mtime=0 keeps the .gz byte-identical between builds
+                compressed = gzip.compress(output, compresslevel=level, mtime=0)
+            else:
+                compressed = brotli.compress(output, quality=level)
+            if len(compressed) < len(output):
+                write_atomic(sidecar, compressed)
+                entry[kind] = len(compressed)
+            elif os.path.exists(sidecar):
+                # Not worth serving; drop the one from an earlier, larger version
+                os.remove(sidecar)
+
+    stat = os.stat(path)
+    entry["size"] = stat.st_size
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return relative_path, entry, skipped
+
+
+def _process_batch(public_dir, batch, settings):
+    return [_process_file(public_dir, relative_path, old, settings) for relative_path, old in batch]
+
+
+def load_compress_manifest(path):
+    data = load_state(path, COMPRESS_MANIFEST_VERSION)
+    return data.get("settings"), data.get("files", {})
+
+
+def save_compress_manifest(path, settings, files):
+    save_state(path, COMPRESS_MANIFEST_VERSION, settings=settings, files=files)
+
+
+def compress_site(
+    public_dir, minify=False, gzip_level=None, brotli_level=None, workers=1, manifest_path=COMPRESS_MANIFEST_PATH,
+):
+    """Minify the HTML and CSS in public_dir and write .gz/.br sidecars next to text files.
+
+    Runs after everything else has been written. A file is skipped when its size
+    and mtime, or failing that its content hash, show it hasn't changed since the last
+    run with the same settings. With workers > 1 the files are spread over a process
+    pool. Sidecars of files that are gone, or of a format no longer requested, are
+    removed. Returns a dict of counters and byte totals over every file handled.
+    """
+    if brotli_level and brotli is None:
+        raise Exception("Brotli sidecars need the 'brotli' package (pip install brotli)")
+    settings = _settings(minify, gzip_level, brotli_level)
+    old_settings, previous = load_compress_manifest(manifest_path)
+    if old_settings != settings:
+        # Keep the old entries only to clean up after them
+        stale = previous
+        previous = {}
+    else:
+        stale = {}
+
+    todo = []
+    files = {}
+    stats = {
+        "files": 0, "processed": 0, "skipped": 0, "removed": 0,
+        "original_bytes": 0, "minified_bytes": 0, "gzip_bytes": 0, "brotli_bytes": 0,
+    }
+    if os.path.isdir(public_dir):
+        candidates = scan_files(public_dir)
+    else:
+        candidates = {}
+    for relative_path, stat in candidates.items():
+        if not relative_path.endswith(COMPRESSIBLE):
+            continue
+        old = previous.get(relative_path)
+        if (
+            old is not None
+            and old["size"] == stat.st_size
+            and old["mtime_ns"] == stat.st_mtime_ns
+            and _sidecars_present(os.path.join(public_dir, relative_path), old)
+        ):
+            # Untouched since the last run: not even read
+            files[relative_path] = old
+            stats["skipped"] += 1
+        else:
+            todo.append((relative_path, old))
+
+    if workers <= 1 or len(todo) <= 1:
+        results = _process_batch(public_dir, todo, settings)
+    else:
+        batch_size = max(1, len(todo) // (workers * 4))
+        batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+        with process_pool(workers) as executor:
+            results = [
+                result
+                for batch in executor.map(_process_batch, repeat(public_dir), batches, repeat(settings))
+                for result in batch
+            ]
+    for relative_path, entry, skipped in results:
+        files[relative_path] = entry
+        stats["skipped" if skipped else "processed"] += 1
+
+    # Sidecars whose file is gone, or of a kind that is no longer written
+    for relative_path, old in {**stale, **previous}.items():
+        for kind, suffix in SIDECARS.items():
+            current = files.get(relative_path)
+            if old.get(kind) is None or (current is not None and current.get(kind) is not None):
+                continue
+            sidecar = os.path.join(public_dir, relative_path + suffix)
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+                stats["removed"] += 1
+
+    for entry in files.values():
+        stats["files"] += 1
+        stats["original_bytes"] += entry["original_size"]
+        stats["minified_bytes"] += entry["minified_size"]
+        # A file without a sidecar is served as it is
+        stats["gzip_bytes"] += entry["gzip"] if entry["gzip"] is not None else entry["minified_size"]
+        stats["brotli_bytes"] += entry["brotli"] if entry["brotli"] is not None else entry["minified_size"]
+    save_compress_manifest(manifest_path, settings, files)
+    return stats
+
+
+def remove_sidecars(public_dir, manifest_path=COMPRESS_MANIFEST_PATH):
+    # Undo compress_site when the stage is switched off, so no stale .gz/.br outlives its page
+    _, previous = load_compress_manifest(manifest_path)
+    removed = 0
+    for relative_path, entry in previous.items():
+        for kind, suffix in SIDECARS.items():
+            sidecar = os.path.join(public_dir, relative_path + suffix)
+            if entry.get(kind) is not None and os.path.exists(sidecar):
+                os.remove(sidecar)
+                removed += 1
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    return removed
@@ -0,0 +1,77 @@
+from htmlnode import escape_attribute, escape_text
+
+
+def heading_level(block):
+    # 1-6 for an ATX heading ("## Title"), 0 for anything else ("#tag", "####### x", "#")
+    level = len(block) - len(block.lstrip("#"))
+    if 1 <= level <= 6 and block[level:level + 1] == " ":
+        return level
+    return 0
+
+
+def slugify(text):
+    # "Middle-earth & Beyond" -> "middle-earth-beyond"
+    words = "".join(char if char.isalnum() else " " for char in str(text).lower()).split()
+    return "-".join(words)
+
+
+def plain_text(text_nodes):
+    # The visible text of inline nodes, markup dropped: "**Tom** [site](/x)" -> "Tom site"
+    parts = []
+    stack = list(reversed(text_nodes))
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(reversed(node.children))
+        else:
+            parts.append(node.text)
+    return "".join(parts)
+
+
+class TableOfContents:
+    """The headings of one document, recorded while it is parsed.
+
+    headings holds (level, text, anchor, offset) per heading, in document order.
+    anchor is the unique id given to the rendered <hN> ("intro", "intro-1", ...), and
+    offset is where the heading's block starts in the markdown (in characters), when
+    iter_blocks was given toc.offsets to fill.
+    """
+
+    def __init__(self):
+        self.headings = []
+        # Start offset of every block split so far, indexed like the blocks
+        self.offsets = []
+        self.anchors = set()
+
+    def add(self, level, text, block_index):
+        base = slugify(text) or "section"
+        anchor = base
+        suffix = 1
+        while anchor in self.anchors:
+            anchor = f"{base}-{suffix}"
+            suffix += 1
+        self.anchors.add(anchor)
+        offset = self.offsets[block_index] if block_index < len(self.offsets) else None
+        self.headings.append((level, text, anchor, offset))
+        return anchor
+
+    def to_html(self, min_level=2, max_level=6):
+        # Nested <ul> of links to the headings between min_level and max_level
+        parts = []
+        stack = []
+        for level, text, anchor, _ in self.headings:
+            if not min_level <= level <= max_level:
+                continue
+            if not stack or level > stack[-1]:
+                parts.append("<ul>")
+                stack.append(level)
+            else:
+                while len(stack) > 1 and level < stack[-1]:
+                    parts.append("</li></ul>")
+                    stack.pop()
+                parts.append("</li>")
+                # A heading shallower than the first one listed joins the top level
+                stack[-1] = min(stack[-1], level)
+            parts.append(f'<li><a href="#{escape_attribute(anchor)}">{escape_text(text)}</a>')
+        parts.append("</li></ul>" * len(stack))
+        return "".join(parts)
@@ -0,0 +1,300 @@
+import json
+import os
+import struct
+
+from assets import copy_file, scan_files
+from build_manifest import hash_file
+from process_pool import process_pool
+from state_file import load_state, remove_empty_dirs, save_state, write_if_changed
+
+try:
+    from PIL import Image
+except ImportError:  # optional: pip install Pillow
+    Image = None
+
+
+IMAGE_INDEX_VERSION = 1
+IMAGE_INDEX_PATH = os.path.join(".cache", "image-index.json")
+# What rendered pages depend on; only rewritten when an attribute changes
+IMAGE_ATTRIBUTES_PATH = os.path.join(".cache", "image-attributes.json")
+IMAGE_CACHE_DIR = os.path.join(".cache", "images")
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+FORMATS = ("webp", "original")
+DEFAULT_WIDTHS = (480, 960, 1440)
+
+# url -> extra <img> attributes, set by enable() in every process that renders pages
+active = None
+active_path = None
+
+
+def image_size(path):
+    """(width, height) of a PNG, GIF, JPEG or WebP file, read from its header alone."""
+    with open(path, 'rb') as file:
+        head = file.read(32)
+        if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = struct.unpack("<I", head[21:25])[0]
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return (
+                    int.from_bytes(head[24:27], "little") + 1,
+                    int.from_bytes(head[27:30], "little") + 1,
+                )
+        if head[:2] == b"\xff\xd8":
+            # Walk the JPEG segments up to the first start-of-frame
+            file.seek(2)
+            while True:
+                marker = file.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    break
+                if marker[1] == 0xFF:
+                    file.seek(-1, os.SEEK_CUR)
+                    continue
+                length = struct.unpack(">H", file.read(2))[0]
+                if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack(">xHH", file.read(5))
+                    return width, height
+                file.seek(length - 2, os.SEEK_CUR)
+    raise ValueError(f"Unrecognised image format: {path}")
+
+
+def derivative_path(relative_path, width, image_format):
+    # images/rivendell.png -> images/rivendell-480w.webp
+    stem, extension = os.path.splitext(relative_path)
+    return f"{stem}-{width}w{'.webp' if image_format == 'webp' else extension}"
+
+
+def image_url(relative_path):
+    return "/" + relative_path.replace(os.sep, "/")
+
+
+class ImageIndex:
+    """Intrinsic sizes and planned derivatives of every image under a static directory.
+
+    Kept across builds at path: an image whose size and mtime are unchanged is not
+    read again. Derivatives are widths below the image's own (plus a full-size one
+    for WebP); they are only planned when Pillow is installed, and GIFs (which may be
+    animated) get none.
+    """
+
+    def __init__(self, path=IMAGE_INDEX_PATH, widths=DEFAULT_WIDTHS, image_format="webp", quality=80, sizes=None):
+        if image_format not in FORMATS:
+            raise ValueError(f"Unknown image format: {image_format}")
+        self.path = path
+        self.widths = sorted(set(widths))
+        self.image_format = image_format
+        self.quality = quality
+        self.sizes = sizes
+        previous = load_state(path, IMAGE_INDEX_VERSION)
+        self.previous = previous.get("images", {})
+        # Derivatives placed in public/ by the previous build, to remove the ones no longer planned
+        self.previous_outputs = previous.get("outputs", [])
+        self.images = {}
+        self.read = 0
+
+    def update(self, static_dir):
+        # Scan static_dir for images, rereading only the ones that changed
+        self.images = {}
+        if not os.path.isdir(static_dir):
+            return
+        for relative_path, stat in scan_files(static_dir).items():
+            if not relative_path.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            old = self.previous.get(relative_path)
+            if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+                self.images[relative_path] = old
+                continue
+            path = os.path.join(static_dir, relative_path)
+            try:
+                width, height = image_size(path)
+            except (OSError, ValueError, struct.error):
+                # Not an image we can size; it is still copied as a static file
+                continue
+            self.read += 1
+            self.images[relative_path] = {
+                "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(path),
+                "width": width, "height": height,
+            }
+
+    def derivatives(self, relative_path):
+        # [(width, output path relative to public/, cache file name)] for one image
+        if Image is None or relative_path.lower().endswith(".gif"):
+            return []
+        entry = self.images[relative_path]
+        widths = [width for width in self.widths if width < entry["width"]]
+        if self.image_format == "webp" and not relative_path.lower().endswith(".webp"):
+            widths.append(entry["width"])
+        extension = "webp" if self.image_format == "webp" else os.path.splitext(relative_path)[1][1:].lower()
+        # Keyed by everything that changes the encoded bytes
+        return [
+            (
+                width, derivative_path(relative_path, width, self.image_format),
+                f"{entry['hash'][:24]}-{width}w-q{self.quality}.{extension}",
+            )
+            for width in widths
+        ]
+
+    def attributes(self):
+        # url -> the <img> attributes added for it (besides src and alt)
+        attributes = {}
+        for relative_path, entry in sorted(self.images.items()):
+            props = {"width": str(entry["width"]), "height": str(entry["height"])}
+            candidates = [
+                f"{image_url(output)} {width}w" for width, output, _ in self.derivatives(relative_path)
+            ]
+            if candidates:
+                if self.image_format == "original":
+                    candidates.append(f"{image_url(relative_path)} {entry['width']}w")
+                props["srcset"] = ", ".join(candidates)
+                if self.sizes:
+                    props["sizes"] = self.sizes
+            attributes[image_url(relative_path)] = props
+        return attributes
+
+    def write_attributes(self, path=IMAGE_ATTRIBUTES_PATH):
+        # Leave the file alone when nothing changed, so pages depending on it stay up to date
+        # Not sort_keys: the attributes are written to the <img> in this order
+        return write_if_changed(path, json.dumps(self.attributes(), indent=2))
+
+    def save(self, outputs):
+        save_state(self.path, IMAGE_INDEX_VERSION, images=self.images, outputs=sorted(outputs))
+
+
+def _encode(src_path, cache_path, width, quality):
+    # Worker side of generate_derivatives: resize one image into the cache
+    with Image.open(src_path) as image:
+        if image.mode in ("1", "P"):
+            # Palette images only resize well in full colour
+            image = image.convert("RGBA")
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image.copy()
+    extension = os.path.splitext(cache_path)[1].lower()
+    tmp_path = cache_path + ".tmp"
+    if extension == ".webp":
+        resized.save(tmp_path, "WEBP", quality=quality, method=6)
+    elif extension in (".jpg", ".jpeg"):
+        resized.convert("RGB").save(tmp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        resized.save(tmp_path, "PNG", optimize=True)
+    os.replace(tmp_path, cache_path)
+    return os.path.getsize(cache_path)
+
+
+def generate_derivatives(index, static_dir, public_dir, cache_dir=IMAGE_CACHE_DIR, workers=1, mode="auto"):
+    """Place every derivative planned by index in public_dir, encoding only what isn't cached.
+
+    Encoded files are kept in cache_dir under the source hash and encoding parameters,
+    so an unchanged image is never encoded twice, even after public_dir is cleaned.
+    Missing ones are encoded in a process pool when workers > 1. Derivatives of the
+    previous build that are no longer planned are removed, and so are cache entries
+    no image uses any more. Returns a dict of counters.
+    """
+    stats = {"images": len(index.images), "encoded": 0, "copied": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+    planned = [
+        (relative_path, width, output, cache_name)
+        for relative_path in sorted(index.images)
+        for width, output, cache_name in index.derivatives(relative_path)
+    ]
+    os.makedirs(cache_dir, exist_ok=True)
+    to_encode = {}
+    for relative_path, width, _, cache_name in planned:
+        if not os.path.exists(os.path.join(cache_dir, cache_name)):
+            to_encode[cache_name] = (os.path.join(static_dir, relative_path), os.path.join(cache_dir, cache_name), width)
+    if to_encode:
+        jobs = list(to_encode.values())
+        if workers <= 1 or len(jobs) <= 1:
+            sizes = [_encode(src, dst, width, index.quality) for src, dst, width in jobs]
+        else:
+            with process_pool(workers) as executor:
+                sizes = list(executor.map(
+                    _encode, *zip(*jobs), [index.quality] * len(jobs),
+                ))
+        stats["encoded"] = len(jobs)
+        stats["bytes"] = sum(sizes)
+
+    outputs = []
+    for _, _, output, cache_name in planned:
+        outputs.append(output)
+        cache_path = os.path.join(cache_dir, cache_name)
+        dst = os.path.join(public_dir, output)
+        cache_stat = os.stat(cache_path)
+        try:
+            dst_stat = os.stat(dst)
+        except FileNotFoundError:
+            dst_stat = None
+        # copy_file keeps the mtime, so size + mtime tells whether dst is this cache entry
+        if (
+            dst_stat is not None
+            and dst_stat.st_size == cache_stat.st_size
+            and dst_stat.st_mtime_ns == cache_stat.st_mtime_ns
+        ):
+            stats["unchanged"] += 1
+            continue
+        copy_file(cache_path, dst, mode)
+        stats["copied"] += 1
+
+    for output in set(index.previous_outputs) - set(outputs):
+        path = os.path.join(public_dir, output)
+        if os.path.exists(path):
+            os.remove(path)
+            stats["removed"] += 1
+            remove_empty_dirs(os.path.dirname(path))
+    used = {cache_name for _, _, _, cache_name in planned}
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name not in used:
+            os.remove(entry.path)
+    index.save(outputs)
+    return stats
+
+
+def remove_derivatives(public_dir, index_path=IMAGE_INDEX_PATH, attributes_path=IMAGE_ATTRIBUTES_PATH):
+    # Undo the pipeline when it is switched off; the cache is kept for when it comes back
+    index = ImageIndex(index_path)
+    removed = 0
+    for output in index.previous_outputs:
+        path = os.path.join(public_dir, output)
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+            remove_empty_dirs(os.path.dirname(path))
+    for path in (index_path, attributes_path):
+        if os.path.exists(path):
+            os.remove(path)
+    return removed
+
+
+def enable(attributes_path=IMAGE_ATTRIBUTES_PATH):
+    # Load the attributes written by ImageIndex.write_attributes for the renderers
+    global active, active_path
+    with open(attributes_path, 'r') as file:
+        active = json.load(file)
+    active_path = attributes_path
+    return active
+
+
+def disable():
+    global active, active_path
+    active = active_path = None
+
+
+def dependencies():
+    # Extra input of every page while enabled: the attributes its images were rendered with
+    return [active_path] if active_path is not None else []
+
+
+def image_props(src, alt):
+    # The attributes of an <img>, in the order they are written
+    props = {"src": src, "alt": alt}
+    if active is not None:
+        props.update(active.get(src, ()))
+        props["loading"] = "lazy"
+    return props
@@ -0,0 +1,96 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import build_profiler
+
+
+def read_source(path):
+    # Returns (text, size in bytes)
+    with open(path, 'r') as file:
+        return file.read(), os.fstat(file.fileno()).st_size
+
+
+def write_output(path, text):
+    # Same temporary file + rename as generate_page, so readers never see a torn page.
+    # Returns the number of bytes written
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w') as file:
+            file.write(text)
+            written = file.tell()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+
+def make_output_dirs(output_paths):
+    # One makedirs per distinct directory up front, instead of one per page while rendering
+    for directory in sorted({os.path.dirname(path) for path in output_paths}):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+def run_pipeline(jobs, render, threads=4, depth=None):
+    """Render (source, output, ...) jobs with file I/O overlapped with rendering.
+
+    Sources are prefetched by a pool of reader threads and finished pages are
+    flushed by a pool of writer threads, while render(job, text) -> page text runs
+    on the calling thread. At most `depth` sources wait ahead of the renderer and
+    at most `depth` pages wait for the writers, so memory is bounded by the queue
+    depth rather than the number of pages. Returns [(source, error message)].
+    """
+    depth = depth or threads * 4
+    profiler = build_profiler.active
+    errors = []
+    make_output_dirs(job[1] for job in jobs)
+
+    def report(job, error):
+        errors.append((job[0], f"{type(error).__name__}: {error}"))
+
+    def finish_write(job, future):
+        try:
+            written = future.result()
+        except Exception as error:
+            report(job, error)
+            return
+        if profiler is not None:
+            profiler.count("bytes_written", written)
+
+    remaining = iter(jobs)
+    reads = deque()
+    writes = deque()
+    with ThreadPoolExecutor(max_workers=threads) as readers, ThreadPoolExecutor(max_workers=threads) as writers:
+        def prefetch():
+            for job in islice(remaining, depth - len(reads)):
+                reads.append((job, readers.submit(read_source, job[0])))
+
+        prefetch()
+        while reads:
+            job, future = reads.popleft()
+            prefetch()
+            try:
+                # Time the renderer spends waiting on reads the prefetch didn't hide
+                with build_profiler.stage("read"):
+                    text, size = future.result()
+                if profiler is not None:
+                    profiler.count("bytes_read", size)
+                page = render(job, text)
+            except Exception as error:
+                report(job, error)
+                continue
+
+            # Backpressure: block on the oldest write once the writer queue is full
+            with build_profiler.stage("write"):
+                while len(writes) >= depth:
+                    finish_write(*writes.popleft())
+            writes.append((job, writers.submit(write_output, job[1], page)))
+
+        with build_profiler.stage("write"):
+            while writes:
+                finish_write(*writes.popleft())
+    return errors
@@ -0,0 +1,121 @@
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+from assets import scan_files
+from state_file import load_state, save_state
+
+
+LINK_INDEX_VERSION = 1
+LINK_INDEX_PATH = os.path.join(".cache", "link-index.json")
+
+
+def target_path(url, output_path, public_dir):
+    # Site path ("/blog/tom") an internal link points to, or None for external and in-page links
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        # Relative links resolve against the directory of the page that contains them
+        page_dir = os.path.relpath(os.path.dirname(output_path), public_dir).replace(os.sep, "/")
+        path = ("/" if page_dir == "." else f"/{page_dir}/") + path
+    return posixpath.normpath(path)
+
+
+def target_exists(target, files):
+    # "/blog/tom" is served by blog/tom, blog/tom/index.html or blog/tom.html
+    relative = target.lstrip("/")
+    if not relative:
+        return "index.html" in files
+    return relative in files or f"{relative}/index.html" in files or f"{relative}.html" in files
+
+
+def scan_site_files(*roots):
+    # One scandir walk per tree; every link is then resolved with set lookups, not stat calls
+    files = set()
+    for root in roots:
+        if os.path.isdir(root):
+            files.update(path.replace(os.sep, "/") for path in scan_files(root))
+    return files
+
+
+class LinkIndex:
+    """Site-wide link graph: page -> outgoing links and images, target -> referencing pages.
+
+    Pages are recorded as they render (their refs come out of the parse) or carried
+    over from the previous build when they were skipped. check() only re-resolves
+    pages that were re-rendered or that point at a target which appeared or
+    disappeared since the last check; everything else keeps its previous result.
+    """
+
+    def __init__(self, path=LINK_INDEX_PATH, public_dir="public"):
+        self.path = path
+        self.public_dir = public_dir
+        previous = load_state(path, LINK_INDEX_VERSION)
+        self.previous_pages = previous.get("pages", {})
+        self.previous_targets = previous.get("targets", {})
+        self.pages = {}
+        self.targets = {}
+        self.changed = set()
+        self.revalidated = 0
+
+    def is_current(self, source_path, source_hash, output_path):
+        entry = self.previous_pages.get(source_path)
+        return (
+            entry is not None
+            and source_hash is not None
+            and entry.get("hash") == source_hash
+            and entry.get("output") == output_path
+        )
+
+    def keep(self, source_path):
+        self.pages[source_path] = self.previous_pages[source_path]
+
+    def record(self, source_path, source_hash, output_path, refs):
+        self.pages[source_path] = {
+            "hash": source_hash,
+            "output": output_path,
+            "refs": [[kind, url, target_path(url, output_path, self.public_dir)] for kind, url in refs],
+        }
+        self.changed.add(source_path)
+
+    def referrers(self):
+        # target -> sources of the pages linking to it
+        referrers = {}
+        for source_path, entry in self.pages.items():
+            for _, _, target in entry["refs"]:
+                if target is not None:
+                    referrers.setdefault(target, set()).add(source_path)
+        return referrers
+
+    def check(self, files):
+        """Resolve refs against files (see scan_site_files).
+
+        Returns a sorted list of (source path, kind, url) for every broken link
+        ("link") and missing image ("image").
+        """
+        referrers = self.referrers()
+        self.targets = {target: target_exists(target, files) for target in referrers}
+
+        stale = set(self.changed)
+        for target, exists in self.targets.items():
+            if self.previous_targets.get(target) != exists:
+                stale.update(referrers[target])
+        for source_path, entry in self.pages.items():
+            if source_path in stale or "broken" not in entry:
+                entry["broken"] = [
+                    [kind, url]
+                    for kind, url, target in entry["refs"]
+                    if target is not None and not self.targets[target]
+                ]
+        self.revalidated = len(stale)
+
+        return [
+            (source_path, kind, url)
+            for source_path in sorted(self.pages)
+            for kind, url in self.pages[source_path]["broken"]
+        ]
+
+    def save(self):
+        save_state(self.path, LINK_INDEX_VERSION, pages=self.pages, targets=self.targets)
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import posixpath
+from datetime import datetime, timezone
+
+from headings import slugify
+from htmlnode import escape_attribute, escape_text
+from minify import minify_html
+from state_file import remove_empty_dirs, write_if_changed
+from template import load_template
+
+
+FEED_PATH = "feed.xml"
+SITEMAP_PATH = "sitemap.xml"
+TAGS_URL = "/tags"
+FEED_ENTRIES = 20
+
+
+def url_output_path(url, public_dir):
+    # /blog -> public/blog/index.html
+    return os.path.join(public_dir, *url.strip("/").split("/"), "index.html") if url != "/" else \
+        os.path.join(public_dir, "index.html")
+
+
+def listing_html(title, entries):
+    # Same shape as a rendered markdown page: a <div> with the title as its <h1>
+    items = []
+    for entry in entries:
+        date = entry.get("date")
+        time_html = f'<time datetime="{escape_attribute(date)}">{escape_text(date[:10])}</time> ' if date else ""
+        items.append(f'<li>{time_html}<a href="{escape_attribute(entry["url"])}">{escape_text(entry["title"])}</a></li>')
+    return f"<div><h1>{escape_text(title)}</h1><ul>{''.join(items)}</ul></div>"
+
+
+def atom_timestamp(value):
+    # "2024-05-01" or "2024-05-01T10:00" -> RFC 3339, naive times taken as UTC
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.isoformat()
+
+
+def atom_feed(entries, title, site_url):
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape_attribute(title)}</title>",
+        f'  <link href="{escape_attribute(site_url)}/" />',
+        f'  <link rel="self" href="{escape_attribute(site_url)}/{FEED_PATH}" />',
+        f"  <id>{escape_attribute(site_url)}/</id>",
+        f"  <updated>{atom_timestamp(entries[0]['date'])}</updated>",
+    ]
+    for entry in entries:
+        link = escape_attribute(site_url + entry["url"])
+        lines.append("  <entry>")
+        lines.append(f"    <title>{escape_attribute(entry['title'])}</title>")
+        lines.append(f'    <link href="{link}" />')
+        lines.append(f"    <id>{link}</id>")
+        lines.append(f"    <updated>{atom_timestamp(entry['date'])}</updated>")
+        for tag in entry["tags"]:
+            lines.append(f'    <category term="{escape_attribute(tag)}" />')
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def sitemap(urls, site_url):
+    # urls: site path -> last modification date or None
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for url in sorted(urls):
+        lastmod = f"<lastmod>{urls[url][:10]}</lastmod>" if urls[url] else ""
+        lines.append(f"  <url><loc>{escape_attribute(site_url + url)}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def tag_slug(tag):
+    # A tag with nothing to slugify ("???") gets a stable hash instead, so its page
+    # can never land on /tags itself
+    slug = slugify(tag)
+    return slug or "tag-" + hashlib.sha256(tag.encode("utf-8")).hexdigest()[:8]
+
+
+def plan_listings(entries):
+    """Listing pages for the indexed entries: site path -> (title, entries to list).
+
+    Every directory of dated pages ("/blog" for /blog/tom, /blog/majesty...) gets a
+    listing, newest first, unless a page of its own already lives there. Each tag gets
+    a page under /tags, and /tags lists the tags themselves.
+    """
+    page_urls = {entry["url"] for entry in entries}
+    pages = {}
+    sections = {}
+    tags = {}
+    for entry in entries:
+        if entry["date"] and entry["url"] != "/":
+            sections.setdefault(posixpath.dirname(entry["url"]), []).append(entry)
+        for tag in entry["tags"]:
+            tags.setdefault(tag, []).append(entry)
+
+    for url, posts in sections.items():
+        name = posixpath.basename(url)
+        pages[url] = (name.replace("-", " ").title() if name else "Posts", posts)
+    tag_entries = []
+    for tag in sorted(tags, key=str.lower):
+        url = f"{TAGS_URL}/{tag_slug(tag)}"
+        if url in pages:
+            # Two tags slugifying alike ("C++" and "C") keep separate pages
+            url += "-" + hashlib.sha256(tag.encode("utf-8")).hexdigest()[:8]
+        pages[url] = (f"Tag: {tag}", tags[tag])
+        tag_entries.append({"title": f"{tag} ({len(tags[tag])})", "url": url, "date": None})
+    if tag_entries:
+        pages[TAGS_URL] = ("Tags", tag_entries)
+    return {url: listing for url, listing in pages.items() if url not in page_urls}
+
+
+def write_listings(index, content_dir, template_for, site_url="", include_drafts=False, minify=False):
+    """Generate listing pages, tag pages, feed.xml and sitemap.xml from a MetadataIndex.
+
+    The feed and the sitemap need absolute URLs, so they are only written with a site_url.
+
+    template_for(content directory) gives the template of a listing page, as if it were
+    a page in that directory. Files are only rewritten when their text changed, and
+    files generated by an earlier build that are no longer needed are removed. With
+    minify, listing pages are written minified, as the compress stage would leave them.
+    Returns the paths that were written or removed.
+    """
+    public_dir = index.public_dir
+    site_url = site_url.rstrip("/")
+    entries = index.published(include_drafts)
+    touched = []
+    generated = []
+
+    listings = plan_listings(entries)
+    for url, (title, listed) in sorted(listings.items()):
+        segments = [segment for segment in url.split("/") if segment]
+        template = load_template(template_for(os.path.join(content_dir, *segments)))
+        html = listing_html(title, listed)
+        text = template.render({"Title": escape_text(title), "Content": html, "Date": "", "Tags": ""})
+        if minify:
+            text = minify_html(text)
+        generated.append(url_output_path(url, public_dir))
+        if write_if_changed(generated[-1], text):
+            touched.append(generated[-1])
+
+    dated = [entry for entry in entries if entry["date"]]
+    if dated and site_url:
+        home = next((entry for entry in entries if entry["url"] == "/"), None)
+        feed = atom_feed(dated[:FEED_ENTRIES], home["title"] if home else "Feed", site_url)
+        generated.append(os.path.join(public_dir, FEED_PATH))
+        if write_if_changed(generated[-1], feed):
+            touched.append(generated[-1])
+
+    if site_url:
+        urls = {entry["url"]: entry["date"] for entry in entries}
+        urls.update((url, None) for url in listings)
+        generated.append(os.path.join(public_dir, SITEMAP_PATH))
+        if write_if_changed(generated[-1], sitemap(urls, site_url)):
+            touched.append(generated[-1])
+
+    # A tag or section that went away takes its generated page with it
+    page_outputs = {entry["output"] for entry in index.pages.values()}
+    for path in set(index.generated) - set(generated) - page_outputs:
+        if os.path.exists(path):
+            os.remove(path)
+            touched.append(path)
+            remove_empty_dirs(os.path.dirname(path))
+    index.generated = generated
+    return touched
@@ -1,95 +1,938 @@
 from textnode import TextNode, TextType
+import argparse
+import cProfile
+import io
+import logging
 import os
 import shutil
-from htmlnode import HTMLNode
-from split_blocks import markdown_to_html_node, extract_title
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from itertools import chain, repeat
+from htmlnode import HTMLNode, escape_text
+from headings import TableOfContents
+from split_blocks import iter_blocks, split_title, write_markdown_html
+from template import load_template
+from assets import sync_static, MODES as ASSET_MODES, CHECKS as ASSET_CHECKS
+from compress import BROTLI_AVAILABLE, compress_site, remove_sidecars
+from images import (
+    DEFAULT_WIDTHS, FORMATS as IMAGE_FORMATS, IMAGE_ATTRIBUTES_PATH, IMAGE_INDEX_PATH, ImageIndex,
+    generate_derivatives, remove_derivatives,
+)
+from build_manifest import BuildManifest, MANIFEST_PATH
+from link_index import LinkIndex, LINK_INDEX_PATH, scan_site_files
+from listings import write_listings
+from metadata import MetadataIndex, METADATA_INDEX_PATH, front_matter_title, read_front_matter
+from shard import Shard, SHARD_DIR, SHARD_MANIFEST_NAME, merge_shards, parse_shard, shard_root
+from io_pipeline import run_pipeline
+from process_pool import process_pool
+import build_profiler
+import images
+import render_cache
+from build_log import configure_logging, configure_worker_logging, get_logger, NORMAL, QUIET, VERBOSE
 import os
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    # List everything in the content directory
-    for entry in os.listdir(dir_path_content):
-        # Generate the full path for the current entry
-        full_path = os.path.join(dir_path_content, entry)
-        
-        if os.path.isfile(full_path):  # Handle files
-            # Handle "index.md" specifically
-            if entry == "index.md":
-                # Define the output path for "index.html"
-                output_path = os.path.join(dest_dir_path, "index.html")
+
+logger = get_logger("main")
+
+
+def page_output_path(entry, dest_dir_path):
+    # "post.md" -> "post.html"; only the file's own extension changes, never directory names
+    stem, extension = os.path.splitext(entry)
+    if extension == ".md":
+        entry = stem + ".html"
+    return os.path.join(dest_dir_path, entry)
+
+
+# A template.html inside a content directory is used for that section instead of the site template
+TEMPLATE_NAME = "template.html"
+
+# Globs matched against paths relative to the content directory ("*" also crosses "/")
+DEFAULT_INCLUDE = ("*.md",)
+DEFAULT_EXCLUDE = ()
+
+
+def is_excluded(relative_path, exclude=DEFAULT_EXCLUDE):
+    # True when the path, or a directory above it (whose subtree a build skips), matches exclude
+    parts = relative_path.replace(os.sep, "/").split("/")
+    return any(
+        fnmatchcase("/".join(parts[:depth]), pattern) for depth in range(1, len(parts) + 1) for pattern in exclude
+    )
+
+
+def is_page(relative_path, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE):
+    return (
+        any(fnmatchcase(relative_path.replace(os.sep, "/"), pattern) for pattern in include)
+        and not is_excluded(relative_path, exclude)
+    )
+
+
+def collect_pages(dir_path_content, dest_dir_path, template_path=None,
+                  include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE, relative_dir=""):
+    # Walk the content tree and build the job list of (markdown path, output path, template path)
+    # triples, sorted by markdown path so every later stage sees the same order.
+    # template_path is None unless a section template or a default was found.
+    # relative_dir is where dir_path_content sits in the content tree ("blog/"), when walking
+    # a single section: the globs always match paths from the content root.
+    # Iterative scandir walk: DirEntry caches the file type, so no stat call per entry
+    jobs = []
+    stack = [(dir_path_content, dest_dir_path, relative_dir, template_path)]
+    while stack:
+        dir_path, dest_path, relative_dir, dir_template = stack.pop()
+        with os.scandir(dir_path) as scan:
+            entries = list(scan)
+        if any(entry.name == TEMPLATE_NAME and entry.is_file() for entry in entries):
+            dir_template = os.path.join(dir_path, TEMPLATE_NAME)
+
+        for entry in entries:
+            relative_path = relative_dir + entry.name
+            if entry.is_dir():
+                # Excluding a directory skips its whole subtree
+                if any(fnmatchcase(relative_path, pattern) for pattern in exclude):
+                    continue
+                logger.debug("Scanning directory: %s", entry.path)
+                stack.append((entry.path, os.path.join(dest_path, entry.name), relative_path + "/", dir_template))
+            elif entry.name != TEMPLATE_NAME and entry.is_file() and is_page(relative_path, include, exclude):
+                jobs.append((entry.path, page_output_path(entry.name, dest_path), dir_template))
             else:
-                # Define output path by replacing ".md" with ".html"
-                output_path = os.path.join(dest_dir_path, entry).replace(".md", ".html")
-            
-            print(f"DEBUG: Generating page from {full_path} to {output_path}")
-            generate_page(full_path, template_path, output_path)
-
-        elif os.path.isdir(full_path):  # Handle directories
-            # Construct the corresponding subdirectory in the destination
-            sub_dir_dest = os.path.join(dest_dir_path, entry)
-            
-            # Ensure the destination subdirectory exists
-            os.makedirs(sub_dir_dest, exist_ok=True)
-            
-            print(f"DEBUG: Recursing into directory: {full_path}")
-            # Recursively call function for the subdirectory
-            generate_pages_recursive(full_path, template_path, sub_dir_dest)
-        
+                logger.debug("Skipping %s", entry.path)
+    jobs.sort()
+    return jobs
+
+
+def section_template(dir_path, content_root, template_path):
+    # Nearest template.html from dir_path up to content_root, else the site template
+    dir_path = os.path.normpath(dir_path)
+    content_root = os.path.normpath(content_root)
+    while True:
+        candidate = os.path.join(dir_path, TEMPLATE_NAME)
+        if os.path.isfile(candidate):
+            return candidate
+        if dir_path == content_root or dir_path in ("", ".", os.path.dirname(dir_path)):
+            return template_path
+        dir_path = os.path.dirname(dir_path)
+
+
+def page_dependencies(source_path, template_path):
+    # Every input a page reads: its markdown and whatever its template was built from
+    return [source_path, *load_template(template_path).dependencies]
+
+
+def render_pages(jobs, template_path, workers=1, batch_size=None, refs=None, io_threads=0):
+    # Render (source, output, template or None) jobs and return a list of (source, error message)
+    # failures; jobs without a template of their own use template_path.
+    # Pages are independent, so with workers > 1 batches are spread over a process pool
+    # and the parent only collects results. A refs dict is filled with source -> the
+    # (kind, url) links and images found while parsing that page. With io_threads, each
+    # process overlaps its reads and writes with rendering (see io_pipeline).
+    collect_refs = refs is not None
+    if workers <= 1 or len(jobs) <= 1:
+        errors, page_refs, _ = _render_batch(jobs, template_path, False, collect_refs, io_threads)
+        if collect_refs:
+            refs.update(page_refs)
+        return errors
+
+    if batch_size is None:
+        # A few batches per worker keeps the pool busy without paying IPC per page
+        batch_size = max(1, len(jobs) // (workers * 4))
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    errors = []
+    # Workers profile themselves and send their counters back to be merged
+    profile = build_profiler.active is not None
+    # Workers inherit the parent's log level so --quiet/--verbose apply to them as well
+    log_level = logging.getLogger("site").getEffectiveLevel()
+    # ...and get their own render cache with the same settings (the disk tier is shared)
+    cache = render_cache.active
+    cache_config = (cache.max_entries, cache.disk_dir, cache.disk_max_bytes) if cache is not None else None
+    # ...and the image sizes of the build, when the image pipeline is on
+    with process_pool(workers, _init_worker, (log_level, cache_config, images.active_path)) as executor:
+        results = executor.map(
+            _render_batch, batches, repeat(template_path), repeat(profile), repeat(collect_refs),
+            repeat(io_threads),
+        )
+        for batch_errors, page_refs, profile_data in results:
+            errors.extend(batch_errors)
+            if collect_refs:
+                refs.update(page_refs)
+            if profile_data is not None:
+                build_profiler.active.merge(profile_data)
+    return errors
+
+
+def _init_worker(log_level, cache_config, images_path=None):
+    configure_worker_logging(log_level)
+    if cache_config is not None:
+        render_cache.enable(*cache_config)
+    if images_path is not None:
+        images.enable(images_path)
+
+
+def _render_batch(jobs, template_path, profile=False, collect_refs=False, io_threads=0):
+    if profile:
+        build_profiler.enable()
+    errors = []
+    page_refs = {}
+
+    if io_threads > 0:
+        def render(job, text):
+            source_path, _, page_template = job
+            refs = page_refs.setdefault(source_path, []) if collect_refs else None
+            return render_page_text(source_path, text, page_template or template_path, refs)
+
+        errors = run_pipeline(jobs, render, io_threads)
+        for source_path, _ in errors:
+            page_refs.pop(source_path, None)
+        profile_data = build_profiler.disable().to_dict() if profile else None
+        return errors, page_refs, profile_data
+
+    for source_path, output_path, page_template in jobs:
+        refs = [] if collect_refs else None
+        try:
+            generate_page(source_path, page_template or template_path, output_path, refs=refs)
+        except Exception as error:
+            errors.append((source_path, f"{type(error).__name__}: {error}"))
+            continue
+        if collect_refs:
+            page_refs[source_path] = refs
+    profile_data = build_profiler.disable().to_dict() if profile else None
+    return errors, page_refs, profile_data
+
+
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, manifest=None, workers=1, link_index=None, io_threads=0,
+    include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE, metadata=None, include_drafts=False, shard=None,
+    relative_dir="",
+):
+    with build_profiler.stage("discover"):
+        jobs = collect_pages(dir_path_content, dest_dir_path, template_path, include, exclude, relative_dir)
+
+    if metadata is not None:
+        # Header-only pass over every page; drafts are left out of the build unless asked for
+        with build_profiler.stage("metadata"):
+            drafts = metadata.update(jobs)
+        if drafts and not include_drafts:
+            logger.debug("Skipping draft(s): %s", ", ".join(job[0] for job in drafts))
+            drafts = set(drafts)
+            jobs = [job for job in jobs if job not in drafts]
+    if shard is not None:
+        # Only this shard's pages; every shard sees the same job list and takes a disjoint part
+        jobs = shard.select(jobs)
+    errors = []
+    if metadata is not None and metadata.errors:
+        # Pages whose header couldn't be read aren't rendered; they fail with the rest below
+        unreadable = dict(metadata.errors)
+        errors = [(job[0], unreadable[job[0]]) for job in jobs if job[0] in unreadable]
+        jobs = [job for job in jobs if job[0] not in unreadable]
+
+    pending = []
+    dependencies = {}
+    template_dependencies = {}
+    for source_path, output_path, page_template in jobs:
+        if manifest is not None:
+            if page_template not in template_dependencies:
+                template_dependencies[page_template] = load_template(page_template).dependencies
+            deps = [source_path, *template_dependencies[page_template], *images.dependencies()]
+            # Skip pages none of whose inputs changed since the last build...
+            with build_profiler.stage("hash"):
+                current = manifest.is_current(source_path, output_path, deps)
+            # ...as long as the link index still knows what the page links to
+            if current and (
+                link_index is None
+                or link_index.is_current(source_path, manifest.file_hash(source_path), output_path)
+            ):
+                logger.debug("Up to date, skipping %s", source_path)
+                manifest.record(source_path, output_path, deps)
+                if link_index is not None:
+                    link_index.keep(source_path)
+                continue
+            dependencies[source_path] = deps
+        pending.append((source_path, output_path, page_template))
+
+    page_refs = {} if link_index is not None else None
+    errors.extend(render_pages(pending, template_path, workers, refs=page_refs, io_threads=io_threads))
+    failed = {source_path for source_path, _ in errors}
+
+    for source_path, output_path, _ in pending:
+        if source_path in failed:
+            continue
+        source_hash = None
+        if manifest is not None:
+            manifest.record(source_path, output_path, dependencies[source_path])
+            source_hash = manifest.file_hash(source_path)
+        if link_index is not None:
+            link_index.record(source_path, source_hash, output_path, page_refs[source_path])
+
+    if errors:
+        for source_path, message in errors:
+            logger.error("Error generating %s: %s", source_path, message)
+        raise Exception(f"Failed to generate {len(errors)} page(s)")
+    return len(pending)
+
+
+
+
+def prepare_page(from_path, source, template_path, context=None, refs=None):
+    # Everything a page needs before its body is written: the compiled template and the slot
+    # values. source is an open text stream (a file, or io.StringIO for prefetched markdown).
+    # Returns (template, page_context, parse_seconds), where parse_seconds[0] is filled in
+    # while profiling once the Content slot has been rendered.
+    profiler = build_profiler.active
+
+    # Extract title, buffering only the blocks that come before it; a title in the
+    # front matter wins over the first "# " heading
+    toc = TableOfContents()
+    with build_profiler.stage("title"):
+        meta = read_front_matter(source, from_path)
+        blocks = iter_blocks(source, offsets=toc.offsets)
+        first_block = next(blocks, None)
+        if first_block is None:
+            raise Exception(f"File at {from_path} is empty or unreadable.")
+        blocks = chain((first_block,), blocks)
+        title = front_matter_title(meta)
+        if title is None:
+            title, blocks = split_title(blocks)
+
+    # Load the compiled template (parsed once, cached by path and mtime)
+    with build_profiler.stage("template"):
+        template = load_template(template_path)
+
+    # Fill the template slots; extra slots (date, nav, ...) come from context.
+    # Content parses and writes one block at a time (the parse.* stages time that work)
+    page_context = dict(context or {})
+    page_context["Title"] = escape_text(title)
+    page_context["Date"] = escape_text(str(meta.get("date", "")))
+    tags = meta.get("tags", [])
+    page_context["Tags"] = escape_text(", ".join(tags) if isinstance(tags, list) else str(tags))
+    parse_seconds = [0.0]
+
+    def write_content(out):
+        if profiler is None:
+            write_markdown_html(blocks, out, render_cache.active, refs, toc)
+            return
+        parse_started = time.perf_counter()
+        write_markdown_html(blocks, out, render_cache.active, refs, toc)
+        parse_seconds[0] = time.perf_counter() - parse_started
+
+    page_context["Content"] = write_content
+    slots = template.parts[1::2]
+    if "Toc" in slots:
+        # Headings are recorded while Content renders; only a Toc placed before it
+        # needs the body rendered up front (once, into memory) instead of streamed
+        if "Content" in slots and slots.index("Toc") < slots.index("Content"):
+            buffer = io.StringIO()
+            write_content(buffer)
+            page_context["Content"] = buffer.getvalue()
+            if profiler is not None:
+                profiler.add("parse", parse_seconds[0])
+                parse_seconds[0] = 0.0
+        page_context["Toc"] = lambda out: out.write(toc.to_html())
+    return template, page_context, parse_seconds
+
+
+def generate_page(from_path, template_path, dest_path, context=None, refs=None):
+    # Step 1: Start the per-page timer (read when verbose logging or profiling is on)
+    started = time.perf_counter()
+    profiler = build_profiler.active
+
+    # Step 2: Open the markdown file; blocks are read from it lazily while the page is written
+    with build_profiler.stage("read"):
+        source = open(from_path, 'r')
+    with source:
+        source_size = os.fstat(source.fileno()).st_size
+        if profiler is not None:
+            profiler.count("bytes_read", source_size)
+
+        # Step 3: Title, template and slots
+        template, page_context, parse_seconds = prepare_page(from_path, source, template_path, context, refs)
+
+        # Step 4: Stream the rendered page to a temporary file, so a page that fails
+        # halfway through parsing never replaces the previous output
+        write_started = time.perf_counter()
+        tmp_path = dest_path + ".tmp"
+        try:
+            try:
+                file = open(tmp_path, 'w')
+            except FileNotFoundError:
+                # Only the first page of a new output directory pays for creating it
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                file = open(tmp_path, 'w')
+            with file:
+                template.render_to(file, page_context)
+                written = file.tell()
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if profiler is not None:
+            # Parsing happens inside the write, so split the time to keep the stages disjoint
+            profiler.add("parse", parse_seconds[0])
+            profiler.add("write", time.perf_counter() - write_started - parse_seconds[0])
+
+    if profiler is not None:
+        profiler.count("bytes_written", written)
+        profiler.count("pages")
+        profiler.record_page(from_path, time.perf_counter() - started)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "page source=%s output=%s template=%s read=%d written=%d ms=%.2f",
+            from_path, dest_path, template_path, source_size, written,
+            (time.perf_counter() - started) * 1000,
+        )
+
+
+def render_page_text(from_path, text, template_path, refs=None):
+    # In-memory variant of generate_page for the I/O pipeline: markdown text in, page out
+    started = time.perf_counter()
+    profiler = build_profiler.active
+    template, page_context, parse_seconds = prepare_page(from_path, io.StringIO(text), template_path, refs=refs)
+    render_started = time.perf_counter()
+    out = io.StringIO()
+    template.render_to(out, page_context)
+    if profiler is not None:
+        profiler.add("parse", parse_seconds[0])
+        profiler.add("render", time.perf_counter() - render_started - parse_seconds[0])
+        profiler.count("pages")
+        profiler.record_page(from_path, time.perf_counter() - started)
+    return out.getvalue()
+
+
+
+
+def parse_widths(text):
+    # "480,960" -> (480, 960)
+    try:
+        widths = tuple(int(width) for width in text.split(",") if width.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated pixel widths, got {text!r}")
+    if not widths or min(widths) < 1:
+        raise argparse.ArgumentTypeError(f"expected comma-separated pixel widths, got {text!r}")
+    return widths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site from content/ into public/.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-render pages whose markdown or template changed since the last build",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete public/ before building instead of syncing it in place",
+    )
+    parser.add_argument(
+        "--asset-mode",
+        choices=ASSET_MODES,
+        default="auto",
+        help="how changed static files reach public/: auto tries a copy-on-write clone, then copies "
+             "(default: auto); hardlink shares the file with static/",
+    )
+    parser.add_argument(
+        "--asset-check",
+        choices=ASSET_CHECKS,
+        default="mtime",
+        help="how unchanged static files are detected (default: mtime, i.e. size + mtime)",
+    )
+    parser.add_argument(
+        "--asset-threads",
+        type=int,
+        default=4,
+        help="threads used to copy static files (default: 4)",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="content files to render, relative to content/; repeatable (default: *.md)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="content files or directories to skip, e.g. 'drafts' or '*/_*'; repeatable",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also render and list pages marked 'draft: true' in their front matter",
+    )
+    parser.add_argument(
+        "--site-url",
+        default="",
+        metavar="URL",
+        help="absolute site address used for links in feed.xml and sitemap.xml, e.g. https://example.com",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="fail the build on internal links and images that don't resolve in public/ or static/ "
+             "(incremental: only changed pages and pages linking to added/removed files are rechecked)",
+    )
+    post = parser.add_argument_group("minify and precompress")
+    post.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip insignificant whitespace from the generated HTML and comments/whitespace from CSS "
+             "(<pre>, <textarea>, <script> and <style> contents are kept as they are)",
+    )
+    post.add_argument(
+        "--gzip-level", type=int, default=0, metavar="1-9",
+        help="write a .gz next to every HTML, CSS, JS, XML, SVG, JSON and text file (default: 0, none)",
+    )
+    post.add_argument(
+        "--brotli-level", type=int, default=0, metavar="1-11",
+        help="write a .br next to the same files; needs the brotli package (default: 0, none)",
+    )
+    image_options = parser.add_argument_group("images")
+    image_options.add_argument(
+        "--responsive-images",
+        action="store_true",
+        help="give markdown images under static/ their width, height and loading=\"lazy\", and (with "
+             "Pillow installed) resized derivatives listed in srcset, encoded once per image and setting",
+    )
+    image_options.add_argument(
+        "--image-widths", type=parse_widths, default=DEFAULT_WIDTHS, metavar="W,W,...",
+        help=f"derivative widths in pixels; only those below an image's own width are made "
+             f"(default: {','.join(map(str, DEFAULT_WIDTHS))})",
+    )
+    image_options.add_argument(
+        "--image-format", choices=IMAGE_FORMATS, default="webp",
+        help="encode derivatives as WebP (plus a full-size WebP) or in the image's own format (default: webp)",
+    )
+    image_options.add_argument(
+        "--image-quality", type=int, default=80, metavar="1-100",
+        help="WebP/JPEG quality of the derivatives (default: 80)",
+    )
+    image_options.add_argument(
+        "--image-sizes", metavar="SIZES",
+        help="sizes attribute for images with a srcset, e.g. '(max-width: 800px) 100vw, 800px'",
+    )
+    sharding = parser.add_argument_group("sharding")
+    shard_mode = sharding.add_mutually_exclusive_group()
+    shard_mode.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="render only shard I of N (pages are assigned by a stable hash of their content path) "
+             "into --shard-dir; run every shard, then --merge-shards N",
+    )
+    shard_mode.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help="check that shards 1..N built every page exactly once, then assemble them into public/ "
+             "together with static files, listings, the feed and the sitemap",
+    )
+    shard_mode.add_argument(
+        "--local-shards",
+        type=int,
+        metavar="N",
+        help="build N shards as N local processes, then merge them",
+    )
+    sharding.add_argument(
+        "--shard-dir", default=SHARD_DIR, metavar="DIR",
+        help=f"where each shard writes its pages and manifest (default: {SHARD_DIR})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes used to render pages (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=0,
+        metavar="N",
+        help="prefetch sources and write pages on N reader and N writer threads per process, so "
+             "slow (e.g. network) storage overlaps with rendering; 0 streams each page straight "
+             "from and to disk (default: 0)",
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument(
+        "-v", "--verbose",
+        action="store_const", dest="verbosity", const=VERBOSE, default=NORMAL,
+        help="log a summary line per page plus debug traces",
+    )
+    output.add_argument(
+        "-q", "--quiet",
+        action="store_const", dest="verbosity", const=QUIET,
+        help="only report errors",
+    )
+    dev = parser.add_argument_group("development")
+    dev.add_argument(
+        "--watch",
+        action="store_true",
+        help="stay running and re-render affected pages whenever content/, static/ or template.html change",
+    )
+    dev.add_argument(
+        "--serve",
+        action="store_true",
+        help="like --watch, and also serve public/ over HTTP with live reload",
+    )
+    dev.add_argument("--host", default="127.0.0.1", help="address for --serve (default: 127.0.0.1)")
+    dev.add_argument("--port", type=int, default=8000, help="port for --serve (default: 8000)")
+    dev.add_argument(
+        "--poll",
+        action="store_true",
+        help="watch for changes by polling instead of inotify",
+    )
+    cache = parser.add_argument_group("render cache")
+    cache.add_argument(
+        "--render-cache",
+        choices=render_cache.MODES,
+        default="memory",
+        help="reuse the HTML of markdown blocks seen before: in memory for this run, or also on disk "
+             "across runs (default: memory)",
+    )
+    cache.add_argument(
+        "--render-cache-dir", default=render_cache.RENDER_CACHE_DIR, metavar="DIR",
+        help=f"where --render-cache disk keeps fragments (default: {render_cache.RENDER_CACHE_DIR})",
+    )
+    cache.add_argument(
+        "--render-cache-entries", type=int, default=4096, metavar="N",
+        help="blocks kept in memory per process (default: 4096)",
+    )
+    cache.add_argument(
+        "--render-cache-size", type=int, default=64, metavar="MB",
+        help="disk budget for --render-cache disk; oldest fragments are evicted past it (default: 64)",
+    )
+    profiling = parser.add_argument_group("profiling")
+    profiling.add_argument(
+        "--profile",
+        action="store_true",
+        help="print a per-stage timing breakdown, the slowest pages and bytes read/written",
+    )
+    profiling.add_argument(
+        "--profile-top", type=int, default=10, metavar="N",
+        help="number of slowest pages listed by --profile (default: 10)",
+    )
+    profiling.add_argument(
+        "--profile-json", metavar="PATH",
+        help="also write the --profile data as JSON to PATH",
+    )
+    profiling.add_argument(
+        "--cprofile", metavar="PATH",
+        help="run the build under cProfile and dump pstats data to PATH",
+    )
+    args = parser.parse_args(argv)
+    sharded = args.shard is not None or args.merge_shards or args.local_shards
+    if sharded and args.check_links:
+        parser.error("--check-links needs every page's links in one build; run it without sharding")
+    for name in ("merge_shards", "local_shards"):
+        if getattr(args, name) is not None and getattr(args, name) < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1")
+    if not 0 <= args.gzip_level <= 9:
+        parser.error("--gzip-level must be between 1 and 9 (0 for none)")
+    if not 0 <= args.brotli_level <= 11:
+        parser.error("--brotli-level must be between 1 and 11 (0 for none)")
+    if not 1 <= args.image_quality <= 100:
+        parser.error("--image-quality must be between 1 and 100")
+    if args.brotli_level and not BROTLI_AVAILABLE:
+        parser.error("--brotli-level needs the brotli package (pip install brotli)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.verbosity)
+    # Also enabled for --watch/--serve, where most blocks survive between rebuilds
+    if args.render_cache != "off":
+        render_cache.enable(
+            args.render_cache_entries,
+            args.render_cache_dir if args.render_cache == "disk" else None,
+            args.render_cache_size << 20,
+        )
+
+    if args.watch or args.serve:
+        # Long-lived process: keeps templates and build state in memory between edits
+        import serve
+        serve.run(
+            serve=args.serve, host=args.host, port=args.port, polling=args.poll,
+            include=args.include or DEFAULT_INCLUDE, exclude=args.exclude or DEFAULT_EXCLUDE,
+        )
+        return
+
+    profiler = None
+    if args.profile or args.profile_json:
+        profiler = build_profiler.enable()
+    try:
+        if args.cprofile:
+            cprofiler = cProfile.Profile()
+            cprofiler.runcall(build, args)
+            cprofiler.dump_stats(args.cprofile)
         else:
-            print(f"DEBUG: Skipping unknown type: {full_path}")
-
-
-
-
-def generate_page(from_path, template_path, dest_path):
-    # Step 1: Print message
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    print(f"DEBUG: Attempting to read file at path: {from_path}")
-
-    # Step 2: Read markdown file
-    with open(from_path, 'r') as file:
-        markdown_content = file.read()
-
-    if not markdown_content.strip():
-        raise Exception(f"File at {from_path} is empty or unreadable.")
-    print(f"DEBUG: Content of {from_path}:\n{markdown_content}")
-    # Step 3: Read template file
-    with open(template_path, 'r') as file:
-        template_content = file.read()
-    
-    # Step 4: Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-
-    # Assign and THEN debug print it
-    html_content = html_node.to_html()
-    print(f"DEBUG: Markdown content read from {from_path}:")
-    print(markdown_content)
-    
-    # Step 5: Extract title
-    title = extract_title(markdown_content)
-    
-    # Step 6: Replace placeholders
-    html_page = template_content.replace("{{ Title }}", title)
-    html_page = html_page.replace("{{ Content }}", html_content)
-    
-    # Step 7: Write output to file
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, 'w') as file:
-        file.write(html_page)
-
-
-
-def main():
-    # Delete the public directory if it exists
-    if os.path.exists("public"):
+            build(args)
+    finally:
+        build_profiler.disable()
+        images.disable()
+        cache = render_cache.disable()
+        if cache is not None:
+            cache.trim_disk()
+
+    if profiler is not None:
+        if args.profile:
+            # Stage totals from --workers runs are summed over all worker processes
+            print(profiler.report(args.profile_top))
+        if args.profile_json:
+            profiler.write_json(args.profile_json)
+
+
+def sync_static_files(args):
+    with build_profiler.stage("static"):
+        return sync_static(
+            "static", "public", mode=args.asset_mode, check=args.asset_check, workers=args.asset_threads
+        )
+
+
+def log_static_sync(asset_stats):
+    logger.info(
+        "Static files synced: %d copied, %d reflinked, %d hard-linked, %d unchanged, %d removed",
+        asset_stats["copied"], asset_stats["reflinked"], asset_stats["hardlinked"],
+        asset_stats["skipped"], asset_stats["removed"],
+    )
+
+
+def update_listings(args, metadata):
+    if not args.site_url:
+        # Both are optional, so a plain build stays quiet about it
+        logger.debug("No --site-url given: feed.xml and sitemap.xml are not written, both need absolute URLs")
+    with build_profiler.stage("listings"):
+        written = write_listings(
+            metadata, "content", lambda dir_path: section_template(dir_path, "content", "template.html"),
+            args.site_url, args.drafts, args.minify,
+        )
+    metadata.save()
+    logger.info(
+        "Metadata index: %d page(s), %d draft(s)%s, %d header(s) read, %d listing file(s) updated",
+        len(metadata.pages), sum(entry["draft"] for entry in metadata.pages.values()),
+        "" if args.drafts else " skipped", metadata.read, len(written),
+    )
+
+
+def prepare_images(args, index_path=IMAGE_INDEX_PATH, attributes_path=IMAGE_ATTRIBUTES_PATH):
+    # Image sizes are needed before any page renders; derivatives are made alongside the pages
+    with build_profiler.stage("images"):
+        index = ImageIndex(index_path, args.image_widths, args.image_format, args.image_quality, args.image_sizes)
+        index.update("static")
+        index.write_attributes(attributes_path)
+    images.enable(attributes_path)
+    if images.Image is None:
+        logger.warning("Pillow is not installed: images get their sizes, but no resized derivatives or srcset")
+    return index
+
+
+def generate_images(args, index):
+    with build_profiler.stage("derivatives"):
+        return generate_derivatives(
+            index, "static", "public", workers=args.workers or os.cpu_count() or 1, mode=args.asset_mode,
+        )
+
+
+def log_images(index, image_stats):
+    logger.info(
+        "Images: %d image(s), %d header(s) read, %d derivative(s) encoded, %d copied, %d unchanged, %d removed",
+        image_stats["images"], index.read, image_stats["encoded"], image_stats["copied"],
+        image_stats["unchanged"], image_stats["removed"],
+    )
+
+
+def compress_output(args):
+    # Last stage of a build: everything in public/ is final by now
+    if not (args.minify or args.gzip_level or args.brotli_level):
+        removed = remove_sidecars("public")
+        if removed:
+            logger.info("Removed %d precompressed file(s) left by an earlier build", removed)
+        return
+    with build_profiler.stage("compress"):
+        stats = compress_site(
+            "public", args.minify, args.gzip_level, args.brotli_level, args.workers or os.cpu_count() or 1,
+        )
+    sizes = [f"{stats['original_bytes']} bytes"]
+    if args.minify:
+        sizes.append(f"{stats['minified_bytes']} minified")
+    if args.gzip_level:
+        sizes.append(f"{stats['gzip_bytes']} gzip")
+    if args.brotli_level:
+        sizes.append(f"{stats['brotli_bytes']} brotli")
+    logger.info(
+        "Compressed output: %d file(s), %d processed, %d unchanged, %d stale sidecar(s) removed; %s",
+        stats["files"], stats["processed"], stats["skipped"], stats["removed"], " -> ".join(sizes),
+    )
+
+
+def build(args):
+    if args.shard is not None:
+        return build_shard(args)
+    if args.local_shards:
+        return build_local_shards(args)
+    if args.merge_shards:
+        return merge_build(args)
+
+    started = time.perf_counter()
+
+    if args.clean and os.path.exists("public"):
+        # Delete the public directory if it exists
         shutil.rmtree("public") 
-    
-    # Copy the 'static' directory to 'public'
-    shutil.copytree("static", "public")
-    
-    print("Static files copied successfully!")
-    
-    # Generate the index page 
-    generate_pages_recursive("content", "template.html", "public")
-    print("Page generation completed!") 
+
+    # The manifest is always written so the next run can build incrementally;
+    # a full build re-renders everything but still cleans up removed pages
+    manifest = BuildManifest(MANIFEST_PATH, force=not args.incremental)
+    # The link graph is filled in while pages are parsed, so checking costs no extra pass
+    link_index = LinkIndex(LINK_INDEX_PATH, "public") if args.check_links else None
+    # Front matter of every page, for listings, tag pages, the feed and the sitemap
+    metadata = MetadataIndex(METADATA_INDEX_PATH, "public")
+    if args.responsive_images:
+        image_index = prepare_images(args)
+    else:
+        image_index = None
+        if remove_derivatives("public"):
+            logger.info("Removed the image derivatives of an earlier build")
+
+    # Sync the 'static' directory into 'public' (and make image derivatives) in the background while pages render
+    with ThreadPoolExecutor(max_workers=2) as background:
+        static_sync = background.submit(sync_static_files, args)
+        if image_index is not None:
+            image_sync = background.submit(generate_images, args, image_index)
+
+        # Generate the index page 
+        workers = args.workers or os.cpu_count() or 1
+        rendered = generate_pages_recursive(
+            "content", "template.html", "public", manifest, workers, link_index, args.io_threads,
+            args.include or DEFAULT_INCLUDE, args.exclude or DEFAULT_EXCLUDE, metadata, args.drafts,
+        )
+
+        asset_stats = static_sync.result()
+        image_stats = image_sync.result() if image_index is not None else None
+
+    log_static_sync(asset_stats)
+    if image_stats is not None:
+        log_images(image_index, image_stats)
+    for output_path in manifest.remove_stale_outputs():
+        logger.info("Removed stale page %s", output_path)
+    manifest.save()
+    update_listings(args, metadata)
+    compress_output(args)
+    logger.info(
+        "Page generation completed! %d rendered, %d up to date in %.2fs",
+        rendered, len(manifest.pages) - rendered, time.perf_counter() - started,
+    )
+    if link_index is not None:
+        check_links(link_index)
+
+
+def build_shard(args):
+    # Render one shard's pages into its own root; static files and listings are left to the merge
+    started = time.perf_counter()
+    index, count = args.shard
+    root = shard_root(args.shard_dir, index, count)
+    public_dir = os.path.join(root, "public")
+    if args.clean and os.path.exists(public_dir):
+        shutil.rmtree(public_dir)
+
+    manifest = BuildManifest(os.path.join(root, "build-manifest.json"), force=not args.incremental)
+    # Drafts have to be left out identically in every shard, or the page lists would disagree
+    metadata = MetadataIndex(os.path.join(root, "metadata-index.json"), public_dir)
+    shard = Shard(index, count, "content", public_dir)
+    if args.responsive_images:
+        # Sizes only: the derivatives are made once, by the merge
+        image_index = prepare_images(
+            args, os.path.join(root, "image-index.json"), os.path.join(root, "image-attributes.json"),
+        )
+        image_index.save(image_index.previous_outputs)
+    workers = args.workers or os.cpu_count() or 1
+    rendered = generate_pages_recursive(
+        "content", "template.html", public_dir, manifest, workers, None, args.io_threads,
+        args.include or DEFAULT_INCLUDE, args.exclude or DEFAULT_EXCLUDE, metadata, args.drafts, shard,
+    )
+    manifest.remove_stale_outputs()
+    manifest.save()
+    metadata.save()
+    shard.save(os.path.join(root, SHARD_MANIFEST_NAME))
+    logger.info(
+        "Shard %d/%d completed! %d of %d page(s), %d rendered in %.2fs",
+        index, count, len(shard.pages), shard.page_count, rendered, time.perf_counter() - started,
+    )
+
+
+def build_local_shards(args):
+    # Every shard in its own process, exactly as it would run on its own machine
+    count = args.local_shards
+    # Shards start from a clean process, so they get the output and render cache settings passed in
+    cache = render_cache.active
+    cache_config = (cache.max_entries, cache.disk_dir, cache.disk_max_bytes) if cache is not None else None
+    with process_pool(count, _init_shard, (args.verbosity, cache_config)) as executor:
+        futures = [
+            executor.submit(build_shard, argparse.Namespace(**{**vars(args), "shard": (index, count)}))
+            for index in range(1, count + 1)
+        ]
+        for future in futures:
+            future.result()
+    merge_build(argparse.Namespace(**{**vars(args), "merge_shards": count}))
+
+
+def _init_shard(verbosity, cache_config):
+    configure_logging(verbosity)
+    if cache_config is not None:
+        render_cache.enable(*cache_config)
+
+
+def merge_build(args):
+    started = time.perf_counter()
+    count = args.merge_shards
+    if args.clean and os.path.exists("public"):
+        shutil.rmtree("public")
+
+    if args.responsive_images:
+        image_index = prepare_images(args)
+    else:
+        image_index = None
+        remove_derivatives("public")
+
+    with ThreadPoolExecutor(max_workers=2) as background:
+        static_sync = background.submit(sync_static_files, args)
+        if image_index is not None:
+            image_sync = background.submit(generate_images, args, image_index)
+        with build_profiler.stage("merge"):
+            stats = merge_shards(args.shard_dir, count, "public", args.asset_mode)
+        asset_stats = static_sync.result()
+        image_stats = image_sync.result() if image_index is not None else None
+    log_static_sync(asset_stats)
+    if image_stats is not None:
+        log_images(image_index, image_stats)
+
+    # Listings need the whole site, so they are generated here rather than in the shards
+    metadata = MetadataIndex(METADATA_INDEX_PATH, "public")
+    with build_profiler.stage("metadata"):
+        metadata.update(collect_pages(
+            "content", "public", "template.html", args.include or DEFAULT_INCLUDE, args.exclude or DEFAULT_EXCLUDE,
+        ))
+    update_listings(args, metadata)
+    compress_output(args)
+    logger.info(
+        "Merged %d shard(s): %d page(s), %d copied, %d unchanged, %d removed in %.2fs",
+        count, stats["pages"], stats["copied"], stats["unchanged"], stats["removed"],
+        time.perf_counter() - started,
+    )
+
+
+def check_links(link_index):
+    with build_profiler.stage("links"):
+        broken = link_index.check(scan_site_files("public", "static"))
+    link_index.save()
+    for source_path, kind, url in broken:
+        if kind == "image":
+            logger.error("Missing image in %s: %s", source_path, url)
+        else:
+            logger.error("Broken link in %s: %s", source_path, url)
+    logger.info(
+        "Links checked: %d page(s), %d revalidated, %d target(s), %d broken",
+        len(link_index.pages), link_index.revalidated, len(link_index.targets), len(broken),
+    )
+    if broken:
+        raise Exception(f"Found {len(broken)} broken link(s) or missing image(s)")
 # Make sure to call main() at the end of the file
 if __name__ == "__main__":
     main()
\ No newline at end of file
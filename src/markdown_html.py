@@ -0,0 +1,218 @@
+from collections import deque
+
+from headings import TableOfContents, heading_level, plain_text
+import images
+from htmlnode import escape_attribute, escape_text
+from process_pool import process_pool
+from render_cache import RenderCache
+from split_blocks import BlockType, _collect_refs, classify_block, iter_blocks
+from split_nodes import text_to_textnodes
+from textnode import TextType
+
+
+# Direct markdown -> HTML string rendering for callers that only want the HTML.
+# Produces exactly what markdown_to_html_node(markdown).to_html() does, but appends
+# strings to one list instead of building (and then walking) an HTMLNode tree.
+
+_LEAF_TAGS = {
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+    TextType.LINK: "a",
+}
+
+
+def _inline_html(text_nodes, parts):
+    append = parts.append
+    for node in text_nodes:
+        text_type = node.text_type
+        if node.children:
+            # Nested emphasis
+            if text_type is TextType.BOLD:
+                tag = "b"
+            elif text_type is TextType.ITALIC:
+                tag = "i"
+            else:
+                raise ValueError("Invalid TextType")
+            append(f"<{tag}>")
+            _inline_html(node.children, parts)
+            append(f"</{tag}>")
+        elif text_type is TextType.TEXT:
+            append(escape_text(node.text))
+        elif text_type is TextType.IMAGE:
+            props = images.image_props(node.url, node.text)
+            append("<img" + "".join(f' {key}="{escape_attribute(value)}"' for key, value in props.items()) + " />")
+        else:
+            tag = _LEAF_TAGS.get(text_type)
+            if tag is None:
+                raise ValueError("Invalid TextType")
+            if not node.text:
+                raise ValueError(f"All leaf nodes must have a value (tag={tag})")
+            if text_type is TextType.LINK:
+                append(f'<a href="{escape_attribute(node.url)}">{escape_text(node.text)}</a>')
+            else:
+                append(f"<{tag}>{escape_text(node.text)}</{tag}>")
+
+
+def _block_html(block, block_type, lines, parts, refs, toc, block_index):
+    # Append the HTML of one block to parts (nothing when the block renders to nothing),
+    # following block_to_html_node case by case
+    def parse(text):
+        text_nodes = text_to_textnodes(text)
+        if refs is not None:
+            _collect_refs(text_nodes, refs)
+        return text_nodes
+
+    def inline(text):
+        text_nodes = parse(text)
+        _inline_html(text_nodes, parts)
+        return text_nodes
+
+    if block_type == BlockType.paragraph:
+        start = len(parts)
+        parts.append("<p>")
+        if inline(block):
+            parts.append("</p>")
+        else:
+            # Empty paragraphs are skipped
+            del parts[start:]
+
+    elif block_type == BlockType.heading:
+        level = heading_level(block)
+        text_nodes = parse(block[level:].strip())
+        anchor = toc.add(level, plain_text(text_nodes), block_index)
+        parts.append(f'<h{level} id="{escape_attribute(anchor)}">')
+        _inline_html(text_nodes, parts)
+        parts.append(f"</h{level}>")
+
+    elif block_type == BlockType.code:
+        parts.append(f"<pre><code>{escape_text(chr(10).join(lines[1:-1]))}</code></pre>")
+
+    elif block_type == BlockType.quote:
+        quote_lines = [line[1:].strip() if line.startswith('>') else line.strip() for line in lines]
+        parts.append("<blockquote>")
+        inline(' '.join(quote_lines))
+        parts.append("</blockquote>")
+
+    elif block_type == BlockType.unordered_list:
+        start = len(parts)
+        parts.append("<ul>")
+        for line in lines:
+            line = line.strip()
+            if line.startswith(("- ", "* ", "+ ")):
+                parts.append("<li>")
+                if not inline(line[2:]):
+                    parts.append(escape_text(line[2:]))
+                parts.append("</li>")
+        if len(parts) == start + 1:
+            # A list without items renders to nothing
+            del parts[start:]
+        else:
+            parts.append("</ul>")
+
+    elif block_type == BlockType.ordered_list:
+        parts.append("<ol>")
+        for line in lines:
+            line = line.strip()
+            if line and line[0].isdigit():
+                for i, char in enumerate(line):
+                    if char == ' ' and i > 0 and line[i-1] == '.':
+                        item_text = line[i+1:]
+                        break
+                else:
+                    continue
+                parts.append("<li>")
+                inline(item_text)
+                parts.append("</li>")
+        parts.append("</ol>")
+
+
+def _render_into(markdown, parts, cache, toc):
+    parts.append("<div>")
+    refs = [] if cache is not None else None
+    if toc is None:
+        toc = TableOfContents()
+    for block_index, block in enumerate(iter_blocks(markdown, offsets=toc.offsets)):
+        # Headings aren't cached, their ids depend on the rest of the page, and neither are
+        # images while the image pipeline is on (see iter_block_nodes)
+        if cache is not None and block[0] != "#" and not (images.active is not None and "![" in block):
+            cached = cache.get(block)
+            if cached is not None:
+                parts.append(cached[0])
+                continue
+            # Store the fragment (and its refs) exactly like a page build would,
+            # so batch conversions and site builds can share one cache
+            start = len(parts)
+            refs.clear()
+            block_type, lines = classify_block(block)
+            _block_html(block, block_type, lines, parts, refs, toc, block_index)
+            cache.put(block, "".join(parts[start:]), refs)
+        else:
+            block_type, lines = classify_block(block)
+            _block_html(block, block_type, lines, parts, None, toc, block_index)
+    parts.append("</div>")
+
+
+def markdown_to_html(markdown, cache=None, toc=None):
+    """Render a markdown string straight to HTML, without an intermediate HTMLNode tree.
+
+    The result is identical to markdown_to_html_node(markdown).to_html(). With a
+    RenderCache, blocks already seen (in this call or earlier ones) are not parsed again;
+    with a TableOfContents, the document's headings are recorded in it.
+    """
+    parts = []
+    _render_into(markdown, parts, cache, toc)
+    return "".join(parts)
+
+
+def _convert_batch(documents, cache_config):
+    # Worker side of iter_markdown_html: each process keeps one cache for all its batches
+    global _worker_cache
+    if cache_config is not None and _worker_cache is None:
+        _worker_cache = RenderCache(*cache_config)
+    return [markdown_to_html(markdown, _worker_cache) for markdown in documents]
+
+
+_worker_cache = None
+
+
+def _batches(documents, batch_size):
+    batch = []
+    for markdown in documents:
+        batch.append(markdown)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_markdown_html(documents, cache=None, workers=1, batch_size=64):
+    """Convert an iterable of markdown strings, yielding their HTML in the same order.
+
+    Documents share one RenderCache, so a block repeated across documents is parsed
+    once. With workers > 1, batches of batch_size documents are converted in a process
+    pool (each worker gets its own cache with the same settings and shares the disk
+    tier); only a few batches per worker are in flight, so the input is consumed
+    lazily and memory stays bounded however many documents there are.
+    """
+    if workers <= 1:
+        for markdown in documents:
+            yield markdown_to_html(markdown, cache)
+        return
+
+    cache_config = (cache.max_entries, cache.disk_dir, cache.disk_max_bytes) if cache is not None else None
+    batches = _batches(documents, batch_size)
+    pending = deque()
+    with process_pool(workers) as executor:
+        for batch in batches:
+            pending.append(executor.submit(_convert_batch, batch, cache_config))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def markdown_to_html_batch(documents, cache=None, workers=1, batch_size=64):
+    # List form of iter_markdown_html
+    return list(iter_markdown_html(documents, cache, workers, batch_size))
@@ -75,7 +75,7 @@ class TestTextNodeToHtmlNode(unittest.TestCase):
         md = "# This is a heading"
         node = markdown_to_html_node(md)
         html = node.to_html()
-        assert html == "<div><h1>This is a heading</h1></div>"     
+        assert html == '<div><h1 id="this-is-a-heading">This is a heading</h1></div>'     
 
     def test_code_block():
         md = "```\ndef code_block():\n    pass\n```"
@@ -0,0 +1,222 @@
+import os
+import re
+import tomllib
+from datetime import date, datetime
+
+from headings import slugify
+from split_blocks import line_title
+from state_file import load_state, save_state
+
+
+METADATA_INDEX_VERSION = 1
+METADATA_INDEX_PATH = os.path.join(".cache", "metadata-index.json")
+
+# Opening line -> format; the same line closes the block
+FRONT_MATTER_DELIMITERS = {"---": "yaml", "+++": "toml"}
+
+_TRUE = ("true", "yes", "on")
+_FALSE = ("false", "no", "off")
+_INTEGER_RE = re.compile(r"-?\d+")
+
+
+def _yaml_scalar(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    # Unquoted values can carry a trailing comment
+    value = value.split(" #", 1)[0].strip()
+    if value.lower() in _TRUE:
+        return True
+    if value.lower() in _FALSE:
+        return False
+    if _INTEGER_RE.fullmatch(value):
+        return int(value)
+    return value
+
+
+def parse_yaml_front_matter(lines):
+    # The subset front matter needs: "key: scalar", "key: [a, b]" and "key:" followed by "- item" lines
+    meta = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("-") and key is not None and (meta[key] is None or isinstance(meta[key], list)):
+            # "key:" with nothing after it turns into a list at its first item
+            if meta[key] is None:
+                meta[key] = []
+            meta[key].append(_yaml_scalar(stripped[1:].strip()))
+            continue
+        key, separator, value = line.partition(":")
+        key = key.strip()
+        if not separator or not key:
+            raise ValueError(f"Invalid front matter line: {line!r}")
+        value = value.strip()
+        if not value:
+            meta[key] = None
+        elif value.startswith("[") and value.endswith("]"):
+            meta[key] = [_yaml_scalar(item.strip()) for item in value[1:-1].split(",") if item.strip()]
+        else:
+            meta[key] = _yaml_scalar(value)
+    return meta
+
+
+def read_front_matter(source, source_path=None):
+    """Consume a leading front matter block from a text stream and return it as a dict.
+
+    The block is delimited by "---" (YAML subset) or "+++" (TOML) lines. A stream
+    without one is left where it was and {} is returned, so the markdown after it
+    can be read from the same stream either way. Errors name source_path when given.
+    """
+    position = source.tell()
+    delimiter = source.readline().strip()
+    kind = FRONT_MATTER_DELIMITERS.get(delimiter)
+    if kind is None:
+        source.seek(position)
+        return {}
+    lines = []
+    for line in iter(source.readline, ""):
+        if line.strip() == delimiter:
+            break
+        lines.append(line.rstrip("\n"))
+    else:
+        raise ValueError(f"Front matter is not closed{_in(source_path)}")
+    try:
+        if kind == "toml":
+            return tomllib.loads("\n".join(lines))
+        return parse_yaml_front_matter(lines)
+    except ValueError as error:
+        raise ValueError(f"{error}{_in(source_path)}") from None
+
+
+def _in(source_path):
+    return f" in {source_path}" if source_path is not None else ""
+
+
+def front_matter_title(meta):
+    # The title set in the front matter, or None when it is missing or left empty ("title:")
+    title = meta.get("title")
+    if title is None or title == "" or title == []:
+        return None
+    return str(title)
+
+
+def read_page_header(path):
+    # Header-only read: the front matter, then lines up to the first level 1 heading if there is
+    # no title in it. Returns (front matter, heading or None); the body is never parsed.
+    # Any line starting with "# " counts, like split_title
+    with open(path, 'r') as file:
+        meta = read_front_matter(file, path)
+        if front_matter_title(meta) is not None:
+            return meta, None
+        for line in file:
+            title = line_title(line)
+            if title is not None:
+                return meta, title
+    return meta, None
+
+
+def _iso_date(value, source_path):
+    if value is None or value == []:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    value = str(value)
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}{_in(source_path)}") from None
+    return value
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE
+    return bool(value)
+
+
+def page_url(output_path, public_dir):
+    # public/blog/tom/index.html -> /blog/tom, public/about.html -> /about.html
+    relative = os.path.relpath(output_path, public_dir).replace(os.sep, "/")
+    if relative == "index.html":
+        return "/"
+    if relative.endswith("/index.html"):
+        return "/" + relative[:-len("/index.html")]
+    return "/" + relative
+
+
+def page_metadata(source_path, header):
+    # Normalized index entry from read_page_header's (front matter, heading)
+    meta, heading = header
+    tags = meta.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    default_slug = os.path.basename(os.path.dirname(source_path)) if stem == "index" else stem
+    return {
+        "title": front_matter_title(meta) or heading or "",
+        "date": _iso_date(meta.get("date"), source_path),
+        "tags": [str(tag).strip() for tag in tags if str(tag).strip()],
+        "draft": _flag(meta.get("draft", False)),
+        "slug": slugify(meta.get("slug") or default_slug),
+    }
+
+
+class MetadataIndex:
+    """Site-wide page metadata: title, date, tags, draft flag and slug per source file.
+
+    Built from headers only (see read_page_header) and persisted between builds; a
+    page whose size and mtime are unchanged is not opened at all. Listings, tag pages,
+    feeds and the sitemap are generated from the index (see listings.py) without
+    re-reading or re-rendering the pages they list.
+    """
+
+    def __init__(self, path=METADATA_INDEX_PATH, public_dir="public"):
+        self.path = path
+        self.public_dir = public_dir
+        previous = load_state(path, METADATA_INDEX_VERSION)
+        self.previous_pages = previous.get("pages", {})
+        self.pages = {}
+        self.errors = []
+        # Files the listings currently on disk were written to, so stale ones can be removed
+        self.generated = previous.get("generated", [])
+        self.read = 0
+
+    def update(self, jobs):
+        # Index every (source, output, template) job; returns the jobs of drafts.
+        # A page whose header can't be read is left out and its (source, message) added
+        # to self.errors, to be reported with the render errors rather than stop the build.
+        # Can be called again (e.g. by the dev server) to pick up changed pages
+        previous = self.pages or self.previous_pages
+        self.pages = {}
+        self.errors = []
+        self.read = 0
+        drafts = []
+        for source_path, output_path, page_template in jobs:
+            stat = os.stat(source_path)
+            entry = previous.get(source_path)
+            if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                try:
+                    entry = page_metadata(source_path, read_page_header(source_path))
+                except Exception as error:
+                    self.errors.append((source_path, f"{type(error).__name__}: {error}"))
+                    continue
+                entry["mtime_ns"] = stat.st_mtime_ns
+                entry["size"] = stat.st_size
+                self.read += 1
+            entry["output"] = output_path
+            entry["url"] = page_url(output_path, self.public_dir)
+            self.pages[source_path] = entry
+            if entry["draft"]:
+                drafts.append((source_path, output_path, page_template))
+        return drafts
+
+    def published(self, include_drafts=False):
+        # Entries newest first; undated pages come last, by title
+        entries = [entry for entry in self.pages.values() if include_drafts or not entry["draft"]]
+        entries.sort(key=lambda entry: entry["title"])
+        entries.sort(key=lambda entry: entry["date"] or "", reverse=True)
+        return entries
+
+    def save(self):
+        save_state(self.path, METADATA_INDEX_VERSION, pages=self.pages, generated=self.generated)
@@ -0,0 +1,117 @@
+import re
+
+
+# Tags (with quoted attribute values, which may contain ">") and comments
+_TAG_BODY = r"(?:[^>\"']|\"[^\"]*\"|'[^']*')*"
+_HTML_TOKEN_RE = re.compile(rf"(<!--.*?-->|<{_TAG_BODY}>)", re.DOTALL)
+# Elements whose contents are kept byte for byte (code blocks come out as <pre><code>);
+# cut out whole first, since a "<" in a script is not a tag
+_PRESERVE_RE = re.compile(
+    rf"(<(pre|textarea|script|style)\b{_TAG_BODY}>.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+_TAG_NAME_RE = re.compile(r"</?([a-zA-Z][a-zA-Z0-9]*)")
+# HTML whitespace only: \s would also eat non-breaking spaces, which do render
+_HTML_SPACE_RE = re.compile(r"[ \t\n\r\f]+")
+_HTML_SPACE = " \t\n\r\f"
+
+# Whitespace next to these never renders, so it can be dropped rather than collapsed
+_BLOCK_TAGS = frozenset((
+    "html head body title meta link base div p ul ol li dl dt dd h1 h2 h3 h4 h5 h6 article section "
+    "nav header footer main aside blockquote pre table thead tbody tfoot tr td th figure figcaption "
+    "form fieldset hr br noscript script style template"
+).split())
+
+
+def _tag_name(tag):
+    match = _TAG_NAME_RE.match(tag)
+    return match.group(1).lower() if match else None
+
+
+def _is_block(tag):
+    # Declarations (<!doctype>) and block-level tags; comments count as inline
+    if tag.startswith("<!--"):
+        return False
+    return tag.startswith("<!") or _tag_name(tag) in _BLOCK_TAGS
+
+
+def minify_html(html):
+    """Collapse insignificant whitespace in an HTML document.
+
+    Runs of whitespace in text become one space, and whitespace touching a
+    block-level tag (template indentation, newlines between <li>s...) is dropped.
+    <pre>, <textarea>, <script> and <style> elements are left untouched.
+    """
+    # Alternating text and markup; a preserved element counts as one piece of markup
+    pieces = _PRESERVE_RE.split(html)
+    tokens = []
+    for index in range(0, len(pieces), 3):
+        tokens.extend(_HTML_TOKEN_RE.split(pieces[index]))
+        if index + 1 < len(pieces):
+            tokens.append(pieces[index + 1])
+
+    out = []
+    last = len(tokens) - 1
+    for index, token in enumerate(tokens):
+        if index % 2 or not token:
+            out.append(token)
+            continue
+        text = _HTML_SPACE_RE.sub(" ", token)
+        if index == 0 or _is_block(tokens[index - 1]):
+            text = text.lstrip(_HTML_SPACE)
+        if index == last or _is_block(tokens[index + 1]):
+            text = text.rstrip(_HTML_SPACE)
+        out.append(text)
+    return "".join(out)
+
+
+# Strings are kept as they are; comments are replaced by a space
+_CSS_TOKEN_RE = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*.*?\*/)", re.DOTALL)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCTUATION_RE = re.compile(r" ?([{};,>]) ?")
+# After ":" everywhere; before it only in declarations (see _tighten_declarations)
+_CSS_COLON_RE = re.compile(r": ")
+_CSS_STRUCTURE_RE = re.compile(r"([{};])")
+
+
+def _minify_css_text(text):
+    text = _CSS_SPACE_RE.sub(" ", text)
+    text = _CSS_PUNCTUATION_RE.sub(r"\1", text)
+    text = _CSS_COLON_RE.sub(":", text)
+    return text.replace(";}", "}")
+
+
+def _tighten_declarations(pieces):
+    # "a :hover" (a descendant selector) and "a:hover" differ, but "color :red" is just
+    # "color:red". A declaration is text ending in ";" or "}", a selector one ending in "{";
+    # the text pieces are walked backwards to know which, strings and comments in between
+    terminator = "{"
+    for index in range(len(pieces) - 1, -1, -2):
+        parts = _CSS_STRUCTURE_RE.split(pieces[index])
+        for part_index in range(len(parts) - 1, -1, -1):
+            if part_index % 2:
+                terminator = parts[part_index]
+            elif terminator != "{":
+                parts[part_index] = parts[part_index].replace(" :", ":")
+        pieces[index] = "".join(parts)
+
+
+def minify_css(css):
+    # Drops comments (except /*! ... */ license headers) and whitespace around punctuation
+    pieces = []
+    text = []
+    for index, token in enumerate(_CSS_TOKEN_RE.split(css)):
+        if index % 2 and not (token.startswith("/*") and not token.startswith("/*!")):
+            pieces.append(_minify_css_text("".join(text)))
+            pieces.append(token)
+            text = []
+        elif index % 2:
+            text.append(" ")
+        elif pieces and pieces[-1].startswith("/*"):
+            # Nothing after a kept comment needs separating from it
+            text.append(token.lstrip())
+        else:
+            text.append(token)
+    pieces.append(_minify_css_text("".join(text)))
+    # Text and kept tokens alternate, so the text pieces are the even ones
+    _tighten_declarations(pieces)
+    return "".join(pieces).strip()
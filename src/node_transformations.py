@@ -1,11 +1,20 @@
 from textnode import TextNode, TextType
 from htmlnode import LeafNode, ParentNode   
+from images import image_props
 
 
 
 
 
 def text_node_to_html_node(text_node):
+    if text_node.children:
+        # Nested emphasis: wrap the converted inner nodes in the emphasis tag
+        children = [text_node_to_html_node(child) for child in text_node.children]
+        if text_node.text_type == TextType.BOLD:
+            return ParentNode("b", children)
+        elif text_node.text_type == TextType.ITALIC:
+            return ParentNode("i", children)
+        raise ValueError("Invalid TextType")
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     elif text_node.text_type == TextType.BOLD:
@@ -17,7 +26,7 @@ def text_node_to_html_node(text_node):
     elif text_node.text_type == TextType.LINK:
         return LeafNode("a", text_node.text, props={"href": text_node.url})
     elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", props={"src": text_node.url, "alt": text_node.text})
+        return LeafNode("img", "", props=image_props(text_node.url, text_node.text))
     else:
         raise ValueError("Invalid TextType")
     
@@ -0,0 +1,17 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Builds run thread pools (static sync, image derivatives, I/O threads) while process
+# pools start, and a fork() taken while another thread holds a lock (logging, the import
+# lock, the allocator) copies that lock held forever into the child. Worker processes are
+# therefore started by a fork server (or spawned where there is none) and inherit nothing:
+# anything they need (log level, render cache settings...) comes through initargs.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def process_pool(max_workers, initializer=None, initargs=()):
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD),
+        initializer=initializer, initargs=initargs,
+    )
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+
+# Bump whenever block parsing or rendering changes, so stale fragments are never reused
+PARSER_VERSION = 4
+
+RENDER_CACHE_DIR = os.path.join(".cache", "render")
+MODES = ("off", "memory", "disk")
+
+# The cache in use for this process, or None (see enable()/disable())
+active = None
+
+
+def block_key(block):
+    # Content address of a markdown block: same text + same parser -> same HTML
+    digest = hashlib.sha256(f"{PARSER_VERSION}\0".encode())
+    digest.update(block.encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Maps markdown blocks to their rendered HTML and the (kind, url) refs they contain.
+
+    Entries live in an in-memory LRU bounded by max_entries. With disk_dir set,
+    fragments are also written to disk_dir/<ab>/<hash>.json so later builds (and
+    other worker processes) can reuse them; the disk tier is trimmed, oldest
+    first, once it grows past disk_max_bytes.
+    """
+
+    def __init__(self, max_entries=4096, disk_dir=None, disk_max_bytes=64 << 20):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def get(self, block):
+        # Returns (html, refs) or None
+        key = block_key(block)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.disk_dir is not None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, block, html, refs=()):
+        key = block_key(block)
+        entry = (html, tuple(refs))
+        self._remember(key, entry)
+        if self.disk_dir is not None:
+            self._write_disk(key, entry)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits}
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return data["html"], tuple((kind, url) for kind, url in data["refs"])
+
+    def _write_disk(self, key, entry):
+        html, refs = entry
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temporary name so parallel workers writing the same fragment don't collide
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"html": html, "refs": refs}, file)
+        os.replace(tmp_path, path)
+
+    def trim_disk(self):
+        # Evict least recently written fragments until the disk tier fits its budget
+        if self.disk_dir is None or not os.path.isdir(self.disk_dir):
+            return 0
+        files = []
+        total = 0
+        for shard in os.scandir(self.disk_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+        removed = 0
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+def enable(max_entries=4096, disk_dir=None, disk_max_bytes=64 << 20):
+    global active
+    active = RenderCache(max_entries, disk_dir, disk_max_bytes)
+    return active
+
+
+def disable():
+    global active
+    cache, active = active, None
+    return cache
@@ -0,0 +1,455 @@
+import ctypes
+import ctypes.util
+import functools
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from assets import ASSET_MANIFEST_PATH, copy_file, sync_static
+from build_log import get_logger
+from build_manifest import BuildManifest, MANIFEST_PATH
+from listings import write_listings
+from main import (
+    DEFAULT_EXCLUDE, DEFAULT_INCLUDE, TEMPLATE_NAME, collect_pages, generate_page, generate_pages_recursive,
+    is_excluded, is_page, page_dependencies, page_output_path, section_template,
+)
+from metadata import MetadataIndex, METADATA_INDEX_PATH
+
+logger = get_logger("serve")
+
+
+# Injected before </body> of every served HTML page
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + RELOAD_PATH + "\")"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+
+
+class PollingWatcher:
+    """Detects changed files by comparing (mtime, size) snapshots."""
+
+    def __init__(self, paths, interval=0.25):
+        self.paths = list(paths)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                for dir_path, _, file_names in os.walk(path):
+                    for name in file_names:
+                        self._stat_into(snapshot, os.path.join(dir_path, name))
+            else:
+                self._stat_into(snapshot, path)
+        return snapshot
+
+    def _stat_into(self, snapshot, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout=None):
+        # Return the set of created, modified or deleted paths (empty on timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                path for path in current.keys() | self.snapshot.keys()
+                if current.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Linux inotify watcher over directories (recursive) and single files."""
+
+    def __init__(self, paths):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> directory
+        self.file_filters = {}  # directory -> file names watched there, None for whole trees
+        for path in paths:
+            if os.path.isdir(path):
+                self._watch_tree(path)
+            else:
+                directory = os.path.dirname(path)
+                names = self.file_filters.setdefault(directory, set())
+                if names is not None:
+                    names.add(os.path.basename(path))
+                self._add_watch(directory)
+
+    def _add_watch(self, directory):
+        # Directories are kept as given ("" for the cwd) so reported paths match the inputs
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory or "."), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def _watch_tree(self, root):
+        for dir_path, _, _ in os.walk(root):
+            self.file_filters[dir_path] = None
+            self._add_watch(dir_path)
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        # Drain everything queued so a burst of saves becomes one rebuild
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed.update(self._parse(data))
+        return changed
+
+    def _parse(self, data):
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if not name:
+                continue
+            names = self.file_filters.get(directory)
+            if names is not None and name not in names:
+                continue
+
+            path = os.path.join(directory, name)
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and names is None:
+                # New directory inside a watched tree: watch it and report what it already holds
+                self._watch_tree(path)
+                for dir_path, _, file_names in os.walk(path):
+                    changed.update(os.path.join(dir_path, file_name) for file_name in file_names)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(paths, polling=False):
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as error:
+            logger.info("inotify unavailable (%s), falling back to polling", error)
+    return PollingWatcher(paths)
+
+
+class DevBuilder:
+    """Keeps build state in memory and re-renders only what a set of changed files affects."""
+
+    def __init__(self, content_dir="content", static_dir="static", template_path="template.html",
+                 public_dir="public", manifest_path=MANIFEST_PATH, asset_manifest_path=ASSET_MANIFEST_PATH,
+                 metadata_path=METADATA_INDEX_PATH, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.manifest_path = manifest_path
+        self.asset_manifest_path = asset_manifest_path
+        self.metadata_path = metadata_path
+        # The same --include/--exclude globs as a normal build
+        self.include = include
+        self.exclude = exclude
+        self.manifest = None
+        self.metadata = None
+
+    @property
+    def watched_paths(self):
+        return [self.content_dir, self.static_dir, self.template_path]
+
+    def full_build(self):
+        sync_static(self.static_dir, self.public_dir, self.asset_manifest_path)
+        self.manifest = BuildManifest(self.manifest_path)
+        # Drafts are rendered and listed while previewing
+        self.metadata = MetadataIndex(self.metadata_path, self.public_dir)
+        generate_pages_recursive(
+            self.content_dir, self.template_path, self.public_dir, self.manifest,
+            include=self.include, exclude=self.exclude, metadata=self.metadata, include_drafts=True,
+        )
+        self.manifest.remove_stale_outputs()
+        self.manifest.save()
+        self._refresh_listings()
+
+    def apply_changes(self, changed):
+        # Returns the output paths that were written or removed
+        touched = []
+        changed = {os.path.normpath(path) for path in changed}
+        # Pages that read a changed file (their markdown, their template...) per the dependency graph
+        dirty = set(self.manifest.invalidate(changed))
+
+        content_prefix = self.content_dir + os.sep
+        static_prefix = self.static_dir + os.sep
+        sections = []
+        for path in sorted(changed):
+            if os.path.basename(path).startswith("."):
+                # Editor swap and lock files
+                continue
+            if path.startswith(static_prefix):
+                touched.extend(self._sync_static(path))
+            elif path.startswith(content_prefix):
+                if os.path.isdir(path):
+                    sections.append(path)
+                elif os.path.basename(path) == TEMPLATE_NAME:
+                    # A section template appeared or went away: its pages switch templates
+                    sections.append(os.path.dirname(path))
+                elif os.path.isfile(path) and is_page(
+                    os.path.relpath(path, self.content_dir), self.include, self.exclude,
+                ):
+                    dirty.add(path)
+                elif os.path.exists(path):
+                    continue
+                else:
+                    touched.extend(self._remove_pages(path))
+
+        for section in sections:
+            relative_dir = os.path.relpath(section, self.content_dir)
+            if relative_dir == ".":
+                relative_dir = ""
+            elif is_excluded(relative_dir, self.exclude):
+                continue
+            dest_dir = os.path.join(self.public_dir, relative_dir)
+            generate_pages_recursive(
+                section, self._template_for(section), dest_dir, self.manifest,
+                include=self.include, exclude=self.exclude,
+                relative_dir=relative_dir.replace(os.sep, "/") + "/" if relative_dir else "",
+            )
+            touched.append(dest_dir)
+
+        for path in sorted(dirty):
+            if not os.path.isfile(path) or any(path.startswith(section + os.sep) for section in sections):
+                continue
+            template_path = self._template_for(os.path.dirname(path))
+            output_path = self._output_path(path)
+            generate_page(path, template_path, output_path)
+            self.manifest.record(path, output_path, page_dependencies(path, template_path))
+            touched.append(output_path)
+
+        self.manifest.save()
+        if sections or dirty or any(path.startswith(content_prefix) for path in changed):
+            touched.extend(self._refresh_listings())
+        return touched
+
+    def _refresh_listings(self):
+        # Headers of unchanged pages come from the index, so this only reads edited pages
+        self.metadata.update(collect_pages(
+            self.content_dir, self.public_dir, self.template_path, self.include, self.exclude,
+        ))
+        for source_path, message in self.metadata.errors:
+            logger.error("Error reading %s: %s", source_path, message)
+        touched = write_listings(self.metadata, self.content_dir, self._template_for, include_drafts=True)
+        self.metadata.save()
+        return touched
+
+    def _template_for(self, dir_path):
+        return section_template(dir_path, self.content_dir, self.template_path)
+
+    def _output_path(self, source_path):
+        relative_dir = os.path.relpath(os.path.dirname(source_path), self.content_dir)
+        return page_output_path(os.path.basename(source_path), os.path.normpath(
+            os.path.join(self.public_dir, relative_dir)))
+
+    def _remove_pages(self, deleted_path):
+        # A deleted file or directory: drop every page that came from it
+        removed = []
+        for source_path in list(self.manifest.pages):
+            if source_path == deleted_path or source_path.startswith(deleted_path + os.sep):
+                output_path = self.manifest.pages.pop(source_path)["output"]
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                removed.append(output_path)
+        return removed
+
+    def _sync_static(self, path):
+        dest = os.path.join(self.public_dir, os.path.relpath(path, self.static_dir))
+        if os.path.isdir(path):
+            shutil.copytree(path, dest, dirs_exist_ok=True)
+        elif os.path.isfile(path):
+            copy_file(path, dest)
+        elif os.path.isdir(dest):
+            shutil.rmtree(dest)
+        elif os.path.exists(dest):
+            os.remove(dest)
+        else:
+            return []
+        return [dest]
+
+
+class ReloadBroadcaster:
+    """Wakes every connected browser when a rebuild finishes."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.closed = False
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, seen_version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != seen_version or self.closed, timeout)
+            return self.version
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    broadcaster = None
+
+    def log_message(self, format, *args):
+        logger.debug("http %s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self._stream_reload_events()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self._send_html(path)
+            return
+        super().do_GET()
+
+    def _send_html(self, path):
+        with open(path, 'rb') as file:
+            body = file.read()
+        marker = body.rfind(b"</body>")
+        script = RELOAD_SCRIPT.encode()
+        body = body[:marker] + script + body[marker:] if marker != -1 else body + script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_reload_events(self):
+        # Server-sent events: one "reload" message per finished rebuild
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        broadcaster = self.broadcaster
+        seen = broadcaster.version
+        try:
+            while not broadcaster.closed:
+                version = broadcaster.wait(seen, timeout=15)
+                if version != seen:
+                    seen = version
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    # Keep-alive comment so proxies don't drop the idle connection
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def make_server(public_dir, host, port, broadcaster):
+    handler = type("SiteHandler", (LiveReloadHandler,), {"broadcaster": broadcaster})
+    server = ThreadingHTTPServer((host, port), functools.partial(handler, directory=public_dir))
+    server.daemon_threads = True
+    return server
+
+
+def run(serve=False, host="127.0.0.1", port=8000, polling=False, debounce=0.05,
+        include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE):
+    builder = DevBuilder(include=include, exclude=exclude)
+    started = time.perf_counter()
+    builder.full_build()
+    logger.info("Initial build finished in %.2fs", time.perf_counter() - started)
+
+    broadcaster = ReloadBroadcaster()
+    server = None
+    if serve:
+        server = make_server(builder.public_dir, host, port, broadcaster)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info("Serving %s on http://%s:%d/", builder.public_dir, host, server.server_port)
+
+    watcher = make_watcher(builder.watched_paths, polling)
+    logger.info("Watching %s for changes (Ctrl+C to stop)", ", ".join(builder.watched_paths))
+    try:
+        while True:
+            changed = watcher.wait(timeout=1.0)
+            if not changed:
+                continue
+            # Editors often save in several steps; collect the whole burst first
+            time.sleep(debounce)
+            changed |= watcher.wait(timeout=0)
+
+            started = time.perf_counter()
+            try:
+                touched = builder.apply_changes(changed)
+            except Exception as error:
+                logger.error("Rebuild failed: %s", error)
+                continue
+            logger.info(
+                "Rebuilt %d output(s) in %.1f ms", len(touched), (time.perf_counter() - started) * 1000
+            )
+            broadcaster.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        broadcaster.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+
+from assets import copy_file
+from state_file import load_state, remove_empty_dirs, save_state, write_atomic
+
+
+SHARD_MANIFEST_VERSION = 1
+SHARD_DIR = ".shards"
+SHARD_MANIFEST_NAME = "shard-manifest.json"
+# Outputs placed in public/ by the last merge, so pages that went away can be removed
+MERGED_NAME = "merged.json"
+
+
+def parse_shard(text):
+    # "2/8" -> (2, 8); shards are numbered from 1
+    index, separator, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected i/N") from None
+    if not separator or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {text!r}, expected i/N with 1 <= i <= N")
+    return index, count
+
+
+def shard_of(relative_path, count):
+    # Stable across machines and runs (unlike hash()): depends only on the content path
+    digest = hashlib.sha256(relative_path.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def shard_root(shard_dir, index, count):
+    return os.path.join(shard_dir, f"{index}-of-{count}")
+
+
+def pages_digest(relative_paths):
+    # Fingerprint of the full page list, so the merge can tell whether all shards saw the same site
+    digest = hashlib.sha256()
+    for path in sorted(relative_paths):
+        digest.update(path.encode() + b"\0")
+    return digest.hexdigest()
+
+
+class Shard:
+    """One shard of a build: the pages whose content path hashes to `index` of `count`.
+
+    select() narrows the job list of generate_pages_recursive to this shard and
+    remembers what it saw; save() writes the shard manifest merge_shards() checks.
+    """
+
+    def __init__(self, index, count, content_dir, public_dir):
+        self.index = index
+        self.count = count
+        self.content_dir = content_dir
+        self.public_dir = public_dir
+        self.page_count = 0
+        self.digest = None
+        # content path -> output path, both relative and "/"-separated
+        self.pages = {}
+
+    def relative(self, path, root):
+        return os.path.relpath(path, root).replace(os.sep, "/")
+
+    def select(self, jobs):
+        relative_paths = [self.relative(job[0], self.content_dir) for job in jobs]
+        self.page_count = len(jobs)
+        self.digest = pages_digest(relative_paths)
+        selected = []
+        for job, relative_path in zip(jobs, relative_paths):
+            if shard_of(relative_path, self.count) == self.index:
+                self.pages[relative_path] = self.relative(job[1], self.public_dir)
+                selected.append(job)
+        return selected
+
+    def save(self, path):
+        save_state(
+            path, SHARD_MANIFEST_VERSION, shard=self.index, count=self.count, page_count=self.page_count,
+            pages_digest=self.digest, pages=self.pages,
+        )
+
+
+def load_shard_manifest(path):
+    return load_state(path, SHARD_MANIFEST_VERSION) or None
+
+
+def verify_shards(shard_dir, count):
+    """Check that shards 1..count together built every page exactly once.
+
+    Returns the shard manifests, or raises with every problem found: missing shards,
+    shards built from different content, pages built twice or by the wrong shard,
+    pages nobody built and outputs missing on disk.
+    """
+    manifests = []
+    problems = []
+    for index in range(1, count + 1):
+        manifest = load_shard_manifest(os.path.join(shard_root(shard_dir, index, count), SHARD_MANIFEST_NAME))
+        if manifest is None or manifest.get("shard") != index or manifest.get("count") != count:
+            problems.append(f"shard {index}/{count} has no valid manifest")
+        else:
+            manifests.append(manifest)
+    if problems:
+        raise Exception("Cannot merge shards: " + "; ".join(problems))
+    if len({(manifest["pages_digest"], manifest["page_count"]) for manifest in manifests}) != 1:
+        raise Exception("Cannot merge shards: they were built from different content")
+
+    owners = {}
+    outputs = {}
+    for manifest in manifests:
+        index = manifest["shard"]
+        root = os.path.join(shard_root(shard_dir, index, count), "public")
+        for source_path, output_path in manifest["pages"].items():
+            if source_path in owners:
+                problems.append(f"{source_path} was built by shards {owners[source_path]} and {index}")
+            elif shard_of(source_path, count) != index:
+                problems.append(f"{source_path} was built by shard {index}, not {shard_of(source_path, count)}")
+            if outputs.setdefault(output_path, source_path) != source_path:
+                problems.append(f"{source_path} and {outputs[output_path]} both write {output_path}")
+            if not os.path.isfile(os.path.join(root, output_path)):
+                problems.append(f"{output_path} is missing from shard {index}")
+            owners[source_path] = index
+    # Every shard saw the same page list; the pages they built must add up to exactly that list
+    expected = manifests[0]
+    if len(owners) != expected["page_count"] or pages_digest(owners) != expected["pages_digest"]:
+        problems.append(f"{expected['page_count'] - len(owners)} page(s) were not built by any shard")
+    if problems:
+        raise Exception("Cannot merge shards: " + "; ".join(problems))
+    return manifests
+
+
+def merge_shards(shard_dir, count, public_dir, mode="auto"):
+    """Verify shards 1..count and assemble their pages into public_dir.
+
+    Pages whose size and mtime already match are left alone, and pages placed by
+    the previous merge that no shard produced this time are removed. Returns counts
+    of copied, unchanged and removed pages.
+    """
+    manifests = verify_shards(shard_dir, count)
+    stats = {"pages": 0, "copied": 0, "unchanged": 0, "removed": 0}
+    merged = []
+    for manifest in manifests:
+        root = os.path.join(shard_root(shard_dir, manifest["shard"], count), "public")
+        for output_path in manifest["pages"].values():
+            src = os.path.join(root, output_path)
+            dst = os.path.join(public_dir, output_path)
+            merged.append(output_path)
+            stats["pages"] += 1
+            src_stat = os.stat(src)
+            try:
+                dst_stat = os.stat(dst)
+            except FileNotFoundError:
+                dst_stat = None
+            if (
+                dst_stat is not None
+                and dst_stat.st_size == src_stat.st_size
+                and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+            ):
+                stats["unchanged"] += 1
+                continue
+            copy_file(src, dst, mode)
+            stats["copied"] += 1
+
+    merged_path = os.path.join(shard_dir, MERGED_NAME)
+    try:
+        with open(merged_path, 'r') as file:
+            previous = json.load(file)
+    except (OSError, ValueError):
+        previous = []
+    for output_path in set(previous) - set(merged):
+        path = os.path.join(public_dir, output_path)
+        if os.path.exists(path):
+            os.remove(path)
+            stats["removed"] += 1
+            remove_empty_dirs(os.path.dirname(path))
+    write_atomic(merged_path, json.dumps(sorted(merged), indent=2))
+    return stats
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+
+class SiteTestCase(unittest.TestCase):
+    """Base for tests that build a throwaway site in a temporary directory.
+
+    setUp creates root/content and root/static and writes TEMPLATE to
+    root/template.html; public/ and .cache/ are left for the build to create.
+    Subclasses add their pages after calling super().setUp().
+    """
+
+    TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.cache = os.path.join(self.root, ".cache")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(self.content)
+        os.makedirs(self.static)
+        self.write(self.template, self.TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        # Text or bytes; missing parent directories are created
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb' if isinstance(data, bytes) else 'w') as file:
+            file.write(data)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def read_bytes(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
@@ -1,9 +1,17 @@
 from enum import Enum
-from htmlnode import HTMLNode
+from itertools import chain
+from time import perf_counter
+import build_profiler
+from htmlnode import HTMLNode, RawNode, write_html
 from node_transformations import text_node_to_html_node
 import re
 from split_nodes import text_to_textnodes
 from textnode import TextNode, TextType
+from build_log import get_logger
+from headings import TableOfContents, heading_level, plain_text
+import images
+
+logger = get_logger("split_blocks")
 
 
 class BlockType(Enum):
@@ -16,23 +24,50 @@ class BlockType(Enum):
     ordered_list = "ordered_list"
 
 
-def block_to_block_type(block):
+_REF_TYPES = (TextType.LINK, TextType.IMAGE)
+
+# Precompiled once; the classifier runs for every block of every page
+_UNORDERED_MARKERS = ("- ", "* ", "+ ")
+_ORDERED_ITEM_RE = re.compile(r"^\s*\d+\.\s+.+$")
+
+
+def classify_block(block):
+    """Return (BlockType, lines) for a block, scanning its lines at most once.
+
+    lines is the stripped block split on newlines, ready for block_to_html_node.
+    """
     block = block.strip()
     lines = block.split("\n")
     if lines[0].startswith("```") and lines[-1].endswith("```"):
-        return BlockType.code
-    elif all(line.startswith(">") for line in lines):
-        return BlockType.quote
-    elif block.startswith("#") and " " in block:  # Ensure heading has a space after #
-        return BlockType.heading
-    elif all(line.strip().startswith(("- ", "* ", "+ ")) or not line.strip() for line in lines):
-        # Allow empty lines in lists and recognize multiple list markers
-        return BlockType.unordered_list
-    elif all(re.match(r"^\s*\d+\.\s+.+$", line) or not line.strip() for line in lines):
-        # Allow empty lines in ordered lists
-        return BlockType.ordered_list
-    else:
-        return BlockType.paragraph
+        return BlockType.code, lines
+    if heading_level(block):  # "#" to "######" followed by a space
+        # (a quote can't start with "#", so checking this before quotes changes nothing)
+        return BlockType.heading, lines
+
+    # Single pass: drop each candidate type at the first line that rules it out
+    quote = unordered = ordered = True
+    for line in lines:
+        if quote and not line.startswith(">"):
+            quote = False
+        stripped = line.strip()
+        # Allow empty lines in lists
+        if stripped:
+            if unordered and not stripped.startswith(_UNORDERED_MARKERS):
+                unordered = False
+            if ordered and not _ORDERED_ITEM_RE.match(line):
+                ordered = False
+        if not (quote or unordered or ordered):
+            return BlockType.paragraph, lines
+
+    if quote:
+        return BlockType.quote, lines
+    if unordered:
+        return BlockType.unordered_list, lines
+    return BlockType.ordered_list, lines
+
+
+def block_to_block_type(block):
+    return classify_block(block)[0]
 
 
 def markdown_to_blocks(markdown):
@@ -49,14 +84,202 @@ def markdown_to_blocks(markdown):
 
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def text_to_children(text):
+    text_nodes = text_to_textnodes(text)
+    html_nodes = []
+    for text_node in text_nodes:
+        html_node = text_node_to_html_node(text_node)
+        html_nodes.append(html_node)
+    return html_nodes
+
+
+def block_to_html_node(block, block_type, text_to_children=text_to_children, lines=None):
+    # Build the HTMLNode for one block, or None when the block renders to nothing.
+    # lines can be passed in from classify_block to avoid splitting the block again
+    if lines is None and block_type not in (BlockType.paragraph, BlockType.heading):
+        lines = block.split('\n')
+
+    if block_type == BlockType.paragraph:
+        children = text_to_children(block)
+        new_node = HTMLNode("p", None, children, {})  # tag, value, children, props
+        return new_node
     
-    parent_node = HTMLNode("div", None, [], {})  # tag, value, children, props
+    elif block_type == BlockType.heading:
+        level = heading_level(block)
+        text = block[level:].strip()
+        children = text_to_children(text)
+        new_node = HTMLNode(f"h{level}", None, children, {})  # CORRECT
+        return new_node
+    
+    elif block_type == BlockType.code:
+        code_content = '\n'.join(lines[1:-1])
+        
+        # For code blocks, we don't process inline markdown
+        code_text_node = TextNode(code_content, TextType.TEXT)
+        code_html_node = text_node_to_html_node(code_text_node)
+        
+        # Create pre and code nodes
+        code_node = HTMLNode("code", None, [code_html_node], {})  # CORRECT
+        pre_node = HTMLNode("pre", None, [code_node], {})  # CORRECT
+        
+        # Add pre node as child to parent
+        return pre_node
+        
+    elif block_type == BlockType.quote:
+        # Remove the > prefix from each line
+        quote_lines = []
+        for line in lines:
+            if line.startswith('>'):
+                quote_lines.append(line[1:].strip())
+            else:
+                quote_lines.append(line.strip())
+        
+        quote_text = ' '.join(quote_lines)
+        children = text_to_children(quote_text)
+        quote_node = HTMLNode("blockquote", None, children, {})  # CORRECT
+        return quote_node
+        
+        
+        
+    elif block_type == BlockType.unordered_list:
+        ul_node = HTMLNode("ul", None, [], {})
+        
+        for line in lines:
+            line = line.strip()
+            if line.startswith(("- ", "* ", "+ ")):
+                item_text = line[2:]  # Remove the marker and space
+                
+                # Parse the text to maintain formatting
+                item_children = text_to_children(item_text)
+                
+                # Ensure the node is never a leaf without a value
+                if item_children:
+                    li_node = HTMLNode("li", None, item_children, {})
+                else:
+                    # If no formatted elements, use the text as the value
+                    li_node = HTMLNode("li", item_text, [], {})
+                
+                ul_node.children.append(li_node)
+        
+        if ul_node.children:
+            return ul_node
+        return None
+        
+        
+    elif block_type == BlockType.ordered_list:
+        ol_node = HTMLNode("ol", None, [], {})
+        
+        for line in lines:
+            line = line.strip()
+            if line and line[0].isdigit():
+                # Find the first space after the number and period
+                for i, char in enumerate(line):
+                    if char == ' ' and i > 0 and line[i-1] == '.':
+                        item_text = line[i+1:]
+                        break
+                else:
+                    continue  # Skip if the line doesn't match the pattern
+                
+                item_children = text_to_children(item_text)
+                li_node = HTMLNode("li", None, item_children, {})
+                ol_node.children.append(li_node)
+        
+        return ol_node
+
+
+def iter_blocks(source, chunk_size=1 << 16, offsets=None):
+    """Yield the stripped blocks of a markdown string or open text file, one at a time.
+
+    Splits exactly like markdown_to_blocks, but a file is read in chunks, so only the
+    block being assembled is held in memory rather than the whole document. With an
+    offsets list, the character offset each block starts at is appended to it just
+    before the block is yielded.
+    """
+    if isinstance(source, str):
+        chunks = (source,)
+    else:
+        chunks = iter(lambda: source.read(chunk_size), "")
+    pending = ""
+    # Offset of pending[0] in the whole document
+    consumed = 0
+    for chunk in chunks:
+        # A separator can straddle two chunks, so resume one character early
+        scan = max(0, len(pending) - 1)
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find("\n\n", scan)
+            if end == -1:
+                break
+            raw = pending[start:end]
+            block = raw.strip()
+            if block:
+                if offsets is not None:
+                    offsets.append(consumed + start + len(raw) - len(raw.lstrip()))
+                yield block
+            start = scan = end + 2
+        consumed += start
+        pending = pending[start:]
+    block = pending.strip()
+    if block:
+        if offsets is not None:
+            offsets.append(consumed + len(pending) - len(pending.lstrip()))
+        yield block
+
+
+def _timed_blocks(blocks, timings):
+    # Charge the time spent producing each block (splitting, file reads) to parse.blocks
+    blocks = iter(blocks)
+    while True:
+        started = perf_counter()
+        block = next(blocks, None)
+        timings["blocks"] += perf_counter() - started
+        if block is None:
+            return
+        yield block
+
+
+def _collect_refs(text_nodes, refs):
+    # Record ("link" | "image", url) for every link and image, including ones inside emphasis
+    stack = list(reversed(text_nodes))
+    while stack:
+        node = stack.pop()
+        if node.text_type in _REF_TYPES:
+            refs.append((node.text_type.value, node.url))
+        elif node.children:
+            stack.extend(reversed(node.children))
+
+
+def iter_block_nodes(blocks, cache=None, refs=None, toc=None):
+    # Lazily turn markdown blocks into HTML nodes, one node per block that renders to something.
+    # With a refs list, the (kind, url) of every link and image is appended to it as a side
+    # effect of parsing, so checking links never needs a second pass over the markdown.
+    # Headings get unique ids and are recorded in toc (a TableOfContents) the same way.
+    # Profiling hooks: timings are accumulated locally and reported once the blocks run out
+    profiler = build_profiler.active
+    if profiler is not None:
+        timings = {"blocks": 0.0, "classify": 0.0, "inline": 0.0, "tree": 0.0}
+        blocks = _timed_blocks(blocks, timings)
+
+    # The cache stores each block's refs next to its HTML, so collect them whenever caching
+    collect_refs = refs is not None or cache is not None
+    block_refs = []
+    if toc is None:
+        toc = TableOfContents()
+    last_text_nodes = None
     
     # Define helper function
     def text_to_children(text):
-        text_nodes = text_to_textnodes(text)
+        nonlocal last_text_nodes
+        if profiler is not None:
+            inline_started = perf_counter()
+            text_nodes = text_to_textnodes(text)
+            timings["inline"] += perf_counter() - inline_started
+        else:
+            text_nodes = text_to_textnodes(text)
+        if collect_refs:
+            _collect_refs(text_nodes, block_refs)
+        last_text_nodes = text_nodes
         html_nodes = []
         for text_node in text_nodes:
             html_node = text_node_to_html_node(text_node)
@@ -64,114 +287,108 @@ def markdown_to_html_node(markdown):
         return html_nodes
     
     # Process each block
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        
-        if block_type == BlockType.paragraph:
-            children = text_to_children(block)
-            new_node = HTMLNode("p", None, children, {})  # tag, value, children, props
-            parent_node.children.append(new_node)
-        
-        elif block_type == BlockType.heading:
-            level = 0
-            for char in block:
-                if char == '#':
-                    level += 1
-                else:
-                    break
-            
-            text = block[level:].strip()
-            children = text_to_children(text)
-            new_node = HTMLNode(f"h{level}", None, children, {})  # CORRECT
-            parent_node.children.append(new_node)
+    for block_index, block in enumerate(blocks):
+        if profiler is not None:
+            block_started = perf_counter()
+
+        # Heading ids depend on the rest of the page (duplicates get a suffix), so headings
+        # are never served from the cache; they're one line and cheap to parse anyway.
+        # Neither are images while the image pipeline adds their sizes and srcset: those are
+        # neither read from the cache nor written to it, or a later build without the
+        # pipeline would get them back
+        cacheable = cache is not None and not (images.active is not None and "![" in block)
+        if cacheable and block[0] != "#":
+            cached = cache.get(block)
+            if cached is not None:
+                html, cached_refs = cached
+                if refs is not None:
+                    refs.extend(cached_refs)
+                if profiler is not None:
+                    profiler.count("render_cache_hits")
+                    timings["tree"] += perf_counter() - block_started
+                yield RawNode(html)
+                continue
+
+        if profiler is not None:
+            classify_started = perf_counter()
+            block_type, lines = classify_block(block)
+            timings["classify"] += perf_counter() - classify_started
+        else:
+            block_type, lines = classify_block(block)
         
-        elif block_type == BlockType.code:
-            lines = block.split('\n')
-            code_content = '\n'.join(lines[1:-1])
-            
-            # For code blocks, we don't process inline markdown
-            code_text_node = TextNode(code_content, TextType.TEXT)
-            code_html_node = text_node_to_html_node(code_text_node)
-            
-            # Create pre and code nodes
-            code_node = HTMLNode("code", None, [code_html_node], {})  # CORRECT
-            pre_node = HTMLNode("pre", None, [code_node], {})  # CORRECT
-            
-            # Add pre node as child to parent
-            parent_node.children.append(pre_node)
-            
-        elif block_type == BlockType.quote:
-            # Remove the > prefix from each line
-            lines = block.split('\n')
-            quote_lines = []
-            for line in lines:
-                if line.startswith('>'):
-                    quote_lines.append(line[1:].strip())
-                else:
-                    quote_lines.append(line.strip())
-            
-            quote_text = ' '.join(quote_lines)
-            children = text_to_children(quote_text)
-            quote_node = HTMLNode("blockquote", None, children, {})  # CORRECT
-            parent_node.children.append(quote_node)
-            
-            
-            
-        elif block_type == BlockType.unordered_list:
-            lines = block.split('\n')
-            ul_node = HTMLNode("ul", None, [], {})
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith(("- ", "* ", "+ ")):
-                    item_text = line[2:]  # Remove the marker and space
-                    
-                    # Parse the text to maintain formatting
-                    item_children = text_to_children(item_text)
-                    
-                    # Ensure the node is never a leaf without a value
-                    if item_children:
-                        li_node = HTMLNode("li", None, item_children, {})
-                    else:
-                        # If no formatted elements, use the text as the value
-                        li_node = HTMLNode("li", item_text, [], {})
-                    
-                    ul_node.children.append(li_node)
-            
-            if ul_node.children:
-                parent_node.children.append(ul_node)
-            
-            
-        elif block_type == BlockType.ordered_list:
-            lines = block.split('\n')
-            ol_node = HTMLNode("ol", None, [], {})
-            
-            for line in lines:
-                if line.strip() and line.strip()[0].isdigit():
-                    # Find the first space after the number and period
-                    for i, char in enumerate(line.strip()):
-                        if char == ' ' and i > 0 and line.strip()[i-1] == '.':
-                            item_text = line.strip()[i+1:]
-                            break
-                    else:
-                        continue  # Skip if the line doesn't match the pattern
-                    
-                    item_children = text_to_children(item_text)
-                    li_node = HTMLNode("li", None, item_children, {})
-                    ol_node.children.append(li_node)
-            
-            parent_node.children.append(ol_node)
+        block_refs.clear()
+        new_node = block_to_html_node(block, block_type, text_to_children, lines)
+        if block_type == BlockType.heading:
+            anchor = toc.add(int(new_node.tag[1]), plain_text(last_text_nodes), block_index)
+            new_node.props = {"id": anchor}
+        elif cacheable:
+            # Keep the rendered fragment so identical blocks are never parsed again
+            html = new_node.to_html() if new_node is not None else ""
+            cache.put(block, html, block_refs)
+            new_node = RawNode(html)
+        if refs is not None:
+            refs.extend(block_refs)
+
+        if profiler is not None:
+            timings["tree"] += perf_counter() - block_started
+        if new_node is not None:
+            yield new_node
     
-    return parent_node
+    if profiler is not None:
+        profiler.add("parse.blocks", timings["blocks"])
+        profiler.add("parse.classify", timings["classify"])
+        profiler.add("parse.inline", timings["inline"])
+        profiler.add("parse.tree", timings["tree"] - timings["classify"] - timings["inline"])
+
+
+def markdown_to_html_node(markdown, cache=None, refs=None, toc=None):
+    # markdown is a string, or any iterable of blocks (e.g. iter_blocks(open_file))
+    if isinstance(markdown, str):
+        blocks = iter_blocks(markdown, offsets=toc.offsets if toc is not None else None)
+    else:
+        blocks = markdown
+    return HTMLNode("div", None, list(iter_block_nodes(blocks, cache, refs, toc)), {})  # tag, value, children, props
+
+
+def write_markdown_html(blocks, out, cache=None, refs=None, toc=None):
+    # Streaming counterpart of markdown_to_html_node(...).to_html(): each block is parsed,
+    # written to out and dropped before the next one is read
+    out.write("<div>")
+    for node in iter_block_nodes(blocks, cache, refs, toc):
+        write_html(node, out)
+    out.write("</div>")
+
+
+def split_title(blocks):
+    """Find the title in a stream of blocks without consuming the rest of it.
+
+    Returns (title, blocks), where blocks yields everything again from the start:
+    the few blocks read while looking for the title, then the untouched remainder.
+    """
+    blocks = iter(blocks)
+    seen = []
+    for block in blocks:
+        seen.append(block)
+        title = line_title(block)
+        if title is not None:
+            return title, chain(seen, blocks)
+    raise Exception("No title found")
+
+
+def line_title(text):
+    # The title is the first line starting with "# ", wherever it is: it doesn't have to
+    # start a block, e.g. "Intro\n# Title" with no blank line between still has one
+    for line in text.split("\n"):
+        line = line.strip()
+        if line.startswith("# "):
+            return line[2:].strip()
+    return None
 
 
 
 
 def extract_title(markdown_content):
-    
-    lines = markdown_content.split("\n")
-    for line in lines:
-        print(f"DEBUG: Checking line for title: '{line}'")
-        if line.strip().startswith("# "):  
-            return line.strip()[2:]
-    raise Exception("No title found")
\ No newline at end of file
+    # Stops at the first level 1 heading block, without splitting the rest of the document
+    title, _ = split_title(iter_blocks(markdown_content))
+    logger.debug("Found title %r", title)
+    return title
\ No newline at end of file
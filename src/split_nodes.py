@@ -1,6 +1,7 @@
 from textnode import TextNode, TextType
 from extract_images import extract_markdown_images
 from extract_images import extract_markdown_links
+from inline_tokenizer import tokenize_inline
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -32,7 +33,8 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
             new_nodes.append(TextNode(before, TextType.TEXT))  # Keep 'TEXT' type for 'before'
         new_nodes.append(TextNode(between, text_type))  # Assign the new type for 'between'
         if after:
-            new_nodes.append(TextNode(after, TextType.TEXT))  # Keep 'TEXT' type for 'after'
+            # Keep splitting the rest so every delimited span is found, not just the first
+            new_nodes.extend(split_text_node(TextNode(after, TextType.TEXT), delimiter, text_type))
 
         return new_nodes
 
@@ -120,8 +122,8 @@ def split_nodes_link(old_nodes):
                         new_nodes.append(TextNode(before_text, TextType.TEXT))
                     
                     # Add the link node with guaranteed non-empty text
-                        link_text = link_text or ""  # Ensure it's at least an empty string
-                        new_nodes.append(TextNode(link_text, TextType.LINK, url))
+                    link_text = link_text or ""  # Ensure it's at least an empty string
+                    new_nodes.append(TextNode(link_text, TextType.LINK, url))
                     
                     # Update start index to after this link markdown
                     start_idx = split_idx + len(link_markdown)
@@ -141,6 +143,12 @@ def split_nodes_link(old_nodes):
 
 
 def text_to_textnodes(text):
+    # Single left-to-right scan; see text_to_textnodes_reference for the original chain
+    return tokenize_inline(text)
+
+
+def text_to_textnodes_reference(text):
+    # Reference implementation: five full passes over the text, kept for differential tests
     # Initialize the list of text nodes
     text_nodes = [TextNode(text, TextType.TEXT)]
     
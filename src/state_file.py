@@ -0,0 +1,59 @@
+import json
+import os
+
+
+def load_state(path, version):
+    """Read a JSON state file written by save_state with the same version.
+
+    A missing, unreadable or outdated file simply means there is no previous
+    state: {} is returned and the caller starts over.
+    """
+    try:
+        with open(path, 'r') as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != version:
+        return {}
+    return data
+
+
+def save_state(path, version, **fields):
+    # sort_keys keeps the file byte-identical between builds that changed nothing
+    write_atomic(path, json.dumps({"version": version, **fields}, indent=2, sort_keys=True))
+
+
+def write_atomic(path, data):
+    # Write str or bytes to a temporary name first, so an interrupted build never leaves a
+    # torn file and a file hard-linked from static/ or a shard gets a new inode instead of
+    # being rewritten under the other name too
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb' if isinstance(data, bytes) else 'w') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_if_changed(path, text):
+    # Leave unchanged files alone, so no-op builds don't touch their mtimes (or whatever
+    # depends on them). Returns whether the file was written
+    try:
+        with open(path, 'r') as file:
+            if file.read() == text:
+                return False
+    except OSError:
+        pass
+    write_atomic(path, text)
+    return True
+
+
+def remove_empty_dirs(dir_path, stop_at=None):
+    # Prune directories left empty by removed files, stopping at the first non-empty one
+    # (or at stop_at, which is kept even when empty)
+    stop_at = os.path.normpath(stop_at) if stop_at is not None else None
+    while dir_path and os.path.normpath(dir_path) != stop_at:
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            return
+        dir_path = os.path.dirname(dir_path)
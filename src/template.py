@@ -0,0 +1,77 @@
+import io
+import os
+import re
+
+
+# Matches placeholders such as {{ Title }} or {{Content}}
+_SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# path -> (mtime_ns, size, CompiledTemplate)
+_template_cache = {}
+
+
+class CompiledTemplate:
+    """A template parsed once into literal segments and named slots.
+
+    ``parts`` alternates literal text (even indexes) and slot names (odd indexes),
+    so rendering is a single pass no matter how many slots the template has.
+    """
+
+    def __init__(self, source):
+        self.parts = []
+        self.placeholders = {}
+        # Files this template was built from; pages that use it depend on all of them
+        self.dependencies = ()
+        position = 0
+        for match in _SLOT_RE.finditer(source):
+            self.parts.append(source[position:match.start()])
+            self.parts.append(match.group(1))
+            # Unknown slots are written back verbatim, like the old str.replace did
+            self.placeholders.setdefault(match.group(1), match.group())
+            position = match.end()
+        self.parts.append(source[position:])
+
+    @property
+    def slots(self):
+        return set(self.parts[1::2])
+
+    def render(self, context):
+        out = io.StringIO()
+        self.render_to(out, context)
+        return out.getvalue()
+
+    def render_to(self, out, context):
+        write = out.write
+        parts = self.parts
+        for i in range(0, len(parts) - 1, 2):
+            if parts[i]:
+                write(parts[i])
+            name = parts[i + 1]
+            value = context.get(name)
+            if value is None:
+                write(self.placeholders[name])
+            elif callable(value):
+                # Streaming slot: the callable writes its own output (e.g. the page body)
+                value(out)
+            else:
+                write(str(value))
+        if parts[-1]:
+            write(parts[-1])
+
+
+def compile_template(source):
+    return CompiledTemplate(source)
+
+
+def load_template(path):
+    # Parse each template once per build; re-parse only when the file changes on disk
+    stat = os.stat(path)
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(path, 'r') as file:
+        template = CompiledTemplate(file.read())
+    template.dependencies = (path,)
+    _template_cache[path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
@@ -0,0 +1,98 @@
+import os
+import unittest
+
+from assets import copy_file, scan_files, sync_static
+from site_test_case import SiteTestCase
+
+
+class TestSyncStatic(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = os.path.join(self.cache, "asset-manifest.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "PNG-A")
+
+    def sync(self, **options):
+        return sync_static(self.static, self.public, self.manifest, **options)
+
+    def test_scan_files(self):
+        self.assertEqual(set(scan_files(self.static)), {"index.css", os.path.join("images", "a.png")})
+
+    def test_first_sync_copies_everything(self):
+        stats = self.sync()
+        self.assertEqual(stats["skipped"], 0)
+        self.assertEqual(stats["copied"] + stats["reflinked"], 2)
+        self.assertEqual(self.read(os.path.join(self.public, "images", "a.png")), "PNG-A")
+
+    def test_unchanged_files_are_skipped(self):
+        self.sync()
+        stats = self.sync()
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(stats["bytes"], 0)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red; }")
+        stats = self.sync()
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body { color: red; }")
+
+    def test_hash_check_ignores_touched_but_identical_files(self):
+        self.sync(check="hash")
+        os.utime(os.path.join(self.static, "index.css"), (1, 1))
+        stats = self.sync(check="hash")
+        self.assertEqual(stats["skipped"], 2)
+
+    def test_removed_sources_are_deleted_but_pages_are_kept(self):
+        self.sync()
+        page = os.path.join(self.public, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+
+        stats = self.sync()
+
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_hardlink_mode(self):
+        stats = self.sync(mode="hardlink")
+        self.assertEqual(stats["hardlinked"], 2)
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.static, "index.css"), os.path.join(self.public, "index.css")
+        ))
+        self.assertEqual(self.sync(mode="hardlink")["skipped"], 2)
+
+    def test_sync_after_hardlink_build_keeps_sources(self):
+        # A hard-linked public/ file is the static/ file: syncing over it must not truncate it
+        source = os.path.join(self.static, "index.css")
+        self.sync(mode="hardlink", check="hash")
+        with open(source, 'a') as file:
+            file.write(" p {}")
+        self.sync(check="hash")
+        self.assertEqual(self.read(source), "body {} p {}")
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body {} p {}")
+
+        # A destination linked to some other file is replaced, not written through
+        other = os.path.join(self.root, "other.css")
+        dst = os.path.join(self.public, "index.css")
+        os.remove(dst)
+        self.write(other, "other")
+        os.link(other, dst)
+        copy_file(source, dst)
+        self.assertEqual(self.read(other), "other")
+        self.assertEqual(self.read(dst), "body {} p {}")
+
+    def test_copy_file_replaces_existing_destination(self):
+        dst = os.path.join(self.public, "nested", "index.css")
+        self.write(dst, "old")
+        self.assertIn(copy_file(os.path.join(self.static, "index.css"), dst, "copy"), ("copy",))
+        self.assertEqual(self.read(dst), "body {}")
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.sync(mode="teleport")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+from build_log import QUIET, NORMAL, VERBOSE, configure_logging, get_logger
+from main import generate_page
+
+
+class TestBuildLog(unittest.TestCase):
+    def tearDown(self):
+        configure_logging(NORMAL)
+
+    def render_with(self, verbosity):
+        stream = io.StringIO()
+        configure_logging(verbosity, stream)
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, 'w') as file:
+                file.write("# Title\n\nSome **text**")
+            with open(template, 'w') as file:
+                file.write("{{ Title }}{{ Content }}")
+            generate_page(source, template, os.path.join(tmp, "out", "index.html"))
+        get_logger("main").info("milestone")
+        return stream.getvalue()
+
+    def test_normal_build_has_no_per_page_output(self):
+        self.assertEqual(self.render_with(NORMAL), "milestone\n")
+
+    def test_quiet_hides_milestones(self):
+        self.assertEqual(self.render_with(QUIET), "")
+
+    def test_verbose_adds_page_summary(self):
+        output = self.render_with(VERBOSE)
+        self.assertIn("DEBUG site.main: page source=", output)
+        self.assertIn("written=", output)
+
+    def test_levels(self):
+        self.assertEqual(configure_logging(VERBOSE, io.StringIO()), logging.DEBUG)
+        self.assertEqual(configure_logging(QUIET, io.StringIO()), logging.ERROR)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import unittest
+
+from build_manifest import BuildManifest, hash_file, load_manifest, save_manifest
+from main import generate_pages_recursive
+from site_test_case import SiteTestCase
+
+
+class TestBuildManifest(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.cache, "build-manifest.json")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+
+    def build(self):
+        manifest = BuildManifest(self.manifest_path)
+        generate_pages_recursive(self.content, self.template, self.public, manifest)
+        removed = manifest.remove_stale_outputs()
+        manifest.save()
+        return manifest, removed
+
+    def test_save_and_load_roundtrip(self):
+        pages = {"content/index.md": {"output": "public/index.html", "deps": {"content/index.md": "abc"}}}
+        save_manifest(self.manifest_path, pages)
+        self.assertEqual(load_manifest(self.manifest_path), pages)
+
+    def test_missing_manifest_is_empty(self):
+        self.assertEqual(load_manifest(os.path.join(self.root, "nope.json")), {})
+
+    def test_hash_file_changes_with_content(self):
+        path = os.path.join(self.content, "index.md")
+        before = hash_file(path)
+        self.write(path, "# Home, changed")
+        self.assertNotEqual(before, hash_file(path))
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        self.build()
+        blog_output = os.path.join(self.public, "blog", "index.html")
+        os.utime(blog_output, (0, 0))
+
+        self.write(os.path.join(self.content, "index.md"), "# Home, edited")
+        manifest, _ = self.build()
+
+        self.assertEqual(os.stat(blog_output).st_mtime, 0)
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertIn("Home, edited", file.read())
+        self.assertEqual(len(manifest.pages), 2)
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        blog_output = os.path.join(self.public, "blog", "index.html")
+        os.utime(blog_output, (0, 0))
+
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+
+        self.assertNotEqual(os.stat(blog_output).st_mtime, 0)
+
+    def test_section_template_applies_to_its_directory(self):
+        self.write(os.path.join(self.content, "blog", "template.html"), "<article>{{ Content }}</article>")
+        manifest, _ = self.build()
+
+        with open(os.path.join(self.public, "blog", "index.html")) as file:
+            self.assertTrue(file.read().startswith("<article>"))
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertTrue(file.read().startswith("<title>"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "template.html")))
+        self.assertEqual(
+            set(manifest.pages[os.path.join(self.content, "blog", "index.md")]["deps"]),
+            {os.path.join(self.content, "blog", "index.md"), os.path.join(self.content, "blog", "template.html")},
+        )
+
+    def test_section_template_change_rebuilds_only_its_pages(self):
+        section_template = os.path.join(self.content, "blog", "template.html")
+        self.write(section_template, "<article>{{ Content }}</article>")
+        self.build()
+        home_output = os.path.join(self.public, "index.html")
+        os.utime(home_output, (0, 0))
+
+        self.write(section_template, "<section>{{ Content }}</section>")
+        self.build()
+
+        self.assertEqual(os.stat(home_output).st_mtime, 0)
+        with open(os.path.join(self.public, "blog", "index.html")) as file:
+            self.assertTrue(file.read().startswith("<section>"))
+
+    def test_invalidate_returns_pages_reading_changed_files(self):
+        manifest, _ = self.build()
+        home = os.path.join(self.content, "index.md")
+        blog = os.path.join(self.content, "blog", "index.md")
+        self.assertEqual(manifest.invalidate([home]), [home])
+        self.assertEqual(manifest.invalidate([self.template]), sorted([home, blog]))
+        self.assertEqual(manifest.invalidate([os.path.join(self.root, "unrelated.txt")]), [])
+
+    def test_removed_sources_delete_their_outputs(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        manifest, removed = self.build()
+
+        blog_output = os.path.join(self.public, "blog", "index.html")
+        self.assertEqual(removed, [blog_output])
+        self.assertFalse(os.path.exists(blog_output))
+        self.assertNotIn(os.path.join(self.content, "blog", "index.md"), manifest.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
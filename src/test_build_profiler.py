@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import build_profiler
+from split_blocks import markdown_to_html_node
+from main import generate_page
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def tearDown(self):
+        build_profiler.disable()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(build_profiler.active)
+        with build_profiler.stage("anything"):
+            pass
+        markdown_to_html_node("# Title\n\nBody")
+
+    def test_markdown_to_html_node_records_parse_stages(self):
+        profiler = build_profiler.enable()
+        markdown_to_html_node("# Title\n\nSome **bold** text\n\n- a\n- b")
+        for stage in ("parse.blocks", "parse.classify", "parse.inline", "parse.tree"):
+            self.assertEqual(profiler.stage_calls[stage], 1)
+
+    def test_generate_page_counts_bytes_and_pages(self):
+        profiler = build_profiler.enable()
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "public", "index.html")
+            with open(source, 'w') as file:
+                file.write("# Title\n\nHello")
+            with open(template, 'w') as file:
+                file.write("<title>{{ Title }}</title>{{ Content }}")
+            generate_page(source, template, dest)
+
+            self.assertEqual(profiler.counters["pages"], 1)
+            self.assertEqual(profiler.counters["bytes_read"], os.path.getsize(source))
+            self.assertEqual(profiler.counters["bytes_written"], os.path.getsize(dest))
+            self.assertEqual([path for path, _ in profiler.slowest_pages()], [source])
+            for stage in ("read", "template", "parse", "title", "write"):
+                self.assertIn(stage, profiler.stage_seconds)
+
+    def test_merge_and_report(self):
+        first = build_profiler.BuildProfiler()
+        first.add("parse", 0.5)
+        first.count("pages", 2)
+        first.record_page("a.md", 0.3)
+        second = build_profiler.BuildProfiler()
+        second.add("parse", 0.25)
+        second.count("pages")
+        second.record_page("b.md", 0.4)
+
+        first.merge(second.to_dict())
+
+        self.assertEqual(first.stage_seconds["parse"], 0.75)
+        self.assertEqual(first.stage_calls["parse"], 2)
+        self.assertEqual(first.counters["pages"], 3)
+        self.assertEqual(first.slowest_pages(1), [("b.md", 0.4)])
+        report = first.report(top=1)
+        self.assertIn("pages rendered: 3", report)
+        self.assertIn("b.md", report)
+        self.assertNotIn("a.md", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import gzip
+import os
+import unittest
+
+from compress import compress_site, remove_sidecars
+from minify import minify_css, minify_html
+from site_test_case import SiteTestCase
+
+
+PAGE = (
+    "<!doctype html>\n<html>\n  <head>\n    <title> A  page </title>\n  </head>\n  <body>\n"
+    "    <p>Some   <b>bold</b>\n    text&nbsp;  here</p>\n"
+    "    <pre><code>def f():\n    return  1\n</code></pre>\n"
+    '    <img alt="a > b"   src="x.png" />\n  </body>\n</html>\n'
+)
+
+
+class TestMinify(unittest.TestCase):
+    def test_html(self):
+        self.assertEqual(
+            minify_html(PAGE),
+            "<!doctype html><html><head><title>A page</title></head><body>"
+            "<p>Some <b>bold</b> text&nbsp;  here</p>"
+            "<pre><code>def f():\n    return  1\n</code></pre>"
+            '<img alt="a > b"   src="x.png" /></body></html>',
+        )
+
+    def test_html_keeps_script_and_textarea(self):
+        html = "<div>\n<script>if (a  <b) {\n  x()\n}</script>\n<textarea>  two\n lines</textarea></div>"
+        self.assertEqual(
+            minify_html(html),
+            "<div><script>if (a  <b) {\n  x()\n}</script><textarea>  two\n lines</textarea></div>",
+        )
+
+    def test_css_colons(self):
+        # Declarations lose the space before ":", selectors (plain, nested, in @media) keep it
+        css = (
+            ".a :hover { color : red ; content : \"x :y\" }\n"
+            "@media screen { p :first-child { margin : 0 } }\n.b { padding : 0; & :focus { top : 0 } }"
+        )
+        self.assertEqual(
+            minify_css(css),
+            '.a :hover{color:red;content:"x :y"}@media screen{p :first-child{margin:0}}'
+            ".b{padding:0;& :focus{top:0}}",
+        )
+
+    def test_css(self):
+        css = (
+            "/* theme */\nbody {\n  color : #fff ;\n  font-family: \"Open  Sans\", serif;\n}\n"
+            "a :hover, p > a { content: '/* not a comment */' ; }\n/*! license */\n"
+            "@media (min-width: 10px) and (max-width: 20px) {\n  p { margin: 0 auto; }\n}\n"
+        )
+        self.assertEqual(
+            minify_css(css),
+            "body{color:#fff;font-family:\"Open  Sans\",serif}a :hover,p>a{content:'/* not a comment */'}"
+            "/*! license */@media (min-width:10px) and (max-width:20px){p{margin:0 auto}}",
+        )
+
+
+class TestCompressSite(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = os.path.join(self.cache, "compress-manifest.json")
+        self.write(self.path("index.html"), PAGE * 20)
+        self.write(self.path(os.path.join("blog", "post.html")), PAGE.replace("A  page", "Post") * 20)
+        self.write(self.path("index.css"), "body {\n  margin: 0;\n}\n" * 50)
+        self.write(self.path("image.png"), "not text")
+
+    def path(self, relative_path):
+        return os.path.join(self.public, relative_path)
+
+    def read_output(self, relative_path):
+        return self.read_bytes(self.path(relative_path))
+
+    def run_stage(self, **options):
+        options.setdefault("minify", True)
+        options.setdefault("gzip_level", 9)
+        return compress_site(self.public, manifest_path=self.manifest, **options)
+
+    def test_minifies_and_writes_sidecars(self):
+        stats = self.run_stage()
+        self.assertEqual((stats["files"], stats["processed"], stats["skipped"]), (3, 3, 0))
+        self.assertEqual(self.read_output("index.html").decode(), minify_html(PAGE * 20))
+        for relative_path in ("index.html", os.path.join("blog", "post.html"), "index.css"):
+            self.assertEqual(gzip.decompress(self.read_output(relative_path + ".gz")), self.read_output(relative_path))
+        self.assertFalse(os.path.exists(self.path("image.png.gz")))
+        self.assertLess(stats["minified_bytes"], stats["original_bytes"])
+        self.assertLess(stats["gzip_bytes"], stats["minified_bytes"])
+
+    def test_unchanged_files_are_skipped(self):
+        self.run_stage()
+        stats = self.run_stage()
+        self.assertEqual((stats["processed"], stats["skipped"]), (0, 3))
+
+        # The same page rendered again is only minified back, its .gz is kept
+        gz_mtime = os.stat(self.path("index.html.gz")).st_mtime_ns
+        self.write(self.path("index.html"), PAGE * 20)
+        stats = self.run_stage()
+        self.assertEqual((stats["processed"], stats["skipped"]), (0, 3))
+        self.assertEqual(self.read_output("index.html").decode(), minify_html(PAGE * 20))
+        self.assertEqual(os.stat(self.path("index.html.gz")).st_mtime_ns, gz_mtime)
+
+        self.write(self.path("index.html"), "<p>changed</p>" * 50)
+        stats = self.run_stage()
+        self.assertEqual(stats["processed"], 1)
+        self.assertEqual(gzip.decompress(self.read_output("index.html.gz")), b"<p>changed</p>" * 50)
+
+    def test_stale_sidecars_are_removed(self):
+        self.run_stage()
+        os.remove(self.path(os.path.join("blog", "post.html")))
+        stats = self.run_stage()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(self.path(os.path.join("blog", "post.html.gz"))))
+
+        # Switching gzip off drops the remaining .gz files
+        stats = self.run_stage(gzip_level=None)
+        self.assertEqual(stats["removed"], 2)
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+        self.run_stage()
+        self.assertEqual(remove_sidecars(self.public, self.manifest), 2)
+        self.assertFalse(os.path.exists(self.manifest))
+
+    def test_workers_match_serial(self):
+        self.run_stage(workers=2)
+        parallel = {name: self.read_output(name) for name in ("index.html", "index.html.gz", "index.css.gz")}
+        remove_sidecars(self.public, self.manifest)
+        self.write(self.path("index.html"), PAGE * 20)
+        self.run_stage()
+        self.assertEqual({name: self.read_output(name) for name in parallel}, parallel)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+import unittest
+
+from headings import TableOfContents, heading_level
+from main import render_page_text
+from metadata import read_page_header
+from split_blocks import BlockType, classify_block, extract_title, iter_blocks, markdown_to_html_node
+
+
+MARKDOWN = "# Guide\n\n## Install\n\ntext\n\n### From **source**\n\n## Install\n\n#tag\n\n## Use"
+
+
+class TestHeadings(unittest.TestCase):
+    def test_heading_level(self):
+        for block, level in (("# a", 1), ("###### a", 6), ("####### a", 0), ("#tag a", 0), ("#", 0), ("a # b", 0)):
+            self.assertEqual(heading_level(block), level, block)
+        self.assertEqual(classify_block("#tag with space")[0], BlockType.paragraph)
+
+    def test_anchors_and_offsets(self):
+        toc = TableOfContents()
+        html = markdown_to_html_node(MARKDOWN, toc=toc).to_html()
+        self.assertIn('<h3 id="from-source">From <b>source</b></h3>', html)
+        self.assertIn('<h2 id="install-1">Install</h2>', html)
+        self.assertEqual([heading[:3] for heading in toc.headings], [
+            (1, "Guide", "guide"), (2, "Install", "install"), (3, "From source", "from-source"),
+            (2, "Install", "install-1"), (2, "Use", "use"),
+        ])
+        for level, _, _, offset in toc.headings:
+            self.assertEqual(MARKDOWN[offset:offset + level + 1], "#" * level + " ")
+
+    def test_offsets_match_across_chunks(self):
+        offsets = []
+        chunked = []
+        list(iter_blocks(MARKDOWN, offsets=offsets))
+        list(iter_blocks(io.StringIO("\n\n  " + MARKDOWN), chunk_size=3, offsets=chunked))
+        self.assertEqual(chunked, [offset + 4 for offset in offsets])
+
+    def test_toc_html(self):
+        toc = TableOfContents()
+        markdown_to_html_node(MARKDOWN, toc=toc)
+        self.assertEqual(
+            toc.to_html(),
+            '<ul><li><a href="#install">Install</a><ul><li><a href="#from-source">From source</a></li></ul></li>'
+            '<li><a href="#install-1">Install</a></li><li><a href="#use">Use</a></li></ul>',
+        )
+        self.assertEqual(toc.to_html(max_level=2).count("<li>"), 3)
+        self.assertEqual(TableOfContents().to_html(), "")
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("Intro\n\n#    Spaced   \n\n# Second"), "Spaced")
+        with self.assertRaises(Exception):
+            extract_title("## Only h2\n\n#hashtag")
+
+    def test_title_need_not_start_a_block(self):
+        # Any line starting with "# " is the title, as it always was
+        markdown = "Some intro\n# The title\n\nBody"
+        self.assertEqual(extract_title(markdown), "The title")
+        self.assertEqual(extract_title("   # Indented\ntext"), "Indented")
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, 'w') as file:
+                file.write("<title>{{ Title }}</title>")
+            self.assertEqual(render_page_text("page.md", markdown, template), "<title>The title</title>")
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as file:
+                file.write(markdown)
+            self.assertEqual(read_page_header(path), ({}, "The title"))
+
+
+class TestTocSlot(unittest.TestCase):
+    def render(self, template_text):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, 'w') as file:
+                file.write(template_text)
+            return render_page_text("page.md", MARKDOWN, template)
+
+    def test_toc_before_and_after_content(self):
+        before = self.render("<nav>{{ Toc }}</nav><main>{{ Content }}</main>")
+        after = self.render("<main>{{ Content }}</main><nav>{{ Toc }}</nav>")
+        self.assertIn('<nav><ul><li><a href="#install">', before)
+        nav = before[:before.index("<main>")]
+        main = before[before.index("<main>"):]
+        self.assertEqual(after, main + nav)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
+import io
 import unittest
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, RawNode, escape_attribute, escape_text, link_parents, write_html
 from htmlnode import LeafNode  # Adjust the import path as needed
 from htmlnode import ParentNode  # Adjust the import path as needed
 from node_transformations import text_node_to_html_node
+from split_blocks import markdown_to_html_node
 from textnode import TextNode, TextType
 
 
@@ -47,6 +49,103 @@ class TestHTMLNode(unittest.TestCase):
 
 
 
+class TestCompactNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("b", "x"), ParentNode("p", [LeafNode(None, "x")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(TextNode("x", TextType.TEXT), "__dict__"))
+
+    def test_leaves_share_empty_children_and_props(self):
+        first = LeafNode(None, "a")
+        second = LeafNode("b", "c")
+        self.assertIs(first.children, second.children)
+        self.assertIs(first.props, second.props)
+        self.assertEqual(first.props, {})
+
+    def test_explicit_empty_props_stay_mutable(self):
+        node = LeafNode("a", "link", props={})
+        node.props["href"] = "/x"
+        self.assertEqual(node.to_html(), '<a href="/x">link</a>')
+
+    def test_parent_pointers_are_optional(self):
+        child = LeafNode("b", "x")
+        root = ParentNode("div", [ParentNode("p", [child])])
+        self.assertIsNone(child.parent)
+        link_parents(root)
+        self.assertIs(child.parent, root.children[0])
+        self.assertIs(root.children[0].parent, root)
+
+
+class TestWriteHTML(unittest.TestCase):
+    def test_streams_same_html_as_to_html(self):
+        tree = ParentNode("div", [
+            HTMLNode("p", None, [LeafNode(None, "Hello "), LeafNode("b", "world")]),
+            LeafNode("img", "", props={"src": "/a.png", "alt": "A"}),
+            HTMLNode("ul", None, [HTMLNode("li", "item")]),
+        ])
+        out = io.StringIO()
+        write_html(tree, out)
+        self.assertEqual(
+            out.getvalue(),
+            '<div><p>Hello <b>world</b></p><img src="/a.png" alt="A" /><ul><li>item</li></ul></div>',
+        )
+        self.assertEqual(tree.to_html(), out.getvalue())
+
+    def test_empty_paragraph_is_skipped(self):
+        node = ParentNode("div", [HTMLNode("p", "   "), LeafNode("span", "x")])
+        self.assertEqual(node.to_html(), "<div><span>x</span></div>")
+
+    def test_deep_tree_does_not_recurse(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_errors_propagate_from_children(self):
+        node = ParentNode("div", [LeafNode("span", "")])
+        with self.assertRaises(ValueError):
+            write_html(node, io.StringIO())
+
+
+class TestEscaping(unittest.TestCase):
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a < b && c > d"), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(escape_text("&lt;"), "&amp;lt;")
+        self.assertEqual(escape_text('"quoted"'), '"quoted"')
+
+    def test_fast_path_returns_the_same_string(self):
+        text = "nothing to escape here"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute('say "hi" & \'bye\''), "say &quot;hi&quot; &amp; &#x27;bye&#x27;")
+        self.assertEqual(escape_attribute(3), "3")
+
+    def test_leaf_text_and_props_are_escaped(self):
+        self.assertEqual(LeafNode("b", "<i>&</i>").to_html(), "<b>&lt;i&gt;&amp;&lt;/i&gt;</b>")
+        self.assertEqual(LeafNode(None, "1 < 2").to_html(), "1 &lt; 2")
+        node = LeafNode("img", "", {"src": "/a.png?x=1&y=2", "alt": 'a "quote"'})
+        self.assertEqual(node.to_html(), '<img src="/a.png?x=1&amp;y=2" alt="a &quot;quote&quot;" />')
+
+    def test_markdown_code_is_escaped(self):
+        html = markdown_to_html_node("```\nif a < b && c:\n```\n\nuse `<div>`").to_html()
+        self.assertIn("if a &lt; b &amp;&amp; c:", html)
+        self.assertIn("<code>&lt;div&gt;</code>", html)
+
+    def test_raw_node_is_not_escaped(self):
+        node = ParentNode("div", [RawNode("<p>a &amp; b</p>"), LeafNode(None, "&")])
+        self.assertEqual(node.to_html(), "<div><p>a &amp; b</p>&amp;</div>")
+        out = io.StringIO()
+        write_html(node, out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+
+
+
+
 def test_to_html_with_children(self):
     child_node = LeafNode("span", "child")
     parent_node = ParentNode("div", [child_node])
@@ -0,0 +1,173 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import images
+from images import ImageIndex, generate_derivatives, image_size
+from markdown_html import markdown_to_html
+from render_cache import RenderCache
+from site_test_case import SiteTestCase
+from split_blocks import markdown_to_html_node
+
+
+STATIC_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "static", "images")
+
+
+def png_header(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x06\0\0\0"
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, 'wb') as file:
+            file.write(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(image_size(os.path.join(STATIC_IMAGES, "rivendell.png")), (1344, 896))
+        self.assertEqual(self.size_of(png_header(640, 480)), (640, 480))
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 31, 7) + b"\0" * 8), (31, 7))
+        jpeg = (
+            b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 6) + b"JFIF"
+            + b"\xff\xc2" + struct.pack(">HBHH", 11, 8, 300, 400) + b"\0" * 6
+        )
+        self.assertEqual(self.size_of(jpeg), (400, 300))
+        vp8x = b"RIFF\0\0\0\0WEBPVP8X" + b"\0" * 8 + (1023).to_bytes(3, "little") + (767).to_bytes(3, "little")
+        self.assertEqual(self.size_of(vp8x), (1024, 768))
+        vp8l = b"RIFF\0\0\0\0WEBPVP8L" + b"\0" * 5 + struct.pack("<I", 99 | (49 << 14)) + b"\0" * 7
+        self.assertEqual(self.size_of(vp8l), (100, 50))
+        with self.assertRaises(ValueError):
+            self.size_of(b"not an image at all, just some text")
+
+
+class TestImageIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index_path = os.path.join(self.cache, "image-index.json")
+        self.attributes_path = os.path.join(self.cache, "image-attributes.json")
+        self.write(os.path.join(self.static, "images", "wide.png"), png_header(1200, 600))
+        self.write(
+            os.path.join(self.static, "images", "anim.gif"), b"GIF89a" + struct.pack("<HH", 300, 200) + b"\0" * 8,
+        )
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        images.disable()
+        super().tearDown()
+
+    def index(self, **options):
+        index = ImageIndex(self.index_path, **options)
+        index.update(self.static)
+        return index
+
+    def test_sizes_are_cached(self):
+        index = self.index()
+        self.assertEqual(index.read, 2)
+        self.assertTrue(index.write_attributes(self.attributes_path))
+        index.save([])
+        index = self.index()
+        self.assertEqual(index.read, 0)
+        self.assertFalse(index.write_attributes(self.attributes_path))
+
+    def test_srcset_needs_pillow(self):
+        with mock.patch.object(images, "Image", None):
+            attributes = self.index().attributes()
+        self.assertEqual(attributes, {
+            "/images/anim.gif": {"width": "300", "height": "200"},
+            "/images/wide.png": {"width": "1200", "height": "600"},
+        })
+
+    def test_derivative_plan(self):
+        with mock.patch.object(images, "Image", object()):
+            attributes = self.index(widths=(480, 960, 1600), sizes="100vw").attributes()
+            original = self.index(widths=(480,), image_format="original").attributes()
+        self.assertEqual(attributes["/images/wide.png"], {
+            "width": "1200", "height": "600",
+            "srcset": "/images/wide-480w.webp 480w, /images/wide-960w.webp 960w, /images/wide-1200w.webp 1200w",
+            "sizes": "100vw",
+        })
+        self.assertNotIn("srcset", attributes["/images/anim.gif"])
+        self.assertEqual(original["/images/wide.png"]["srcset"], "/images/wide-480w.png 480w, /images/wide.png 1200w")
+
+    def test_rendered_images(self):
+        markdown = "![A wide one](/images/wide.png) and ![elsewhere](https://example.com/x.png)"
+        cache = RenderCache()
+        self.assertEqual(
+            markdown_to_html_node(markdown, cache).to_html(),
+            '<div><p><img src="/images/wide.png" alt="A wide one" /> and '
+            '<img src="https://example.com/x.png" alt="elsewhere" /></p></div>',
+        )
+        index = self.index()
+        index.write_attributes(self.attributes_path)
+        images.enable(self.attributes_path)
+        # Served from neither the cache filled above nor a stale fragment
+        html = markdown_to_html_node(markdown, cache).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><img src="/images/wide.png" alt="A wide one" width="1200" height="600"'
+            + (' srcset="/images/wide-480w.webp 480w, /images/wide-960w.webp 960w, /images/wide-1200w.webp 1200w"'
+               if images.Image is not None else "")
+            + ' loading="lazy" /> and <img src="https://example.com/x.png" alt="elsewhere" loading="lazy" /></p></div>',
+        )
+        self.assertEqual(markdown_to_html(markdown, cache), html)
+        self.assertEqual(images.dependencies(), [self.attributes_path])
+
+    def test_pipeline_output_is_never_cached(self):
+        # A build with the pipeline, then one without it over the same disk cache
+        markdown = "Text\n\n![A wide one](/images/wide.png)"
+        plain = '<div><p>Text</p><p><img src="/images/wide.png" alt="A wide one" /></p></div>'
+        disk_dir = os.path.join(self.cache, "render")
+        self.index().write_attributes(self.attributes_path)
+        images.enable(self.attributes_path)
+        self.assertIn('width="1200"', markdown_to_html_node(markdown, RenderCache(disk_dir=disk_dir)).to_html())
+        self.assertIn('width="1200"', markdown_to_html(markdown, RenderCache(disk_dir=disk_dir)))
+        images.disable()
+        cache = RenderCache(disk_dir=disk_dir)
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), plain)
+        # Only the text block came from the cache
+        self.assertEqual(cache.disk_hits, 1)
+        self.assertEqual(markdown_to_html(markdown, RenderCache(disk_dir=disk_dir)), plain)
+
+
+@unittest.skipIf(images.Image is None, "Pillow is not installed")
+class TestDerivatives(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.cache, "images")
+        self.index_path = os.path.join(self.cache, "image-index.json")
+
+    def generate(self, widths):
+        index = ImageIndex(self.index_path, widths)
+        index.update(os.path.dirname(STATIC_IMAGES))
+        return generate_derivatives(index, os.path.dirname(STATIC_IMAGES), self.public, self.cache_dir, workers=2)
+
+    def test_encoded_once(self):
+        stats = self.generate((480,))
+        self.assertGreater(stats["encoded"], 0)
+        self.assertEqual(image_size(os.path.join(self.public, "images", "rivendell-480w.webp")), (480, 320))
+
+        stats = self.generate((480,))
+        self.assertEqual((stats["encoded"], stats["copied"]), (0, 0))
+
+        # Cleaning public/ copies from the cache instead of encoding again
+        os.remove(os.path.join(self.public, "images", "rivendell-480w.webp"))
+        stats = self.generate((480,))
+        self.assertEqual((stats["encoded"], stats["copied"]), (0, 1))
+
+        stats = self.generate((640,))
+        self.assertGreater(stats["removed"], 0)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "rivendell-480w.webp")))
+        self.assertNotIn("-480w-", " ".join(os.listdir(self.cache_dir)))
+
+
+if __name__ == "__main__":
+    unittest.main()
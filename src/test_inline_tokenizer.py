@@ -0,0 +1,80 @@
+import unittest
+
+from inline_tokenizer import tokenize_inline
+from node_transformations import text_node_to_html_node
+from split_nodes import text_to_textnodes, text_to_textnodes_reference
+from textnode import TextNode, TextType
+
+
+# Inputs the original split chain handles; the tokenizer must agree on all of them
+DIFFERENTIAL_CASES = [
+    "",
+    "plain text only",
+    "This is **text** with an _italic_ word and a `code block`",
+    "This is a [link](https://boot.dev) and an ![image](https://example.com/img.png)",
+    "[< Back Home](/)",
+    "![first](https://example.com/first.png)![second](https://example.com/second.png)",
+    "**one** and **two** and **three**",
+    "_a_ _b_ `c` `d`",
+    "****",
+    "***a***",
+    "brackets [without](a link and ![broken image",
+    "Here is [Google](https://google.com) and [YouTube](https://youtube.com).",
+    "1. **An Unnecessary Interlude**: text\n2. **An Outlier in Purpose**: more",
+    "Disney _didn't ruin it_ (okay, but Amazon might have)",
+]
+
+
+class TestInlineTokenizer(unittest.TestCase):
+    def test_matches_reference_chain(self):
+        for text in DIFFERENTIAL_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(tokenize_inline(text), text_to_textnodes_reference(text))
+
+    def test_text_to_textnodes_uses_tokenizer(self):
+        text = "A **bold** [link](/x)"
+        self.assertEqual(text_to_textnodes(text), tokenize_inline(text))
+
+    def test_unbalanced_delimiters_raise(self):
+        for text, delimiter in [("a **b", "**"), ("a _b", "_"), ("a `b", "`")]:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception) as context:
+                    tokenize_inline(text)
+                self.assertEqual(str(context.exception), f"Unbalanced delimiter: {delimiter}")
+
+    def test_code_spans_are_literal(self):
+        self.assertEqual(
+            tokenize_inline("use `my_var **x**` here"),
+            [
+                TextNode("use ", TextType.TEXT),
+                TextNode("my_var **x**", TextType.CODE),
+                TextNode(" here", TextType.TEXT),
+            ],
+        )
+
+    def test_nested_emphasis(self):
+        nodes = tokenize_inline("**bold _and italic_ [l](/u)** end")
+        self.assertEqual(
+            nodes,
+            [
+                TextNode(
+                    "bold and italic l",
+                    TextType.BOLD,
+                    children=[
+                        TextNode("bold ", TextType.TEXT),
+                        TextNode("and italic", TextType.ITALIC),
+                        TextNode(" ", TextType.TEXT),
+                        TextNode("l", TextType.LINK, "/u"),
+                    ],
+                ),
+                TextNode(" end", TextType.TEXT),
+            ],
+        )
+        self.assertEqual(
+            text_node_to_html_node(nodes[0]).to_html(),
+            '<b>bold <i>and italic</i> <a href="/u">l</a></b>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
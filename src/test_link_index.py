@@ -0,0 +1,74 @@
+import os
+import unittest
+
+from build_manifest import BuildManifest
+from link_index import LinkIndex, scan_site_files, target_exists, target_path
+from main import generate_pages_recursive
+from site_test_case import SiteTestCase
+from split_blocks import markdown_to_html_node
+
+
+class TestTargets(unittest.TestCase):
+    def test_target_path(self):
+        output = os.path.join("public", "blog", "tom", "index.html")
+        self.assertEqual(target_path("/images/a.png", output, "public"), "/images/a.png")
+        self.assertEqual(target_path("../majesty#top", output, "public"), "/blog/majesty")
+        self.assertEqual(target_path("pic%20one.png?v=2", output, "public"), "/blog/tom/pic one.png")
+        for url in ("https://example.com", "//cdn.example.com/x.js", "mailto:me@example.com", "#top"):
+            self.assertIsNone(target_path(url, output, "public"))
+
+    def test_target_exists(self):
+        files = {"index.html", "blog/tom/index.html", "about.html", "images/a.png"}
+        for target in ("/", "/blog/tom", "/about", "/images/a.png"):
+            self.assertTrue(target_exists(target, files), target)
+        self.assertFalse(target_exists("/blog", files))
+
+    def test_refs_are_collected_while_parsing(self):
+        refs = []
+        markdown_to_html_node("[a](/a) and **bold [b](/b)**\n\n![c](/c.png)\n\n```\n[no](/code)\n```", refs=refs)
+        self.assertEqual(refs, [("link", "/a"), ("link", "/b"), ("image", "/c.png")])
+
+
+class TestLinkCheck(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "logo.png"), "PNG")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[Blog](/blog) ![logo](/logo.png)")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\n[Home](/)")
+
+    def check(self):
+        manifest = BuildManifest(os.path.join(self.cache, "build-manifest.json"))
+        link_index = LinkIndex(os.path.join(self.cache, "link-index.json"), self.public)
+        generate_pages_recursive(self.content, self.template, self.public, manifest, link_index=link_index)
+        manifest.remove_stale_outputs()
+        manifest.save()
+        broken = link_index.check(scan_site_files(self.public, self.static))
+        link_index.save()
+        return link_index, broken
+
+    def test_clean_site_has_no_broken_links(self):
+        link_index, broken = self.check()
+        self.assertEqual(broken, [])
+        self.assertEqual(link_index.referrers()["/"], {os.path.join(self.content, "blog", "index.md")})
+
+    def test_reports_broken_links_and_missing_images(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[Gone](/gone) ![x](/x.png)")
+        _, broken = self.check()
+        source = os.path.join(self.content, "index.md")
+        self.assertEqual(broken, [(source, "link", "/gone"), (source, "image", "/x.png")])
+
+    def test_incremental_check_revalidates_only_affected_pages(self):
+        self.check()
+        link_index, broken = self.check()
+        self.assertEqual(link_index.revalidated, 0)
+        self.assertEqual(broken, [])
+
+        # Removing the blog page breaks the home page's link without the home page changing
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        link_index, broken = self.check()
+        self.assertEqual(link_index.revalidated, 1)
+        self.assertEqual(broken, [(os.path.join(self.content, "index.md"), "link", "/blog")])
+
+
+if __name__ == "__main__":
+    unittest.main()
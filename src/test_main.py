@@ -0,0 +1,109 @@
+import os
+import shutil
+import sys
+import unittest
+
+from io_pipeline import run_pipeline
+from main import collect_pages, generate_pages_recursive, page_output_path, render_page_text, render_pages
+from site_test_case import SiteTestCase
+
+
+class TestParallelRendering(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(6):
+            self.write(os.path.join(self.content, "blog", f"post{i}", "index.md"), f"# Post {i}\n\n## Section {i}")
+
+    def test_collect_pages_builds_job_list(self):
+        jobs = collect_pages(self.content, self.public)
+        self.assertEqual(len(jobs), 6)
+        self.assertIn(
+            (
+                os.path.join(self.content, "blog", "post3", "index.md"),
+                os.path.join(self.public, "blog", "post3", "index.html"),
+                None,
+            ),
+            jobs,
+        )
+
+    def test_collect_pages_is_sorted_and_filtered(self):
+        for name in ("drafts/wip.md", "notes.txt", "blog/_partial.md"):
+            self.write(os.path.join(self.content, name), "# Skip me")
+
+        jobs = collect_pages(self.content, self.public, exclude=("drafts", "*/_*"))
+
+        self.assertEqual(jobs, sorted(jobs))
+        self.assertEqual(len(jobs), 6)
+        self.assertTrue(all(source.endswith("index.md") for source, _, _ in jobs))
+
+    def test_collect_pages_handles_deep_trees(self):
+        deep = os.path.join(self.content, *["d"] * 150)
+        self.write(os.path.join(deep, "page.md"), "# Deep")
+        # Deeper than the recursion limit allows a recursive walk to go
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            jobs = collect_pages(self.content, self.public)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertIn(os.path.join(deep, "page.md"), [source for source, _, _ in jobs])
+
+    def test_page_output_path_only_changes_the_extension(self):
+        self.assertEqual(
+            page_output_path("notes.md", os.path.join("public", "v1.md")),
+            os.path.join("public", "v1.md", "notes.html"),
+        )
+        self.assertEqual(page_output_path("index.md", "public"), os.path.join("public", "index.html"))
+
+    def test_parallel_output_matches_serial(self):
+        jobs = collect_pages(self.content, self.public)
+        self.assertEqual(render_pages(jobs, self.template, workers=1), [])
+        serial = {}
+        for _, output_path, _ in jobs:
+            serial[output_path] = self.read(output_path)
+            os.remove(output_path)
+
+        self.assertEqual(render_pages(jobs, self.template, workers=3, batch_size=2), [])
+        for output_path, expected in serial.items():
+            self.assertEqual(self.read(output_path), expected)
+
+    def test_io_pipeline_output_matches_streaming(self):
+        jobs = collect_pages(self.content, self.public)
+        self.assertEqual(render_pages(jobs, self.template), [])
+        expected = {}
+        for _, output_path, _ in jobs:
+            expected[output_path] = self.read(output_path)
+        shutil.rmtree(self.public)
+
+        refs = {}
+        self.assertEqual(render_pages(jobs, self.template, refs=refs, io_threads=2), [])
+        self.assertEqual(len(refs), 6)
+        for output_path, text in expected.items():
+            self.assertEqual(self.read(output_path), text)
+
+    def test_io_pipeline_collects_errors(self):
+        broken = os.path.join(self.content, "blog", "post0", "index.md")
+        self.write(broken, "no title")
+        errors = run_pipeline(
+            collect_pages(self.content, self.public),
+            lambda job, text: render_page_text(job[0], text, self.template),
+            threads=2, depth=1,
+        )
+        self.assertEqual([source for source, _ in errors], [broken])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post0", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "post5", "index.html")))
+
+    def test_worker_errors_are_collected(self):
+        broken = os.path.join(self.content, "blog", "post0", "index.md")
+        self.write(broken, "")
+        jobs = collect_pages(self.content, self.public)
+
+        errors = render_pages(jobs, self.template, workers=2, batch_size=1)
+
+        self.assertEqual([source for source, _ in errors], [broken])
+        with self.assertRaises(Exception):
+            generate_pages_recursive(self.content, self.template, self.public, workers=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
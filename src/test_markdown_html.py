@@ -0,0 +1,47 @@
+import unittest
+
+from markdown_html import iter_markdown_html, markdown_to_html, markdown_to_html_batch
+from render_cache import RenderCache
+from split_blocks import markdown_to_html_node
+
+
+DOCUMENTS = [
+    "# Title\n\nSome **bold _nested_** and `code` with [a link](/a?x=1&y=2)\n\n![alt \"q\"](/i.png)",
+    "- one\n- _two_\n- \n\n1. first\n2. second\n\n> quoted\n> lines",
+    "```\nif a < b:\n    pass\n```\n\n###### Small\n\n#\n\nplain & simple",
+    "",
+    "- \n\n    \n\ntext",
+]
+
+
+class TestMarkdownToHTML(unittest.TestCase):
+    def test_matches_tree_rendering(self):
+        for markdown in DOCUMENTS:
+            self.assertEqual(markdown_to_html(markdown), markdown_to_html_node(markdown).to_html(), markdown)
+
+    def test_invalid_markdown_raises(self):
+        with self.assertRaises(ValueError):
+            markdown_to_html("empty ``")
+
+    def test_cache_is_shared_across_documents(self):
+        cache = RenderCache()
+        expected = [markdown_to_html_node(markdown).to_html() for markdown in DOCUMENTS]
+        self.assertEqual(markdown_to_html_batch(DOCUMENTS * 2, cache), expected * 2)
+        self.assertEqual(cache.hits, cache.misses)
+
+    def test_fragments_are_interchangeable_with_page_builds(self):
+        cache = RenderCache()
+        markdown_to_html(DOCUMENTS[0], cache)
+        refs = []
+        html = markdown_to_html_node(DOCUMENTS[0], cache, refs).to_html()
+        self.assertEqual(html, markdown_to_html_node(DOCUMENTS[0]).to_html())
+        self.assertEqual(refs, [("link", "/a?x=1&y=2"), ("image", "/i.png")])
+
+    def test_worker_pool_keeps_order(self):
+        documents = [f"# Doc {i}\n\nbody **{i}**" for i in range(25)]
+        expected = [markdown_to_html(markdown) for markdown in documents]
+        self.assertEqual(list(iter_markdown_html(iter(documents), workers=2, batch_size=3)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
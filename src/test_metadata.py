@@ -0,0 +1,200 @@
+import io
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest
+from listings import plan_listings, tag_slug, write_listings
+from main import generate_pages_recursive, render_page_text, section_template
+from metadata import MetadataIndex, page_metadata, page_url, read_front_matter, read_page_header
+from site_test_case import SiteTestCase
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_yaml_subset(self):
+        source = io.StringIO(
+            "---\ntitle: \"Hello: world\"\ndate: 2024-05-01\ntags: [a, 'b c']\n"
+            "draft: yes\n# a comment\nauthors:\n  - Tom\n  - Goldberry\n---\n# Body\n"
+        )
+        self.assertEqual(read_front_matter(source), {
+            "title": "Hello: world", "date": "2024-05-01", "tags": ["a", "b c"],
+            "draft": True, "authors": ["Tom", "Goldberry"],
+        })
+        self.assertEqual(source.read(), "# Body\n")
+
+    def test_yaml_scalars(self):
+        meta = read_front_matter(io.StringIO("---\nweight: -12\ncode: --5\nversion: 1-2\ntitle:\ntags:\n---\n"))
+        self.assertEqual(meta, {"weight": -12, "code": "--5", "version": "1-2", "title": None, "tags": None})
+
+    def test_empty_title_falls_back_to_heading(self):
+        source = "---\ntitle:\ndate: 2024-05-01\n---\n# Real title\n\nBody"
+        self.assertEqual(page_metadata("post.md", (read_front_matter(io.StringIO(source)), "Real title"))["title"],
+                         "Real title")
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            with open(template, 'w') as file:
+                file.write("<title>{{ Title }}</title>")
+            self.assertEqual(render_page_text("post.md", source, template), "<title>Real title</title>")
+            path = os.path.join(tmp, "post.md")
+            with open(path, 'w') as file:
+                file.write(source)
+            self.assertEqual(read_page_header(path)[1], "Real title")
+
+    def test_toml(self):
+        source = io.StringIO('+++\ntitle = "T"\ndate = 2024-05-01\ntags = ["x"]\n+++\nbody')
+        meta = read_front_matter(source)
+        self.assertEqual(page_metadata("blog/post.md", (meta, None)), {
+            "title": "T", "date": "2024-05-01", "tags": ["x"], "draft": False, "slug": "post",
+        })
+        self.assertEqual(source.read(), "body")
+
+    def test_stream_without_front_matter_is_untouched(self):
+        source = io.StringIO("# Title\n\ntext")
+        self.assertEqual(read_front_matter(source), {})
+        self.assertEqual(source.read(), "# Title\n\ntext")
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            read_front_matter(io.StringIO("---\ntitle: x\n"))
+        with self.assertRaisesRegex(ValueError, "not a pair.* in post.md"):
+            read_front_matter(io.StringIO("---\nnot a pair\n---\n"), "post.md")
+        with self.assertRaises(ValueError):
+            page_metadata("post.md", ({"date": "yesterday"}, None))
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("public", "index.html"), "public"), "/")
+        self.assertEqual(page_url(os.path.join("public", "blog", "tom", "index.html"), "public"), "/blog/tom")
+        self.assertEqual(page_url(os.path.join("public", "about.html"), "public"), "/about.html")
+
+
+class TestMetadataBuild(SiteTestCase):
+    TEMPLATE = "<title>{{ Title }}</title><time>{{ Date }}</time><main>{{ Content }}</main>"
+
+    def setUp(self):
+        super().setUp()
+        self.index_path = os.path.join(self.cache, "metadata-index.json")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "first.md"),
+                   "---\ndate: 2024-01-01\ntags: [news]\n---\n# First post\n\nHello")
+        self.write(os.path.join(self.content, "blog", "second.md"),
+                   "---\ntitle: Second & last\ndate: 2024-02-01\ntags: [news, Big Ideas]\n---\n\nNo heading")
+        self.write(os.path.join(self.content, "blog", "wip.md"),
+                   "---\ndate: 2024-03-01\ndraft: true\n---\n# Not yet")
+
+    def build(self, include_drafts=False, site_url="https://example.com/"):
+        manifest = BuildManifest(os.path.join(self.cache, "build-manifest.json"))
+        index = MetadataIndex(self.index_path, self.public)
+        generate_pages_recursive(
+            self.content, self.template, self.public, manifest, metadata=index, include_drafts=include_drafts,
+        )
+        manifest.remove_stale_outputs()
+        manifest.save()
+        touched = write_listings(
+            index, self.content, lambda dir_path: section_template(dir_path, self.content, self.template),
+            site_url,
+        )
+        index.save()
+        return index, touched
+
+    def test_front_matter_feeds_the_page(self):
+        self.build()
+        page = self.read(os.path.join(self.public, "blog", "second.html"))
+        self.assertEqual(page, "<title>Second &amp; last</title><time>2024-02-01</time><main><div><p>No heading</p></div></main>")
+        self.assertIn('<h1 id="first-post">First post</h1>', self.read(os.path.join(self.public, "blog", "first.html")))
+
+    def test_drafts_are_skipped(self):
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "wip.html")))
+        self.build(include_drafts=True)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "wip.html")))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "wip.html")))
+
+    def test_listings_feed_and_sitemap(self):
+        self.build()
+        listing = self.read(os.path.join(self.public, "blog", "index.html"))
+        self.assertLess(listing.index("Second &amp; last"), listing.index("First post"))
+        self.assertNotIn("Not yet", listing)
+        self.assertIn('href="/blog/first.html"', listing)
+        tag_page = self.read(os.path.join(self.public, "tags", "big-ideas", "index.html"))
+        self.assertIn("Second &amp; last", tag_page)
+        self.assertNotIn("First post", tag_page)
+        self.assertIn("news (2)", self.read(os.path.join(self.public, "tags", "index.html")))
+
+        feed = self.read(os.path.join(self.public, "feed.xml"))
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<updated>2024-02-01T00:00:00+00:00</updated>", feed)
+        self.assertIn('<link href="https://example.com/blog/second.html" />', feed)
+        sitemap = self.read(os.path.join(self.public, "sitemap.xml"))
+        self.assertIn("<loc>https://example.com/blog</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/</loc>", sitemap)
+        self.assertNotIn("wip", sitemap)
+
+    def test_no_feed_or_sitemap_without_site_url(self):
+        feed = os.path.join(self.public, "feed.xml")
+        sitemap = os.path.join(self.public, "sitemap.xml")
+        self.build(site_url="")
+        self.assertFalse(os.path.exists(feed))
+        self.assertFalse(os.path.exists(sitemap))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+
+        # Ones written by an earlier build with a site URL are removed
+        self.build()
+        self.assertTrue(os.path.exists(feed))
+        _, touched = self.build(site_url="")
+        self.assertIn(feed, touched)
+        self.assertFalse(os.path.exists(sitemap))
+
+    def test_bad_headers_fail_with_the_render_errors(self):
+        bad = os.path.join(self.content, "blog", "bad.md")
+        baddate = os.path.join(self.content, "blog", "baddate.md")
+        self.write(bad, "---\ntitle: x\n# Never closed")
+        self.write(baddate, "---\ndate: yesterday\n---\n# Bad date")
+        self.write(os.path.join(self.content, "blog", "empty.md"), "")
+        with self.assertLogs("site.main", "ERROR") as logs, self.assertRaises(Exception) as raised:
+            self.build()
+        self.assertEqual(str(raised.exception), "Failed to generate 3 page(s)")
+        self.assertIn(f"Front matter is not closed in {bad}", "\n".join(logs.output))
+        self.assertIn(f"Invalid date 'yesterday' in {baddate}", "\n".join(logs.output))
+        # Every other page was still rendered
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "first.html")))
+
+    def test_unchanged_pages_are_not_reread(self):
+        self.build()
+        index, touched = self.build()
+        self.assertEqual(index.read, 0)
+        self.assertEqual(touched, [])
+
+        # Dropping the last "Big Ideas" post removes its tag page
+        self.write(os.path.join(self.content, "blog", "second.md"), "# Second\n\nUndated now")
+        index, touched = self.build()
+        self.assertEqual(index.read, 1)
+        self.assertIn(os.path.join(self.public, "tags", "big-ideas", "index.html"), touched)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags", "big-ideas")))
+
+    def test_existing_page_wins_over_listing(self):
+        entries = [
+            {"title": "Blog", "url": "/blog", "date": None, "tags": []},
+            {"title": "Post", "url": "/blog/post", "date": "2024-01-01", "tags": []},
+        ]
+        self.assertEqual(plan_listings(entries), {})
+
+    def test_tags_never_replace_the_tag_index(self):
+        entries = [
+            {"title": "A", "url": "/a", "date": "2024-01-01", "tags": ["???", "C++", "C"]},
+        ]
+        listings = plan_listings(entries)
+        tag_urls = sorted(url for url in listings if url.startswith("/tags/"))
+        self.assertEqual(len(tag_urls), 3)
+        self.assertTrue(all(url.rstrip("/") != "/tags" for url in tag_urls))
+        self.assertIn(f"/tags/{tag_slug('???')}", tag_urls)
+        self.assertTrue(tag_slug("???").startswith("tag-"))
+        self.assertEqual([entry["title"] for entry in listings["/tags"][1]], ["??? (1)", "C (1)", "C++ (1)"])
+
+    def test_header_read_stops_at_title(self):
+        path = os.path.join(self.content, "blog", "first.md")
+        self.assertEqual(read_page_header(path), ({"date": "2024-01-01", "tags": ["news"]}, "First post"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import render_cache
+from render_cache import RenderCache, block_key
+from split_blocks import markdown_to_html_node
+
+
+MARKDOWN = "# Title\n\nSome **bold** and `code`\n\n- one\n- _two_\n\n> quoted\n\n```\nx = 1\n```"
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_cached_render_matches_uncached(self):
+        cache = RenderCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        # Every block but the heading, whose id depends on the rest of the page
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.hits, 4)
+
+    def test_key_depends_on_parser_version(self):
+        key = block_key("same block")
+        original = render_cache.PARSER_VERSION
+        render_cache.PARSER_VERSION = original + 1
+        try:
+            self.assertNotEqual(block_key("same block"), key)
+        finally:
+            render_cache.PARSER_VERSION = original
+
+    def test_memory_tier_is_lru_bounded(self):
+        cache = RenderCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ("<p>a</p>", ()))
+        self.assertEqual(cache.get("c"), ("<p>c</p>", ()))
+
+    def test_disk_tier_survives_between_caches(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            RenderCache(disk_dir=tmp).put("block", "<p>block</p>", [("link", "/a")])
+            cache = RenderCache(disk_dir=tmp)
+            self.assertEqual(cache.get("block"), ("<p>block</p>", (("link", "/a"),)))
+            self.assertEqual(cache.disk_hits, 1)
+
+    def test_trim_disk_evicts_oldest_first(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = RenderCache(disk_dir=tmp)
+            cache.put("old", "x" * 8)
+            old_path = cache._disk_path(block_key("old"))
+            os.utime(old_path, ns=(0, 0))
+            cache.put("new", "y" * 8)
+            # Room for exactly one fragment
+            cache.disk_max_bytes = os.path.getsize(old_path)
+            self.assertEqual(cache.trim_disk(), 1)
+            self.assertFalse(os.path.exists(old_path))
+            self.assertEqual(RenderCache(disk_dir=tmp).get("new"), ("y" * 8, ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
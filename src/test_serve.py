@@ -0,0 +1,168 @@
+import os
+import threading
+import unittest
+import urllib.request
+
+from serve import (
+    DevBuilder, InotifyWatcher, PollingWatcher, RELOAD_SCRIPT, ReloadBroadcaster, make_server,
+)
+from site_test_case import SiteTestCase
+
+
+class DevSiteTestCase(SiteTestCase):
+    TEMPLATE = "<html><body>{{ Title }}{{ Content }}</body></html>"
+
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def make_builder(self, **options):
+        builder = DevBuilder(
+            self.content, self.static, self.template, self.public,
+            os.path.join(self.cache, "build-manifest.json"),
+            os.path.join(self.cache, "asset-manifest.json"),
+            os.path.join(self.cache, "metadata-index.json"),
+            **options,
+        )
+        builder.full_build()
+        return builder
+
+
+class TestWatchers(DevSiteTestCase):
+    def check_watcher(self, watcher):
+        try:
+            page = os.path.join(self.content, "blog", "index.md")
+            self.write(page, "# Blog, edited")
+            self.assertIn(page, watcher.wait(timeout=2))
+
+            os.remove(os.path.join(self.static, "index.css"))
+            self.assertIn(os.path.join(self.static, "index.css"), watcher.wait(timeout=2))
+
+            self.write(os.path.join(self.root, "unrelated.txt"), "x")
+            self.write(self.template, "{{ Content }}")
+            changed = watcher.wait(timeout=2)
+            self.assertIn(self.template, changed)
+            self.assertNotIn(os.path.join(self.root, "unrelated.txt"), changed)
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher([self.content, self.static, self.template], interval=0.01)
+        self.check_watcher(watcher)
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content, self.static, self.template])
+        except (OSError, AttributeError):
+            self.skipTest("inotify not available")
+        self.check_watcher(watcher)
+
+
+class TestDevBuilder(DevSiteTestCase):
+    def test_only_changed_page_is_rerendered(self):
+        builder = self.make_builder()
+        home = os.path.join(self.public, "index.html")
+        os.utime(home, (0, 0))
+
+        page = os.path.join(self.content, "blog", "index.md")
+        self.write(page, "# Blog, edited")
+        touched = builder.apply_changes({page})
+
+        self.assertEqual(touched, [os.path.join(self.public, "blog", "index.html")])
+        self.assertIn("Blog, edited", self.read(touched[0]))
+        self.assertEqual(os.stat(home).st_mtime, 0)
+
+    def test_deleted_source_removes_output(self):
+        builder = self.make_builder()
+        page = os.path.join(self.content, "blog", "index.md")
+        os.remove(page)
+        builder.apply_changes({page})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+        self.assertNotIn(page, builder.manifest.pages)
+
+    def test_template_change_rerenders_everything(self):
+        builder = self.make_builder()
+        self.write(self.template, "<main>{{ Content }}</main>")
+        touched = builder.apply_changes({self.template})
+        self.assertEqual(len(touched), 2)
+        self.assertTrue(self.read(os.path.join(self.public, "index.html")).startswith("<main>"))
+
+    def test_section_template_change_rerenders_only_its_section(self):
+        section_template = os.path.join(self.content, "blog", "template.html")
+        self.write(section_template, "<article>{{ Content }}</article>")
+        builder = self.make_builder()
+        home = os.path.join(self.public, "index.html")
+        os.utime(home, (0, 0))
+
+        self.write(section_template, "<section>{{ Content }}</section>")
+        touched = builder.apply_changes({section_template})
+
+        self.assertEqual(touched, [os.path.join(self.public, "blog")])
+        self.assertTrue(self.read(os.path.join(self.public, "blog", "index.html")).startswith("<section>"))
+        self.assertEqual(os.stat(home).st_mtime, 0)
+
+        os.remove(section_template)
+        builder.apply_changes({section_template})
+        self.assertTrue(self.read(os.path.join(self.public, "blog", "index.html")).startswith("<html>"))
+
+    def test_excluded_pages_are_never_rendered(self):
+        drafts = os.path.join(self.content, "blog", "drafts")
+        self.write(os.path.join(drafts, "wip.md"), "# Work in progress")
+        builder = self.make_builder(exclude=("blog/drafts",))
+        wip_output = os.path.join(self.public, "blog", "drafts", "wip.html")
+        self.assertFalse(os.path.exists(wip_output))
+
+        # Not on edit, nor when a new page or the section around it changes
+        new_page = os.path.join(drafts, "new.md")
+        self.write(new_page, "# New")
+        section_template = os.path.join(self.content, "blog", "template.html")
+        self.write(section_template, "<article>{{ Content }}</article>")
+        builder.apply_changes({os.path.join(drafts, "wip.md"), new_page, drafts, section_template})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "drafts")))
+        self.assertTrue(self.read(os.path.join(self.public, "blog", "index.html")).startswith("<article>"))
+        self.assertEqual(
+            sorted(entry["url"] for entry in builder.metadata.published(include_drafts=True)), ["/", "/blog"],
+        )
+
+    def test_static_changes_are_synced(self):
+        builder = self.make_builder()
+        css = os.path.join(self.static, "index.css")
+        self.write(css, "body { color: red; }")
+        builder.apply_changes({css})
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body { color: red; }")
+
+        os.remove(css)
+        builder.apply_changes({css})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+
+
+class TestLiveReloadServer(DevSiteTestCase):
+    def test_html_gets_reload_script(self):
+        self.make_builder()
+        broadcaster = ReloadBroadcaster()
+        server = make_server(self.public, "127.0.0.1", 0, broadcaster)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}"
+            with urllib.request.urlopen(url + "/blog/") as response:
+                body = response.read().decode()
+            self.assertIn(RELOAD_SCRIPT + "</body>", body)
+            with urllib.request.urlopen(url + "/index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+        finally:
+            broadcaster.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_broadcaster_wakes_waiters(self):
+        broadcaster = ReloadBroadcaster()
+        seen = broadcaster.version
+        threading.Timer(0.05, broadcaster.notify).start()
+        self.assertEqual(broadcaster.wait(seen, timeout=2), seen + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import unittest
+
+from build_manifest import BuildManifest
+from main import generate_pages_recursive
+from shard import (
+    SHARD_MANIFEST_NAME, Shard, merge_shards, parse_shard, shard_of, shard_root, verify_shards,
+)
+from site_test_case import SiteTestCase
+
+
+class TestPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/8"), (2, 8))
+        for text in ("0/4", "5/4", "1/0", "x/2", "3"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_every_page_has_exactly_one_stable_shard(self):
+        paths = [f"blog/post{i}/index.md" for i in range(400)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        # Roughly balanced
+        self.assertTrue(all(60 < shards.count(index) < 140 for index in range(1, 5)))
+        self.assertEqual({shard_of(path, 1) for path in paths}, {1})
+
+
+class TestShardedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shards = os.path.join(self.root, ".shards")
+        for i in range(12):
+            self.write(os.path.join(self.content, "blog", f"post{i}", "index.md"), f"# Post {i}\n\nBody {i}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+
+    def build_shard(self, index, count):
+        root = shard_root(self.shards, index, count)
+        public = os.path.join(root, "public")
+        shard = Shard(index, count, self.content, public)
+        manifest = BuildManifest(os.path.join(root, "build-manifest.json"))
+        generate_pages_recursive(self.content, self.template, public, manifest, shard=shard)
+        shard.save(os.path.join(root, SHARD_MANIFEST_NAME))
+        return shard
+
+    def list_files(self, root):
+        return sorted(
+            os.path.relpath(os.path.join(dir_path, name), root)
+            for dir_path, _, names in os.walk(root) for name in names
+        )
+
+    def test_merged_shards_match_a_full_build(self):
+        full = os.path.join(self.root, "full")
+        generate_pages_recursive(self.content, self.template, full)
+        shards = [self.build_shard(index, 3) for index in (1, 2, 3)]
+        self.assertEqual(sum(len(shard.pages) for shard in shards), 13)
+
+        public = self.public
+        stats = merge_shards(self.shards, 3, public)
+        self.assertEqual((stats["pages"], stats["copied"]), (13, 13))
+        self.assertEqual(self.list_files(public), self.list_files(full))
+        for path in self.list_files(full):
+            self.assertEqual(self.read(os.path.join(public, path)), self.read(os.path.join(full, path)))
+
+        # Merging again copies nothing; a page that went away is removed from public/
+        self.assertEqual(merge_shards(self.shards, 3, public)["unchanged"], 13)
+        os.remove(os.path.join(self.content, "blog", "post0", "index.md"))
+        for index in (1, 2, 3):
+            self.build_shard(index, 3)
+        stats = merge_shards(self.shards, 3, public)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(public, "blog", "post0")))
+
+    def edit_manifest(self, index, count, edit):
+        path = os.path.join(shard_root(self.shards, index, count), SHARD_MANIFEST_NAME)
+        with open(path) as file:
+            data = json.load(file)
+        edit(data)
+        with open(path, 'w') as file:
+            json.dump(data, file)
+
+    def test_missing_shard_is_reported(self):
+        self.build_shard(1, 2)
+        with self.assertRaisesRegex(Exception, "shard 2/2 has no valid manifest"):
+            verify_shards(self.shards, 2)
+
+    def test_gap_and_overlap_are_reported(self):
+        self.build_shard(1, 2)
+        self.build_shard(2, 2)
+        verify_shards(self.shards, 2)
+
+        def drop_one(data):
+            data["pages"].popitem()
+        self.edit_manifest(1, 2, drop_one)
+        with self.assertRaisesRegex(Exception, "1 page\\(s\\) were not built by any shard"):
+            verify_shards(self.shards, 2)
+
+        self.build_shard(1, 2)
+        with open(os.path.join(shard_root(self.shards, 1, 2), SHARD_MANIFEST_NAME)) as file:
+            first = json.load(file)["pages"]
+
+        def steal(data):
+            data["pages"].update(first)
+        self.edit_manifest(2, 2, steal)
+        with self.assertRaisesRegex(Exception, "built by shards 1 and 2"):
+            verify_shards(self.shards, 2)
+
+    def test_shards_of_different_content_are_rejected(self):
+        self.build_shard(1, 2)
+        self.write(os.path.join(self.content, "new.md"), "# New")
+        self.build_shard(2, 2)
+        with self.assertRaisesRegex(Exception, "different content"):
+            verify_shards(self.shards, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
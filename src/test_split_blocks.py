@@ -0,0 +1,66 @@
+import io
+import unittest
+
+from split_blocks import (
+    BlockType,
+    classify_block,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    split_title,
+    write_markdown_html,
+)
+
+
+MARKDOWN = "\n\n# Title\n\nFirst **para**\n\n\n\n- a\n- b\n\n\n> quote\n\n```\ncode\n```\n\n"
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        for markdown in (MARKDOWN, "", "one", "a\n\n\nb", "a\n \n\nb", "\n\n\n"):
+            self.assertEqual(list(iter_blocks(markdown)), markdown_to_blocks(markdown))
+
+    def test_file_chunks_split_like_a_string(self):
+        # Tiny chunks put separators across chunk boundaries
+        for chunk_size in (1, 2, 3, 5, 64):
+            blocks = list(iter_blocks(io.StringIO(MARKDOWN), chunk_size))
+            self.assertEqual(blocks, markdown_to_blocks(MARKDOWN))
+
+
+class TestClassifyBlock(unittest.TestCase):
+    def test_returns_type_and_lines(self):
+        self.assertEqual(classify_block("- a\n\n* b"), (BlockType.unordered_list, ["- a", "", "* b"]))
+        self.assertEqual(classify_block("> a\n> b"), (BlockType.quote, ["> a", "> b"]))
+        self.assertEqual(classify_block("1. a\n2. b"), (BlockType.ordered_list, ["1. a", "2. b"]))
+        self.assertEqual(classify_block("```\nx\n```"), (BlockType.code, ["```", "x", "```"]))
+        self.assertEqual(classify_block("## Heading"), (BlockType.heading, ["## Heading"]))
+
+    def test_mixed_lines_are_a_paragraph(self):
+        self.assertEqual(classify_block("- a\n1. b")[0], BlockType.paragraph)
+        self.assertEqual(classify_block("> a\nb")[0], BlockType.paragraph)
+        self.assertEqual(classify_block("1. ")[0], BlockType.paragraph)
+
+
+class TestStreaming(unittest.TestCase):
+    def test_write_markdown_html_matches_tree(self):
+        out = io.StringIO()
+        write_markdown_html(iter_blocks(io.StringIO(MARKDOWN), 4), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_split_title_keeps_every_block(self):
+        title, blocks = split_title(iter_blocks("Intro\n\n# Title\n\nBody"))
+        self.assertEqual(title, "Title")
+        self.assertEqual(list(blocks), ["Intro", "# Title", "Body"])
+
+    def test_split_title_reads_only_up_to_the_title(self):
+        source = iter(["# Title", "Body", "More"])
+        split_title(source)
+        self.assertEqual(next(source), "Body")
+
+    def test_split_title_without_title(self):
+        with self.assertRaises(Exception):
+            split_title(iter_blocks("No title\n\nhere"))
+
+
+if __name__ == "__main__":
+    unittest.main()
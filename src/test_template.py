@@ -0,0 +1,54 @@
+import io
+import os
+import tempfile
+import unittest
+
+from template import compile_template, load_template
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = compile_template("<title>{{ Title }}</title><p>{{Description}}</p>{{ Content }}")
+        self.assertEqual(template.slots, {"Title", "Description", "Content"})
+        self.assertEqual(
+            template.render({"Title": "Home", "Description": "Hi", "Content": "<b>x</b>"}),
+            "<title>Home</title><p>Hi</p><b>x</b>",
+        )
+
+    def test_repeated_slots(self):
+        template = compile_template("{{ Title }} | {{ Title }}")
+        self.assertEqual(template.render({"Title": "A"}), "A | A")
+
+    def test_unknown_slots_are_left_verbatim(self):
+        template = compile_template("<nav>{{ Nav }}</nav>{{ Title }}")
+        self.assertEqual(template.render({"Title": "A"}), "<nav>{{ Nav }}</nav>A")
+
+    def test_callable_slots_stream_into_the_output(self):
+        template = compile_template("<main>{{ Content }}</main>")
+        out = io.StringIO()
+        template.render_to(out, {"Content": lambda stream: stream.write("streamed")})
+        self.assertEqual(out.getvalue(), "<main>streamed</main>")
+
+    def test_template_without_slots(self):
+        self.assertEqual(compile_template("static").render({}), "static")
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cached_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as file:
+                file.write("<h1>{{ Title }}</h1>")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, 'w') as file:
+                file.write("<h2>{{ Title }}</h2>")
+            os.utime(path, ns=(0, 12345))
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.render({"Title": "A"}), "<h2>A</h2>")
+
+
+if __name__ == "__main__":
+    unittest.main()
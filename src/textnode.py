@@ -10,17 +10,27 @@ class TextType(Enum):
 
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text if text is not None else ""  # Convert None to empty string
         self.text_type = text_type
         self.url = url
+        self.children = children  # Inner nodes for nested emphasis, None when flat
     
     def __eq__(self, other):
         if not isinstance(other, TextNode):
             return False
-        return self.text == other.text and self.text_type == other.text_type and self.url == other.url
+        return (
+            self.text == other.text
+            and self.text_type == other.text_type
+            and self.url == other.url
+            and self.children == other.children
+        )
     
     def __repr__(self):
     
     # Return string representation
+        if self.children:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
\ No newline at end of file